@@ -0,0 +1,227 @@
+# ann_index.py - Index nearest-neighbour untuk scoring katalog besar (exact dan IVF)
+import copy
+import logging
+
+import numpy as np
+
+from scoring import select_top_k
+
+# Jumlah list IVF yang diperiksa per query (knob recall vs latency)
+DEFAULT_PROBES = 8
+# Kandidat sebanyak ini atau kurang selalu diskor exact, IVF tidak memberi untung
+EXACT_THRESHOLD = 4096
+# Sampel training k-means per list, dan batas elemen float per blok perkalian
+SAMPLES_PER_LIST = 64
+BLOCK_VALUES = 1 << 22
+
+
+def default_lists(n_rows):
+    """Jumlah list IVF default: sekitar akar jumlah row"""
+    return max(1, int(np.sqrt(n_rows)))
+
+
+class ExactIndex:
+    """Brute-force: skor semua kandidat lewat TopKScorer (default dan fallback)"""
+
+    backend = 'exact'
+
+    def __init__(self, scorer):
+        self.scorer = scorer
+
+    def top_k(self, user_vector, ids, k=5, n_probe=None):
+        """(row id, skor) k skor tertinggi di antara kandidat `ids`"""
+        return self.scorer.top_k(user_vector, ids, k)
+
+    def copy(self, scorer):
+        """Index yang sama di atas scorer salinan"""
+        return ExactIndex(scorer)
+
+    def add_rows(self, ids):
+        """Tidak ada struktur tambahan yang perlu diperbarui"""
+
+    def update_rows(self, ids):
+        """Tidak ada struktur tambahan yang perlu diperbarui"""
+
+    def info(self):
+        return {'backend': self.backend}
+
+
+class IVFIndex:
+    """
+    Inverted file index: row katalog dikelompokkan dengan spherical k-means
+    di ruang scoring, dan query hanya menskor row di `n_probe` list yang
+    centroid-nya paling mirip.
+
+    Pencarian memperhatikan filter: kandidat hasil CatalogIndex dihitung per
+    list, dan list tambahan ikut diperiksa sampai paling sedikit k kandidat
+    terkumpul. Kandidat yang sedikit (<= `exact_threshold`) langsung diskor
+    exact. Skor akhir selalu dihitung exact oleh TopKScorer, jadi yang
+    berkurang hanya recall, bukan akurasi skor.
+    """
+
+    backend = 'ivf'
+
+    def __init__(self, scorer, centroids, assignments, n_probe=DEFAULT_PROBES, exact_threshold=EXACT_THRESHOLD):
+        self.scorer = scorer
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.assignments = np.array(assignments, dtype=np.int32)
+        self.n_probe = int(n_probe)
+        self.exact_threshold = exact_threshold
+        self._sizes = scorer.space.sizes.copy()
+        order = np.argsort(self.assignments, kind='stable')
+        boundaries = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[start:end] for start, end in zip(boundaries[:-1], boundaries[1:])]
+        self.list_sizes = np.diff(boundaries)
+
+    @classmethod
+    def train(cls, scorer, n_lists=None, n_probe=DEFAULT_PROBES, iterations=10, seed=0):
+        """Latih centroid dengan spherical k-means pada sampel row, lalu assign semua row"""
+        n_rows = len(scorer)
+        n_lists = min(int(n_lists or default_lists(n_rows)), n_rows)
+        rng = np.random.default_rng(seed)
+        sample_size = min(n_rows, max(n_lists, min(n_lists * SAMPLES_PER_LIST, BLOCK_VALUES // scorer.space.dim)))
+        sample = scorer.dense_rows(np.sort(rng.choice(n_rows, sample_size, replace=False)))
+
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels, similarity = _assign(sample, centroids)
+            order = np.argsort(labels, kind='stable')
+            starts = np.flatnonzero(np.r_[True, np.diff(labels[order]) != 0])
+            updated = np.zeros_like(centroids)
+            updated[labels[order][starts]] = np.add.reduceat(sample[order], starts)
+            # List kosong diisi ulang dengan row yang paling jauh dari centroid-nya
+            empty = np.flatnonzero(np.bincount(labels, minlength=n_lists) == 0)
+            if len(empty):
+                updated[empty] = sample[np.argsort(similarity)[:len(empty)]]
+            norms = np.linalg.norm(updated, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = updated / norms
+
+        assignments = np.empty(n_rows, dtype=np.int32)
+        step = _block_rows(scorer.space.dim, n_lists)
+        for start in range(0, n_rows, step):
+            ids = np.arange(start, min(start + step, n_rows))
+            assignments[ids] = _assign(scorer.dense_rows(ids), centroids)[0]
+        logging.info(f"IVF index trained: {n_lists} lists over {n_rows} rows (sample {sample_size})")
+        return cls(scorer, centroids, assignments, n_probe)
+
+    def copy(self, scorer):
+        """Salinan di atas scorer salinan (assignments dan list_sizes diubah di tempat)"""
+        index = copy.copy(self)
+        index.scorer = scorer
+        index.assignments = self.assignments.copy()
+        index.lists = list(self.lists)
+        index.list_sizes = self.list_sizes.copy()
+        return index
+
+    def _sync_layout(self):
+        """Sesuaikan kolom centroid jika blok one-hot melebar (kategori baru dari add_items)"""
+        space = self.scorer.space
+        if np.array_equal(self._sizes, space.sizes):
+            return
+        old_offsets = np.concatenate([[0], np.cumsum(self._sizes)[:-1]])
+        old_categorical_dim = int(self._sizes.sum())
+        centroids = np.zeros((len(self.centroids), space.dim), dtype=np.float32)
+        for old_offset, size, offset in zip(old_offsets, self._sizes, space.offsets):
+            centroids[:, offset:offset + size] = self.centroids[:, old_offset:old_offset + size]
+        centroids[:, space.categorical_dim:] = self.centroids[:, old_categorical_dim:]
+        self.centroids = centroids
+        self._sizes = space.sizes.copy()
+
+    def _nearest(self, ids):
+        """List terdekat untuk row id"""
+        self._sync_layout()
+        return _assign(self.scorer.dense_rows(ids), self.centroids)[0]
+
+    def add_rows(self, ids):
+        """Masukkan row baru (row id di akhir katalog) ke list terdekat"""
+        ids = np.asarray(ids)
+        labels = self._nearest(ids)
+        self.assignments = np.concatenate([self.assignments, labels.astype(np.int32)])
+        for row_id, label in zip(ids, labels):
+            self.lists[label] = np.append(self.lists[label], row_id)
+        self.list_sizes = self.list_sizes + np.bincount(labels, minlength=len(self.centroids))
+
+    def update_rows(self, ids):
+        """Pindahkan row yang fiturnya berubah ke list terdekat yang baru"""
+        ids = np.asarray(ids)
+        for row_id, label in zip(ids, self._nearest(ids)):
+            old = self.assignments[row_id]
+            if old == label:
+                continue
+            self.lists[old] = self.lists[old][self.lists[old] != row_id]
+            self.lists[label] = np.union1d(self.lists[label], [row_id])
+            self.assignments[row_id] = label
+            self.list_sizes[old] -= 1
+            self.list_sizes[label] += 1
+
+    def top_k(self, user_vector, ids, k=5, n_probe=None):
+        """(row id, skor) k skor tertinggi di antara kandidat terurut `ids`, hanya dari list yang diperiksa"""
+        n_probe = self.n_probe if n_probe is None else int(n_probe)
+        if len(ids) <= max(self.exact_threshold, k) or n_probe >= len(self.centroids):
+            return self.scorer.top_k(user_vector, ids, k)
+
+        self._sync_layout()
+        query = self.scorer.query_vectors(user_vector)[0]
+        order = np.argsort(-(self.centroids @ query), kind='stable')
+        all_rows = len(ids) == len(self.assignments)
+        counts = self.list_sizes if all_rows else np.bincount(self.assignments[ids], minlength=len(self.centroids))
+        # List tanpa kandidat yang lolos filter tidak dihitung sebagai probe,
+        # dan list ditambah sampai paling sedikit k kandidat terkumpul
+        order = order[counts[order] > 0]
+        probes = max(n_probe, int(np.searchsorted(np.cumsum(counts[order]), k)) + 1)
+        probed = order[:probes]
+
+        if all_rows:
+            selected = np.sort(np.concatenate([self.lists[label] for label in probed]))
+        else:
+            mask = np.zeros(len(self.centroids), dtype=bool)
+            mask[probed] = True
+            selected = ids[mask[self.assignments[ids]]]
+        scores = self.scorer.score(user_vector, selected)
+        return select_top_k(selected, scores, k)
+
+    def info(self):
+        return {
+            'backend': self.backend,
+            'lists': len(self.centroids),
+            'probes': self.n_probe,
+            'largest_list': int(self.list_sizes.max()) if len(self.list_sizes) else 0
+        }
+
+
+def _block_rows(dim, n_centroids):
+    """Jumlah row per blok agar matrix sementara tetap di bawah BLOCK_VALUES elemen"""
+    return max(1, BLOCK_VALUES // max(dim, n_centroids))
+
+
+def _assign(rows, centroids):
+    """Centroid paling mirip (dan skornya) untuk setiap row, dihitung per blok"""
+    labels = np.empty(len(rows), dtype=np.int64)
+    similarity = np.empty(len(rows), dtype=np.float32)
+    step = _block_rows(rows.shape[1], len(centroids))
+    for start in range(0, len(rows), step):
+        scores = rows[start:start + step] @ centroids.T
+        labels[start:start + step] = np.argmax(scores, axis=1)
+        similarity[start:start + step] = scores[np.arange(len(scores)), labels[start:start + step]]
+    return labels, similarity
+
+
+def build_search_index(scorer, backend='exact', n_lists=None, n_probe=DEFAULT_PROBES, trained=None):
+    """
+    Buat index pencarian sesuai konfigurasi.
+
+    `trained` berisi (centroids, assignments) dari artifact katalog agar IVF
+    tidak perlu dilatih ulang saat startup. Katalog yang lebih kecil dari
+    EXACT_THRESHOLD selalu memakai ExactIndex.
+    """
+    if backend == 'exact' or len(scorer) <= EXACT_THRESHOLD:
+        return ExactIndex(scorer)
+    if backend != 'ivf':
+        raise ValueError(f"Unknown search index backend: {backend}")
+    if trained is not None:
+        centroids, assignments = trained
+        if len(assignments) == len(scorer) and centroids.shape[1] == scorer.space.dim:
+            return IVFIndex(scorer, centroids, assignments, n_probe)
+        logging.warning("Stored IVF index does not match the catalog; retraining")
+    return IVFIndex.train(scorer, n_lists, n_probe)
@@ -1,33 +1,132 @@
 # app.py - Flask Application 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
+import hashlib
+import hmac
 import os
 import logging
-import pandas as pd
+import time
 
 # Import the ML system
-from mouse_recomender import MouseRecommendationSystem
+from catalog_manager import CatalogManager
+from response_cache import ResponseCache, canonical_key
+from pagination import CursorError, RankingCache, decode_cursor, encode_cursor
+from image_index import ImageIndex
+from static_assets import StaticAssets
+from image_derivatives import ImageDerivatives
+from click_log import ClickLog, clean_click
+from metrics import SlowRequestProfiler, registry, stage
+import request_log
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Configure logging: formatting dan I/O log dikerjakan thread latar (QueueListener).
+# Satu ringkasan per request (LOG_REQUESTS=0 mematikan); LOG_DEBUG=1 menyalakan
+# trace verbose per filter/hasil; LOG_FORMAT=json untuk log terstruktur.
+request_log.configure_logging(
+    debug=os.environ.get('LOG_DEBUG', '').lower() in ('1', 'true', 'yes'),
+    log_format=os.environ.get('LOG_FORMAT', 'text')
+)
+if os.environ.get('LOG_REQUESTS', '1').lower() in ('0', 'false', 'no'):
+    request_log.request_logger.setLevel(logging.WARNING)
 
-app = Flask(__name__, static_folder="static")
+# Route static bawaan Flask dimatikan; /static dilayani serve_static (ETag + Cache-Control)
+app = Flask(__name__, static_folder=None)
 CORS(app)
+# Body request yang lebih besar dari MAX_CONTENT_LENGTH byte ditolak dengan 413
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 1024 * 1024))
 
-# Initialize the ML recommendation system
+# Index gambar bersama untuk recommender dan route gambar
+IMAGE_FOLDERS = ["img", "static/img"]
+image_index = ImageIndex(IMAGE_FOLDERS)
+
+# Hash isi file statis & gambar untuk ETag dan URL ber-versi (dihitung sekali saat startup)
+# Jalankan `python static_assets.py static` saat build untuk varian gzip/brotli
+static_assets = StaticAssets(["static", "img"], max_age=int(os.environ.get('STATIC_MAX_AGE', 3600)))
+
+# Thumbnail gambar untuk /api/images/<file>?w=<lebar> (dibuat saat pertama diminta,
+# atau di-precompute dengan `python image_derivatives.py`)
+image_derivatives = ImageDerivatives(os.environ.get('IMAGE_CACHE_DIR', ".image-cache"))
+
+# Initialize the ML recommendation system (snapshot katalog bisa di-reload tanpa restart)
+# Set CATALOG_ARTIFACT ke direktori hasil `python catalog_artifact.py` untuk startup cepat
+# FEATURE_WEIGHTS menunjuk ke file bobot blok fitur (hasil `python tune_feature_weights.py`)
+# SEARCH_INDEX=ivf memakai index ANN untuk katalog besar; ANN_PROBES mengatur recall vs latency
+catalog = CatalogManager("Data_Mouse.csv", "img", image_index=image_index,
+                         artifact_path=os.environ.get('CATALOG_ARTIFACT') or None,
+                         feature_weights_path=os.environ.get('FEATURE_WEIGHTS') or None,
+                         search_index={
+                             'backend': os.environ.get('SEARCH_INDEX', 'exact'),
+                             'n_lists': int(os.environ.get('ANN_LISTS', 0)) or None,
+                             'n_probe': int(os.environ.get('ANN_PROBES', 8))
+                         },
+                         # Tabel tetangga untuk /api/mice/<id>/similar, dihitung per blok saat katalog
+                         # dimuat (SIMILAR_ITEMS_K=0 mematikan, SIMILAR_ITEMS_WORKERS > 1 memakai process pool)
+                         similar_items={
+                             'k': int(os.environ.get('SIMILAR_ITEMS_K', 10)),
+                             'workers': int(os.environ.get('SIMILAR_ITEMS_WORKERS', 1))
+                         })
 try:
-    recommender = MouseRecommendationSystem("Data_Mouse.csv", "img")
+    catalog.load()
     logging.info("Mouse Recommendation System initialized successfully!")
 except Exception as e:
     logging.error(f"Error initializing recommendation system: {str(e)}")
-    recommender = None
+catalog.start_watcher(float(os.environ.get('CATALOG_WATCH_INTERVAL', 0)))
+
+# Log klik hasil rekomendasi untuk tuning bobot fitur (nonaktif jika CLICK_LOG kosong).
+# File dirotasi setelah CLICK_LOG_MAX_BYTES, CLICK_LOG_BACKUPS file lama disimpan
+click_log = ClickLog(
+    os.environ['CLICK_LOG'],
+    max_bytes=int(os.environ.get('CLICK_LOG_MAX_BYTES', 50 * 1024 * 1024)),
+    backups=int(os.environ.get('CLICK_LOG_BACKUPS', 3))
+) if os.environ.get('CLICK_LOG') else None
+# Batas ukuran body event klik (byte)
+CLICK_MAX_BYTES = 4096
+
+# Cache response rekomendasi (LRU + TTL, dibuang otomatis saat katalog dimuat ulang)
+recommendation_cache = ResponseCache(
+    maxsize=int(os.environ.get('RESPONSE_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+)
+
+# Profiler sampling opt-in: stack request yang lebih lama dari SLOW_REQUEST_MS di-log
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 0))
+slow_request_profiler = SlowRequestProfiler(
+    SLOW_REQUEST_MS / 1000,
+    sample_rate=float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', 1.0))
+) if SLOW_REQUEST_MS > 0 else None
+
+# ========== METRIK REQUEST ==========
+@app.before_request
+def start_request_timer():
+    """Mulai pengukuran durasi request dan tahap-tahapnya"""
+    g.request_started = time.perf_counter()
+    g.request_stages = registry.begin_request()
+    request_log.begin_request()
+    g.profile_token = slow_request_profiler.start() if slow_request_profiler else None
+
+@app.after_request
+def record_request_metrics(response):
+    """Catat metrik dan ringkasan log request, kirim durasi tahap di header Server-Timing"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    stages = g.pop('request_stages', {})
+    registry.record_request(request.method, route, response.status_code, seconds)
+    request_log.log_request(request.method, route, response.status_code, seconds, stages)
+    if slow_request_profiler is not None:
+        slow_request_profiler.stop(g.pop('profile_token', None), seconds, f"{request.method} {request.path}")
+    if stages:
+        response.headers['Server-Timing'] = ", ".join(
+            f"{name};dur={duration * 1000:.3f}" for name, duration in stages.items())
+    return response
 
 # ========== ROUTE UTAMA ==========
 @app.route("/")
 def serve_index():
     """Route untuk menampilkan halaman utama"""
     try:
-        return send_from_directory("static", "index.html")
+        return static_assets.send_index("static")
     except Exception as e:
         logging.error(f"Error serving index: {str(e)}")
         return """
@@ -58,7 +157,7 @@ def serve_index():
 def serve_static(filename):
     """Route untuk melayani static files"""
     try:
-        return send_from_directory("static", filename)
+        return static_assets.send("static", filename)
     except Exception as e:
         logging.error(f"Error serving static file {filename}: {str(e)}")
         return jsonify({"error": "File not found"}), 404
@@ -68,7 +167,7 @@ def serve_static(filename):
 def serve_css():
     """Route untuk melayani CSS file"""
     try:
-        return send_from_directory("static", "style.css")
+        return static_assets.send("static", "style.css")
     except Exception as e:
         logging.error(f"Error serving CSS: {str(e)}")
         return jsonify({"error": "CSS file not found"}), 404
@@ -77,44 +176,42 @@ def serve_css():
 def serve_js():
     """Route untuk melayani JS file"""
     try:
-        return send_from_directory("static", "script.js")
+        return static_assets.send("static", "script.js")
     except Exception as e:
         logging.error(f"Error serving JS: {str(e)}")
         return jsonify({"error": "JS file not found"}), 404
 
+def send_image(folder, filename):
+    """Kirim gambar asli, atau thumbnail jika ada parameter ?w="""
+    width = request.args.get('w', type=int)
+    if width is None or width <= 0:
+        return static_assets.send(folder, filename)
+    
+    # WebP hanya untuk browser yang menyatakan dukungannya di header Accept
+    webp = 'image/webp' in request.headers.get('Accept', '')
+    derivative = image_derivatives.derive(folder, filename, width, webp=webp)
+    response = static_assets.send(*(derivative or (folder, filename)))
+    response.vary.add('Accept')
+    return response
+
 @app.route("/api/images/<filename>")
 def serve_image(filename):
     """API endpoint untuk melayani gambar mouse dengan perbaikan"""
     try:
         
-        image_folder = "img"  # Langsung ke folder img
-        
         # Bersihkan nama file
         clean_filename = filename.strip()
         
-        image_path = os.path.join(image_folder, clean_filename)
-        if os.path.exists(image_path):
-            return send_from_directory(image_folder, clean_filename)
-        
-        static_image_folder = "static/img"
-        static_image_path = os.path.join(static_image_folder, clean_filename)
-        if os.path.exists(static_image_path):
-            return send_from_directory(static_image_folder, clean_filename)
-        
-        # Coba cari file dengan nama serupa (case-insensitive)
-        for folder in [image_folder, static_image_folder]:
-            if os.path.exists(folder):
-                for file in os.listdir(folder):
-                    if file.lower() == clean_filename.lower():
-                        return send_from_directory(folder, file)
+        # Lookup di index gambar (exact dulu, lalu case-insensitive)
+        with stage('image_lookup'):
+            resolved = image_index.resolve(clean_filename)
+        if resolved:
+            return send_image(*resolved)
         
         # Return default image
-        default_images = ["default.jpg", "default.png", "no-image.jpg", "placeholder.jpg"]
-        for folder in [image_folder, static_image_folder]:
-            for default_img in default_images:
-                default_path = os.path.join(folder, default_img)
-                if os.path.exists(default_path):
-                    return send_from_directory(folder, default_img)
+        default_image = image_index.default_image()
+        if default_image:
+            return send_image(*default_image)
         
         # Jika tidak ada default image, return error
         logging.warning(f"Image not found: {filename}")
@@ -130,82 +227,402 @@ def serve_image_direct(filename):
     return serve_image(filename)
 
 # ========== API: OPTIONS ==========
+def format_options(recommender):
+    """Opsi filter dalam format yang dipakai frontend"""
+    options = recommender.get_available_options()
+    
+    # Convert the options to match the frontend format
+    return {
+        'brands': options.get('brands', []),
+        'categories': options.get('categories', []),
+        'connections': options.get('connections', []),
+        'sizes': options.get('sizes', []),
+        'shapes': options.get('shapes', [])
+    }
+
+# Body JSON /api/options dan ETag-nya, dihitung sekali per versi katalog
+options_cache = ResponseCache(maxsize=1, ttl=float('inf'))
+# Jumlah facet per pilihan parsial (dibuang otomatis saat katalog berubah)
+facet_cache = ResponseCache(
+    maxsize=int(os.environ.get('FACET_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+)
+
+def options_body(recommender):
+    """(JSON bytes, ETag) opsi filter untuk snapshot katalog ini"""
+    version = recommender.catalog_version
+    cached = options_cache.get('options', version)
+    if cached is None:
+        body = app.json.dumps(format_options(recommender)).encode("utf-8")
+        # ETag dari isi, jadi sama di semua worker untuk katalog yang sama
+        cached = (body, hashlib.sha256(body).hexdigest()[:32])
+        options_cache.put('options', version, cached)
+    return cached
+
 @app.route("/api/options")
 def get_options():
-    """API endpoint untuk mendapatkan opsi yang tersedia"""
+    """API endpoint untuk mendapatkan opsi yang tersedia (ETag, 304 jika tidak berubah)"""
+    recommender = catalog.current
     if recommender is None:
         return jsonify({"error": "Recommendation system not initialized"}), 500
     
     try:
-        options = recommender.get_available_options()
-        
-        # Convert the options to match the frontend format
-        formatted_options = {
-            'brands': options.get('brands', []),
-            'categories': options.get('categories', []),
-            'connections': options.get('connections', []),
-            'sizes': options.get('sizes', []),
-            'shapes': options.get('shapes', [])
-        }
-        
-        logging.info(f"Options sent to frontend: {formatted_options}")
-        return jsonify(formatted_options)
+        body, etag = options_body(recommender)
+        logging.debug("Options sent to frontend: %s", body)
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = "no-cache"
+        return response.make_conditional(request)
         
     except Exception as e:
         logging.error(f"Error in get_options: {str(e)}")
         return jsonify({"error": "Failed to get options"}), 500
 
+@app.route("/api/options/facets")
+def get_facets():
+    """
+    Jumlah mouse per nilai setiap dropdown untuk pilihan parsial di query
+    string (mis. ?category=Gaming&price_max=1500000), agar UI bisa
+    menonaktifkan kombinasi yang tidak punya hasil.
+    """
+    recommender = catalog.current
+    if recommender is None:
+        return jsonify({"error": "Recommendation system not initialized"}), 500
+    
+    try:
+        selection = {key: value for key, value in request.args.items() if value}
+        cache_key = canonical_key(selection)
+        version = recommender.catalog_version
+        cached = facet_cache.get(cache_key, version)
+        if cached is None:
+            with stage('facets'):
+                facets, total = recommender.facet_counts(selection)
+            cached = app.json.dumps({"facets": facets, "total": total}).encode("utf-8")
+            facet_cache.put(cache_key, version, cached)
+        return Response(cached, mimetype="application/json")
+        
+    except Exception as e:
+        logging.error(f"Error in get_facets: {str(e)}")
+        return jsonify({"error": "Failed to get facet counts"}), 500
+
 # ========== API: RECOMMENDATIONS ==========
+# Pelonggaran filter bertahap jika kandidat kurang dari RELAX_MIN_RESULTS
+# (request bisa menonaktifkannya dengan "relax": false)
+RELAX_FILTERS = os.environ.get('RELAX_FILTERS', '1').lower() not in ('0', 'false', 'no')
+RELAX_MIN_RESULTS = int(os.environ.get('RELAX_MIN_RESULTS', 1))
+
+def relax_requested(user_preferences):
+    """Pelonggaran filter aktif untuk request ini?"""
+    return RELAX_FILTERS and isinstance(user_preferences, dict) and user_preferences.get('relax', True) is not False
+
+def render_recommendations(recommender, user_preferences, top_n=5):
+    """Hitung rekomendasi dan serialisasi response-nya ke JSON bytes"""
+    # Get recommendations using the ML system
+    relaxed = []
+    if relax_requested(user_preferences):
+        recommendations, relaxed = recommender.get_recommendations_relaxed(
+            user_preferences, top_n=top_n, min_results=RELAX_MIN_RESULTS)
+    else:
+        recommendations = recommender.get_recommendations(user_preferences, top_n=top_n)
+    
+    request_log.annotate(results=len(recommendations), relaxed=len(relaxed))
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        for i, rec in enumerate(recommendations):
+            if 'image' in rec:
+                logging.debug("Recommendation %d: %s - Image: %s", i + 1, rec.get('name', 'Unknown'), rec['image'])
+    
+    with stage('json_encode'):
+        return app.json.dumps(recommendation_payload(recommendations, relaxed)).encode("utf-8")
+
+def recommendation_payload(recommendations, relaxed):
+    """Body response rekomendasi (dengan pesan jika kosong atau filter dilonggarkan)"""
+    if not recommendations:
+        payload = {
+            "recommendations": [],
+            "message": "No recommendations found matching your criteria. Try adjusting your preferences."
+        }
+    elif relaxed:
+        payload = {
+            "recommendations": recommendations,
+            "relaxed_filters": relaxed,
+            "message": "No exact matches found, so some filters were relaxed: "
+                       + ", ".join(item['filter'] for item in relaxed) + "."
+        }
+    else:
+        payload = {"recommendations": recommendations}
+    return payload
+
+# ========== PAGINATION ==========
+# Request dengan "limit" dan/atau "cursor" mendapat halaman hasil + next_cursor.
+# Urutan hasil per query disimpan sampai PAGINATION_MAX_RESULTS teratas di cache
+# terbatas, sehingga halaman berikutnya hanya memotong array tanpa scoring ulang.
+DEFAULT_PAGE_SIZE = 5
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 100))
+ranking_cache = RankingCache(
+    maxsize=int(os.environ.get('PAGINATION_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('PAGINATION_CACHE_TTL', 600)),
+    max_results=int(os.environ.get('PAGINATION_MAX_RESULTS', 500))
+)
+
+def wants_page(user_preferences):
+    """Request meminta paginasi (ada "limit" atau "cursor")?"""
+    return isinstance(user_preferences, dict) and ('limit' in user_preferences or 'cursor' in user_preferences)
+
+def recommendation_cache_key(user_preferences, top_n=5):
+    """
+    Key recommendation_cache untuk request ini. Halaman pertama (dengan
+    limit) ikut di-cache karena cursor-nya deterministik; halaman lanjutan
+    (cursor) tidak, karena cukup dipotong dari ranking_cache.
+    """
+    if not wants_page(user_preferences):
+        return canonical_key(user_preferences, top_n)
+    if user_preferences.get('cursor') is not None:
+        return None
+    return canonical_key(user_preferences, 'page')
+
+def render_recommendation_response(recommender, user_preferences, top_n=5):
+    """Body dan status /api/recommendations: halaman jika ada limit/cursor, selain itu top_n"""
+    if wants_page(user_preferences):
+        return render_recommendation_page(recommender, user_preferences)
+    return render_recommendations(recommender, user_preferences, top_n), 200
+
+def render_recommendation_page(recommender, payload):
+    """
+    Satu halaman rekomendasi sebagai (JSON bytes, status). Tanpa cursor:
+    halaman pertama untuk preferensi di body; dengan cursor: lanjutan dari
+    posisi di cursor (preferensi di body diabaikan).
+    """
+    limit = payload.get('limit', DEFAULT_PAGE_SIZE)
+    if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= MAX_PAGE_SIZE:
+        return app.json.dumps({"error": f"limit must be an integer between 1 and {MAX_PAGE_SIZE}"}).encode("utf-8"), 400
+    
+    version = recommender.catalog_version
+    if payload.get('cursor') is not None:
+        try:
+            user_preferences, offset = decode_cursor(payload['cursor'], version)
+        except CursorError as e:
+            return app.json.dumps({"error": str(e)}).encode("utf-8"), e.status
+    else:
+        user_preferences = {key: value for key, value in payload.items() if key not in ('limit', 'cursor')}
+        offset = 0
+    
+    relax = relax_requested(user_preferences)
+    ids, scores, relaxed, total = ranking_cache.ranking(recommender, user_preferences, relax=relax,
+                                                        min_results=RELAX_MIN_RESULTS if relax else 1)
+    end = min(offset + limit, len(ids))
+    with stage('format'):
+        recommendations = recommender.format_recommendations(ids[offset:end], scores[offset:end], start=offset + 1)
+    request_log.annotate(results=len(recommendations), relaxed=len(relaxed), offset=offset)
+    
+    payload = recommendation_payload(recommendations, relaxed)
+    # total = semua mouse yang cocok; halaman berhenti setelah PAGINATION_MAX_RESULTS hasil
+    payload["total"] = total
+    payload["next_cursor"] = (encode_cursor(user_preferences, end, version)
+                              if end < len(ids) else None)
+    with stage('json_encode'):
+        return app.json.dumps(payload).encode("utf-8"), 200
+
 @app.route("/api/recommendations", methods=["POST"])
 def recommend():
     """API endpoint untuk mendapatkan rekomendasi mouse"""
+    recommender = catalog.current
     if recommender is None:
         return jsonify({"error": "Recommendation system not initialized"}), 500
     
     try:
         user_preferences = request.json
-        logging.info(f"User preferences received: {user_preferences}")
+        logging.debug("User preferences received: %s", user_preferences)
         
-        # Get recommendations using the ML system
-        recommendations = recommender.get_recommendations(user_preferences, top_n=5)
+        # Response yang sama disajikan langsung dari cache sebagai JSON bytes
+        # Versi diambil sebelum body dihitung agar hasil tidak di-cache di bawah versi yang lebih baru
+        cache_key = recommendation_cache_key(user_preferences)
+        version = recommender.catalog_version
+        if cache_key is not None:
+            cached = recommendation_cache.get(cache_key, version)
+            request_log.annotate(cache="hit" if cached is not None else "miss")
+            if cached is not None:
+                return Response(cached, mimetype="application/json")
         
-        logging.info(f"Recommendations generated: {len(recommendations)} items")
+        body, status = render_recommendation_response(recommender, user_preferences)
+        if cache_key is not None and status == 200:
+            recommendation_cache.put(cache_key, version, body)
+        return Response(body, status=status, mimetype="application/json")
+    
+    except Exception as e:
+        logging.error(f"Error in recommend: {str(e)}")
+        return jsonify({"error": "Failed to get recommendations"}), 500
+
+# ========== API: BATCH RECOMMENDATIONS ==========
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+
+@app.route("/api/recommendations/batch", methods=["POST"])
+def recommend_batch():
+    """API endpoint untuk rekomendasi banyak preferensi dalam satu request"""
+    recommender = catalog.current
+    if recommender is None:
+        return jsonify({"error": "Recommendation system not initialized"}), 500
+    
+    try:
+        payload = request.json
+        top_n = 5
+        if isinstance(payload, dict):
+            top_n = payload.get('top_n', 5)
+            payload = payload.get('preferences')
         
-        for i, rec in enumerate(recommendations):
-            if 'image' in rec:
-                logging.info(f"Recommendation {i+1}: {rec.get('name', 'Unknown')} - Image: {rec['image']}")
+        if not isinstance(payload, list) or not all(isinstance(p, dict) for p in payload):
+            return jsonify({"error": "Expected a list of preference objects"}), 400
+        if len(payload) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE} profiles)"}), 400
+        try:
+            top_n = int(top_n)
+        except (ValueError, TypeError):
+            return jsonify({"error": "top_n must be an integer"}), 400
         
-        if not recommendations:
-            return jsonify({
-                "recommendations": [],
-                "message": "No recommendations found matching your criteria. Try adjusting your preferences."
-            })
+        # Pelonggaran filter sama seperti /api/recommendations (per profil, "relax": false mematikan)
+        results, relaxed = recommender.get_recommendations_batch_relaxed(
+            payload, top_n=top_n, min_results=RELAX_MIN_RESULTS, relax=[relax_requested(p) for p in payload])
+        request_log.annotate(profiles=len(results))
         
-        return jsonify({"recommendations": recommendations})
+        return jsonify({"results": [recommendation_payload(recs, relaxed_filters)
+                                    for recs, relaxed_filters in zip(results, relaxed)]})
     
     except Exception as e:
-        logging.error(f"Error in recommend: {str(e)}")
-        return jsonify({"error": f"Failed to get recommendations: {str(e)}"}), 500
+        logging.error(f"Error in recommend_batch: {str(e)}")
+        return jsonify({"error": f"Failed to get batch recommendations: {str(e)}"}), 500
+
+# ========== API: SIMILAR MICE ==========
+@app.route("/api/mice/<int:mouse_id>/similar")
+def similar_mice(mouse_id):
+    """API endpoint untuk mouse yang mirip dengan satu mouse (id dari hasil rekomendasi)"""
+    recommender = catalog.current
+    if recommender is None:
+        return jsonify({"error": "Recommendation system not initialized"}), 500
+    
+    try:
+        top_n = int(request.args.get('k', 5))
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
+    
+    if recommender.neighbour_table is None:
+        return jsonify({"error": "Similar items are disabled (SIMILAR_ITEMS_K=0)"}), 404
+    
+    try:
+        similar = recommender.get_similar_items(mouse_id, max(top_n, 0))
+        if similar is None:
+            return jsonify({"error": "Mouse not found"}), 404
+        return jsonify({"id": mouse_id, "similar": similar})
+    except Exception as e:
+        logging.error(f"Error in similar_mice: {str(e)}")
+        return jsonify({"error": "Failed to get similar mice"}), 500
 
 # ========== API: SYSTEM INFO ==========
 @app.route("/api/info")
 def get_info():
     """API endpoint untuk mendapatkan informasi sistem"""
+    recommender = catalog.current
     if recommender is None:
         return jsonify({"error": "Recommendation system not initialized"}), 500
     
     try:
         info = recommender.get_system_info()
+        info['catalog'] = catalog.status()
+        info['response_cache'] = recommendation_cache.stats()
+        info['facet_cache'] = facet_cache.stats()
+        info['ranking_cache'] = ranking_cache.stats()
         return jsonify(info)
     except Exception as e:
         logging.error(f"Error in get_info: {str(e)}")
         return jsonify({"error": "Failed to get system info"}), 500
 
+# ========== METRICS (PROMETHEUS) ==========
+def metrics_text():
+    """Metrik proses ini dalam format teks Prometheus"""
+    recommender = catalog.current
+    caches = {'recommendations': recommendation_cache.stats(), 'facets': facet_cache.stats(),
+              'rankings': ranking_cache.stats()}
+
+    def per_cache(field):
+        return {(('cache', name),): stats[field] for name, stats in caches.items()}
+
+    counters = [
+        ('mouse_response_cache_hits_total', 'Cache hit response API', per_cache('hits')),
+        ('mouse_response_cache_misses_total', 'Cache miss response API', per_cache('misses')),
+        ('mouse_response_cache_evictions_total', 'Entry cache response yang dibuang', per_cache('evictions')),
+        ('mouse_response_cache_invalidations_total', 'Cache response dikosongkan karena katalog berubah',
+         per_cache('invalidations')),
+    ]
+    gauges = [
+        ('mouse_response_cache_entries', 'Jumlah entry cache response', per_cache('size')),
+        ('mouse_catalog_loaded', 'Katalog sudah dimuat (1) atau belum (0)', {(): int(recommender is not None)}),
+    ]
+    if recommender is not None:
+        profiles = recommender.profile_cache_info()
+        counters += [
+            ('mouse_profile_cache_hits_total', 'Cache hit user vector', {(): profiles.hits}),
+            ('mouse_profile_cache_misses_total', 'Cache miss user vector', {(): profiles.misses}),
+        ]
+        gauges += [
+            ('mouse_catalog_rows', 'Jumlah mouse aktif di katalog', {(): len(recommender.catalog_index.all_ids())}),
+            ('mouse_catalog_version', 'Versi snapshot katalog aktif', {(): recommender.catalog_version}),
+            ('mouse_profile_cache_entries', 'Jumlah entry cache user vector', {(): profiles.currsize}),
+        ]
+    if slow_request_profiler is not None:
+        counters.append(('mouse_slow_requests_total', 'Request lebih lama dari SLOW_REQUEST_MS',
+                         {(): slow_request_profiler.slow_requests}))
+    return registry.render(gauges=gauges, counters=counters)
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Metrik latency per tahap, counter request, cache dan katalog (format Prometheus)"""
+    return Response(metrics_text(), mimetype="text/plain; version=0.0.4")
+
+# ========== API: CATALOG RELOAD ==========
+@app.route("/api/catalog/reload", methods=["POST"])
+def reload_catalog():
+    """API endpoint untuk memuat ulang katalog tanpa restart (di gunicorn diteruskan ke master)"""
+    # Reload membangun ulang katalog (dan me-restart worker gunicorn), jadi endpoint
+    # hanya aktif jika CATALOG_RELOAD_TOKEN diisi
+    token = os.environ.get('CATALOG_RELOAD_TOKEN')
+    if not token:
+        return jsonify({"error": "Catalog reload is disabled (set CATALOG_RELOAD_TOKEN)"}), 404
+    if not hmac.compare_digest(request.headers.get('X-Reload-Token', '').encode(), token.encode()):
+        return jsonify({"error": "Invalid reload token"}), 403
+    
+    try:
+        started = catalog.reload()
+        return jsonify({
+            "status": "reloading" if started else "queued",
+            "catalog": catalog.status()
+        }), 202
+    except Exception as e:
+        logging.error(f"Error in reload_catalog: {str(e)}")
+        return jsonify({"error": "Failed to reload catalog"}), 500
+
+# ========== API: CLICK FEEDBACK ==========
+@app.route("/api/feedback/click", methods=["POST"])
+def record_click():
+    """API endpoint untuk mencatat klik pada hasil rekomendasi"""
+    if request.content_length is None:
+        return jsonify({"error": "Content-Length required"}), 411
+    if request.content_length > CLICK_MAX_BYTES:
+        return jsonify({"error": f"Click events are limited to {CLICK_MAX_BYTES} bytes"}), 413
+    try:
+        event = clean_click(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if click_log is not None:
+        try:
+            click_log.record(*event)
+        except Exception as e:
+            logging.error(f"Error recording click: {str(e)}")
+    return "", 204
+
 # ========== HEALTH CHECK ==========
-@app.route("/health")
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
+def health_status():
+    """Status kesehatan service (dipakai juga oleh server ASGI)"""
+    recommender = catalog.current
+    return {
         "status": "healthy",
         "message": "Mouse Recommendation System is running",
         "recommendation_system": "initialized" if recommender else "not initialized",
@@ -215,12 +632,18 @@ def health_check():
         "image_folder": recommender.image_folder if recommender else "N/A",
         "port": os.environ.get('PORT', '5000'),
         "environment": "production" if os.environ.get('RAILWAY_ENVIRONMENT') else "development"
-    })
+    }
+
+@app.route("/health")
+def health_check():
+    """Health check endpoint"""
+    return jsonify(health_status())
 
 # ========== PERBAIKAN 5: ENDPOINT DEBUG IMAGES - DITINGKATKAN ==========
 @app.route("/api/debug/images")
 def debug_images():
     """Debug endpoint untuk cek gambar yang tersedia"""
+    recommender = catalog.current
     if recommender is None:
         return jsonify({"error": "Recommendation system not initialized"}), 500
     
@@ -279,6 +702,7 @@ def debug_images():
 @app.route("/api/test")
 def test_system():
     """Test endpoint untuk memastikan sistem berjalan"""
+    recommender = catalog.current
     if recommender is None:
         return jsonify({
             "status": "error",
@@ -331,6 +755,8 @@ if __name__ == '__main__':
     logging.info("Debug images at: /api/debug/images")
     logging.info("Test system at: /api/test")
     
+    # Server development (satu proses). Untuk produksi pakai semua core:
+    #   gunicorn -c gunicorn.conf.py app:app
     # Railway requires binding to 0.0.0.0
     app.run(
         debug=False, 
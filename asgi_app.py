@@ -0,0 +1,332 @@
+# asgi_app.py - Varian ASGI (asyncio) dari API rekomendasi dan gambar
+#
+# Jalankan dengan: uvicorn asgi_app:app --host 0.0.0.0 --port 8080
+#
+# Memakai katalog, index gambar dan cache response yang sama dengan app.py.
+# Scoring dijalankan di thread pool terbatas, dan file gambar dibaca per chunk
+# tanpa memblokir event loop, sehingga download gambar yang lambat tidak
+# menahan request rekomendasi.
+import asyncio
+import contextvars
+import json
+import logging
+import mimetypes
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from app import (app as flask_app, catalog, health_status, image_derivatives, image_index,
+                 metrics_text, options_body, recommendation_cache, recommendation_cache_key,
+                 render_recommendation_response, static_assets)
+from metrics import registry, stage
+import request_log
+
+# Jumlah thread scoring dan batas job (berjalan + antre) sebelum request ditolak 503
+SCORING_WORKERS = int(os.environ.get('SCORING_WORKERS', os.cpu_count() or 1))
+SCORING_QUEUE_LIMIT = int(os.environ.get('SCORING_QUEUE_LIMIT', SCORING_WORKERS * 8))
+FILE_IO_WORKERS = int(os.environ.get('FILE_IO_WORKERS', 4))
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', 1 << 20))
+FILE_CHUNK_SIZE = 64 * 1024
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+class AsyncRecommendationAPI:
+    """
+    Aplikasi ASGI dengan route yang sama seperti app.py.
+
+    Hanya /api/recommendations yang menjalankan scoring; job-nya dikirim ke
+    ThreadPoolExecutor berukuran tetap. Jika jumlah job yang berjalan dan
+    antre sudah mencapai `queue_limit`, request langsung dijawab 503 dengan
+    Retry-After, alih-alih menumpuk antrean tanpa batas.
+    """
+
+    ROUTES = [
+        ("POST", re.compile(r"^/api/recommendations$"), "recommend"),
+        ("GET", re.compile(r"^/api/options$"), "options"),
+        ("GET", re.compile(r"^/api/images/(?P<filename>[^/]+)$"), "image"),
+        ("GET", re.compile(r"^/img/(?P<filename>[^/]+)$"), "image"),
+        ("GET", re.compile(r"^/health$"), "health"),
+        ("GET", re.compile(r"^/metrics$"), "metrics"),
+    ]
+
+    def __init__(self, scoring_workers=SCORING_WORKERS, queue_limit=SCORING_QUEUE_LIMIT,
+                 io_workers=FILE_IO_WORKERS):
+        self.scoring_workers = scoring_workers
+        self.queue_limit = queue_limit
+        self.io_workers = io_workers
+        self._scoring_executor = None
+        self._io_executor = None
+        # Diakses hanya dari event loop, jadi tidak perlu lock
+        self.inflight = 0
+        self.rejected = 0
+
+    def _release_slot(self):
+        """Lepas satu slot job scoring (dijalankan di event loop)"""
+        self.inflight -= 1
+
+    def _release_when_done(self, loop, job):
+        """Lepas slot saat job executor selesai, dari thread mana pun callback dipanggil"""
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._release_slot)
+            except RuntimeError:
+                pass  # event loop sudah ditutup (shutdown)
+        job.add_done_callback(release)
+
+    def _executors(self):
+        """Buat executor saat pertama dipakai (setelah fork jika ada)"""
+        if self._scoring_executor is None:
+            self._scoring_executor = ThreadPoolExecutor(self.scoring_workers, thread_name_prefix="scoring")
+            self._io_executor = ThreadPoolExecutor(self.io_workers, thread_name_prefix="file-io")
+        return self._scoring_executor, self._io_executor
+
+    def shutdown(self):
+        """Hentikan executor (dipanggil saat lifespan shutdown)"""
+        for executor in (self._scoring_executor, self._io_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._scoring_executor = self._io_executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        started = time.perf_counter()
+        status = []
+        stages = registry.begin_request()
+        request_log.begin_request()
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            await send(message)
+
+        route = "<unmatched>"
+        try:
+            for route_method, pattern, handler in self.ROUTES:
+                match = pattern.match(path)
+                if match is None:
+                    continue
+                route = _route_label(pattern)
+                if method != route_method and not (method == "HEAD" and route_method == "GET"):
+                    await self._json(send_and_record, {"error": "Method not allowed"}, 405)
+                    return
+                await getattr(self, handler)(scope, receive, send_and_record, **match.groupdict())
+                return
+            await self._json(send_and_record, {"error": "Endpoint not found"}, 404)
+        finally:
+            seconds = time.perf_counter() - started
+            registry.record_request(method, route, status[0] if status else 500, seconds)
+            request_log.log_request(method, route, status[0] if status else 500, seconds, stages)
+
+    async def _lifespan(self, receive, send):
+        """Protokol lifespan ASGI: siapkan executor saat startup, tutup saat shutdown"""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._executors()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _send(send, status, body, headers):
+        """Kirim response lengkap dalam satu body"""
+        await send({"type": "http.response.start", "status": status,
+                    "headers": headers + [(b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _json(self, send, payload, status=200, headers=()):
+        """Kirim payload JSON dengan serializer yang sama seperti Flask"""
+        body = flask_app.json.dumps(payload).encode("utf-8")
+        await self._send(send, status, body, JSON_HEADERS + list(headers))
+
+    @staticmethod
+    async def _read_body(receive):
+        """Baca body request, None jika melebihi MAX_BODY_BYTES"""
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    # ========== API: RECOMMENDATIONS ==========
+    async def recommend(self, scope, receive, send):
+        """POST /api/recommendations dengan scoring di executor terbatas"""
+        recommender = catalog.current
+        if recommender is None:
+            await self._json(send, {"error": "Recommendation system not initialized"}, 500)
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            await self._json(send, {"error": "Request body too large"}, 413)
+            return
+        try:
+            user_preferences = json.loads(body)
+        except ValueError:
+            await self._json(send, {"error": "Invalid JSON body"}, 400)
+            return
+
+        # Halaman lanjutan (cursor) tidak di-cache sebagai response (urutannya di ranking_cache)
+        cache_key = recommendation_cache_key(user_preferences)
+        version = recommender.catalog_version
+        if cache_key is not None:
+            cached = recommendation_cache.get(cache_key, version)
+            request_log.annotate(cache="hit" if cached is not None else "miss")
+            if cached is not None:
+                await self._send(send, 200, cached, JSON_HEADERS)
+                return
+
+        # Backpressure: tolak lebih awal jika executor sudah penuh
+        if self.inflight >= self.queue_limit:
+            self.rejected += 1
+            await self._json(send, {"error": "Server busy, please retry"}, 503, [(b"retry-after", b"1")])
+            return
+
+        scoring_executor, _ = self._executors()
+        loop = asyncio.get_running_loop()
+        # Context ikut ke thread scoring agar durasi tahap masuk ringkasan request
+        job = scoring_executor.submit(contextvars.copy_context().run,
+                                      render_recommendation_response, recommender, user_preferences)
+        # Slot dilepas saat job selesai (atau batal sebelum jalan), bukan saat coroutine
+        # berhenti menunggu: client yang disconnect tidak membebaskan slot job yang masih jalan
+        self.inflight += 1
+        self._release_when_done(loop, job)
+        try:
+            result, status = await asyncio.wrap_future(job)
+        except Exception as e:
+            logging.error(f"Error in recommend: {str(e)}")
+            await self._json(send, {"error": "Failed to get recommendations"}, 500)
+            return
+
+        if cache_key is not None and status == 200:
+            recommendation_cache.put(cache_key, version, result)
+        await self._send(send, status, result, JSON_HEADERS)
+
+    # ========== API: OPTIONS ==========
+    async def options(self, scope, receive, send):
+        """GET /api/options dari cache per versi katalog, 304 jika ETag cocok"""
+        recommender = catalog.current
+        if recommender is None:
+            await self._json(send, {"error": "Recommendation system not initialized"}, 500)
+            return
+        try:
+            body, etag = options_body(recommender)
+            etag = f'"{etag}"'.encode()
+            headers = [(b"etag", etag), (b"cache-control", b"no-cache")]
+            if_none_match = dict(scope.get("headers", [])).get(b"if-none-match", b"")
+            if etag in [tag.strip() for tag in if_none_match.split(b",")]:
+                await send({"type": "http.response.start", "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await self._send(send, 200, body, JSON_HEADERS + headers)
+        except Exception as e:
+            logging.error(f"Error in get_options: {str(e)}")
+            await self._json(send, {"error": "Failed to get options"}, 500)
+
+    # ========== HEALTH CHECK ==========
+    async def health(self, scope, receive, send):
+        """GET /health beserta status executor scoring"""
+        status = health_status()
+        status['scoring'] = {
+            'workers': self.scoring_workers,
+            'queue_limit': self.queue_limit,
+            'inflight': self.inflight,
+            'rejected': self.rejected
+        }
+        await self._json(send, status)
+
+    # ========== METRICS ==========
+    async def metrics(self, scope, receive, send):
+        """GET /metrics dalam format teks Prometheus"""
+        await self._send(send, 200, metrics_text().encode(),
+                         [(b"content-type", b"text/plain; version=0.0.4; charset=utf-8")])
+
+    # ========== GAMBAR ==========
+    async def image(self, scope, receive, send, filename):
+        """Kirim file gambar (atau thumbnail ?w=) per chunk; baca file dilakukan di thread pool I/O"""
+        # scope["path"] sudah di-decode oleh server ASGI; jangan di-decode lagi
+        clean_filename = filename.strip()
+        with stage('image_lookup'):
+            resolved = image_index.resolve(clean_filename) or image_index.default_image()
+        if resolved is None:
+            logging.warning(f"Image not found: {filename}")
+            await self._json(send, {"error": "Image not found"}, 404)
+            return
+
+        _, io_executor = self._executors()
+        loop = asyncio.get_running_loop()
+        headers = dict(scope.get("headers", []))
+
+        # ?w=<lebar>: thumbnail (dibuat di thread pool I/O jika belum ada di cache)
+        width = parse_qs(scope.get("query_string", b"").decode()).get("w", [""])[0]
+        vary = []
+        if width.isdigit() and int(width) > 0:
+            webp = b"image/webp" in headers.get(b"accept", b"")
+            derivative = await loop.run_in_executor(
+                io_executor, image_derivatives.derive, *resolved, int(width), webp)
+            resolved = derivative or resolved
+            vary = [(b"vary", b"Accept")]
+        path = os.path.join(*resolved)
+
+        # ETag kuat dari hash isi file (dihitung di thread pool I/O jika belum di-cache);
+        # If-None-Match yang cocok dijawab 304 tanpa body
+        digest = await loop.run_in_executor(io_executor, static_assets.digest, path)
+        etag = f'"{digest}"'.encode()
+        cache_headers = vary + [(b"etag", etag),
+                         (b"cache-control", f"public, max-age={static_assets.max_age}, must-revalidate".encode())]
+        if_none_match = headers.get(b"if-none-match", b"")
+        if etag in [tag.strip() for tag in if_none_match.split(b",")] or if_none_match.strip() == b"*":
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        try:
+            f = await loop.run_in_executor(io_executor, open, path, 'rb')
+        except OSError as e:
+            logging.error(f"Error serving image {filename}: {str(e)}")
+            await self._json(send, {"error": "Failed to serve image"}, 500)
+            return
+
+        try:
+            size = os.fstat(f.fileno()).st_size
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", content_type.encode()),
+                (b"content-length", str(size).encode()),
+            ] + cache_headers})
+            if scope["method"] == "HEAD":
+                await send({"type": "http.response.body", "body": b""})
+                return
+            while True:
+                chunk = await loop.run_in_executor(io_executor, f.read, FILE_CHUNK_SIZE)
+                more = len(chunk) == FILE_CHUNK_SIZE
+                await send({"type": "http.response.body", "body": chunk, "more_body": more})
+                if not more:
+                    return
+        finally:
+            await loop.run_in_executor(io_executor, f.close)
+
+
+def _route_label(pattern):
+    """Pola route untuk label metrik, mis. /api/images/<filename> (sama seperti Flask)"""
+    return re.sub(r"\(\?P<(\w+)>[^)]*\)", r"<\1>", pattern.pattern).strip("^$")
+
+
+app = AsyncRecommendationAPI()
@@ -0,0 +1,107 @@
+# bench_ann.py - Benchmark recall dan latency index IVF dibanding scoring exact
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import ExactIndex, IVFIndex  # noqa: E402
+from benchmarks.bench_server import make_payload  # noqa: E402
+from benchmarks.synthetic import write_catalog  # noqa: E402
+from mouse_recomender import MouseRecommendationSystem  # noqa: E402
+
+STATIC_IMAGES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "img")
+
+
+def run_queries(index, queries, k):
+    """Jalankan semua query, mengembalikan hasil top-k dan latency per query (ms)"""
+    results, latencies = [], []
+    for user_vector, candidates in queries:
+        start = time.perf_counter()
+        results.append(index.top_k(user_vector, candidates, k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+def recall(exact, approximate, k):
+    """
+    Recall@k berbasis skor: hasil ANN dihitung benar jika skornya tidak lebih
+    rendah dari skor ke-k exact (katalog sintetis punya banyak row kembar,
+    jadi membandingkan row id saja akan meremehkan recall).
+    """
+    hits, total = 0, 0
+    for (_, exact_scores), (_, ann_scores) in zip(exact, approximate):
+        if len(exact_scores) == 0:
+            continue
+        threshold = exact_scores[-1] - 1e-6
+        hits += min(k, int(np.count_nonzero(ann_scores >= threshold)))
+        total += min(k, len(exact_scores))
+    return hits / total if total else 1.0
+
+
+def bench_ann(n_rows, probes, n_queries, k, n_lists=None, seed=0):
+    """Bandingkan ExactIndex dan IVFIndex pada katalog sintetis sebanyak n_rows"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_catalog(n_rows, os.path.join(tmp, "catalog.csv"), seed=seed)
+        recommender = MouseRecommendationSystem(csv_path, STATIC_IMAGES)
+
+    start = time.perf_counter()
+    ivf = IVFIndex.train(recommender.scorer, n_lists, seed=seed)
+    train_seconds = time.perf_counter() - start
+
+    # Campuran preferensi: setiap field dibuang dengan peluang 50%, sehingga
+    # ada query dengan filter ketat (exact fallback) dan query yang luas
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n_queries):
+        preferences = {key: value for key, value in make_payload(rng).items() if rng.random() < 0.5}
+        candidates = recommender.filter_candidates(preferences)
+        if candidates is None:
+            candidates = recommender.catalog_index.all_ids()
+        queries.append((recommender.create_user_profile(preferences), candidates))
+
+    exact, exact_latency = run_queries(ExactIndex(recommender.scorer), queries, k)
+    rows = [{
+        "benchmark": "ann", "rows": n_rows, "index": "exact", "k": k,
+        "recall": 1.0,
+        "latency_ms_p50": round(float(np.percentile(exact_latency, 50)), 3),
+        "latency_ms_p99": round(float(np.percentile(exact_latency, 99)), 3),
+    }]
+    for n_probe in probes:
+        ivf.n_probe = n_probe
+        approximate, latency = run_queries(ivf, queries, k)
+        rows.append({
+            "benchmark": "ann", "rows": n_rows, "index": "ivf", "k": k,
+            "lists": len(ivf.centroids), "probes": n_probe,
+            "train_seconds": round(train_seconds, 3),
+            "recall": round(recall(exact, approximate, k), 4),
+            "latency_ms_p50": round(float(np.percentile(latency, 50)), 3),
+            "latency_ms_p99": round(float(np.percentile(latency, 99)), 3),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recall/latency index IVF vs exact")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--lists", type=int, default=None, help="Jumlah list IVF (default: akar jumlah row)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    for n_rows in args.rows:
+        for row in bench_ann(n_rows, args.probes, args.queries, args.k, args.lists):
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
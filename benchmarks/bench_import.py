@@ -0,0 +1,87 @@
+# bench_import.py - Benchmark import-time dan guard serving path tanpa pandas/sklearn
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pandas", "sklearn", "scipy")
+
+# Dijalankan di proses baru: import app dengan artifact katalog lalu layani satu request
+PROBE = """
+import json, logging, sys, time
+start = time.perf_counter()
+import app
+import_seconds = time.perf_counter() - start
+logging.disable(logging.CRITICAL)
+client = app.app.test_client()
+start = time.perf_counter()
+response = client.post("/api/recommendations", json={"brand": "Logitech"})
+first_request_seconds = time.perf_counter() - start
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "first_request_seconds": first_request_seconds,
+    "status": response.status_code,
+    "heavy_modules": sorted(m for m in %r if m in sys.modules),
+}))
+"""
+
+
+def compile_artifact(output):
+    """Compile Data_Mouse.csv menjadi artifact katalog di proses terpisah"""
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "catalog_artifact.py"),
+         os.path.join(ROOT, "Data_Mouse.csv"), output],
+        cwd=ROOT, check=True, capture_output=True
+    )
+
+
+def probe(artifact_path):
+    """Jalankan satu proses serving baru dan kembalikan hasil pengukurannya"""
+    env = dict(os.environ, CATALOG_ARTIFACT=artifact_path)
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE % (HEAVY_MODULES,)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import-time untuk lean serving mode")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import-seconds", type=float, default=1.0,
+                        help="Gagal jika import app (min dari semua run) lebih lambat dari ini")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_path = os.path.join(tmp, "catalog.artifact")
+        compile_artifact(artifact_path)
+        runs = [probe(artifact_path) for _ in range(args.repeat)]
+
+    result = {
+        "benchmark": "import",
+        "repeat": args.repeat,
+        "import_seconds_min": round(min(r["import_seconds"] for r in runs), 4),
+        "first_request_seconds_min": round(min(r["first_request_seconds"] for r in runs), 4),
+        "heavy_modules": sorted(set(m for r in runs for m in r["heavy_modules"])),
+        "statuses": sorted(set(r["status"] for r in runs)),
+    }
+    print(json.dumps(result))
+
+    # Guard regresi: serving path tidak boleh memuat library berat
+    failures = []
+    if result["heavy_modules"]:
+        failures.append(f"heavy modules imported on serving path: {result['heavy_modules']}")
+    if result["import_seconds_min"] > args.max_import_seconds:
+        failures.append(f"import took {result['import_seconds_min']}s (> {args.max_import_seconds}s)")
+    if result["statuses"] != [200]:
+        failures.append(f"unexpected status codes: {result['statuses']}")
+    if failures:
+        print("FAIL: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
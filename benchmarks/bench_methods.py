@@ -0,0 +1,118 @@
+# bench_methods.py - Benchmark hot path MouseRecommendationSystem per ukuran katalog
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_preferences, write_catalog  # noqa: E402
+from mouse_recomender import MouseRecommendationSystem  # noqa: E402
+
+STATIC_IMAGES = os.path.join(ROOT, "static", "img")
+
+
+def peak_rss_mb():
+    """Peak RSS proses ini (ru_maxrss dalam KB di Linux, byte di macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def summarize(prefix, latencies):
+    """p50/p99 (ms) dan throughput satu thread dari list durasi (detik)"""
+    latencies = np.asarray(latencies) * 1000
+    return {
+        f"{prefix}_ms_p50": round(float(np.percentile(latencies, 50)), 4),
+        f"{prefix}_ms_p99": round(float(np.percentile(latencies, 99)), 4),
+        f"{prefix}_per_second": round(len(latencies) / (latencies.sum() / 1000), 1),
+    }
+
+
+def timed(fn, args_list):
+    """Durasi (detik) setiap panggilan fn(args)"""
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_methods(n_rows, n_queries, repeat=1, seed=0):
+    """Ukur __init__ (load_and_preprocess_data), create_user_profile dan get_recommendations"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_catalog(n_rows, os.path.join(tmp, "catalog.csv"), seed=seed)
+        init_times = []
+        for _ in range(repeat):
+            recommender = None  # lepas instance sebelumnya agar memori tidak berlipat
+            start = time.perf_counter()
+            recommender = MouseRecommendationSystem(csv_path, STATIC_IMAGES)
+            init_times.append(time.perf_counter() - start)
+    init_rss = peak_rss_mb()
+
+    rng = random.Random(seed)
+    options = recommender.get_available_options()
+    preferences = [make_preferences(rng, options) for _ in range(n_queries)]
+
+    # Profil diukur tanpa cache (cache dikosongkan di luar pengukuran)
+    profile_latencies = []
+    for prefs in preferences:
+        recommender._cached_user_vector.cache_clear()
+        profile_latencies.extend(timed(recommender.create_user_profile, [prefs]))
+
+    # Pemanasan lalu ukur rekomendasi dengan cache profil seperti saat serving
+    timed(recommender.get_recommendations, preferences[:min(20, n_queries)])
+    recommendation_latencies = timed(recommender.get_recommendations, preferences)
+
+    return {
+        "benchmark": "methods",
+        "rows": n_rows,
+        "queries": n_queries,
+        "init_seconds_min": round(min(init_times), 4),
+        "init_peak_rss_mb": init_rss,
+        **summarize("create_user_profile", profile_latencies),
+        **summarize("get_recommendations", recommendation_latencies),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(n_rows, n_queries, repeat, seed):
+    """Jalankan satu ukuran katalog di proses baru agar peak RSS tidak tercampur"""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--rows", str(n_rows), "--queries", str(n_queries),
+         "--repeat", str(repeat), "--seed", str(seed), "--in-process"],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark method MouseRecommendationSystem per ukuran katalog")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10000, 1000000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=1, help="Jumlah pengulangan __init__ (diambil minimum)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--in-process", action="store_true",
+                        help="Ukur di proses ini (default: satu proses baru per ukuran katalog)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    for n_rows in args.rows:
+        if args.in_process:
+            row = bench_methods(n_rows, args.queries, args.repeat, args.seed)
+        else:
+            row = run_isolated(n_rows, args.queries, args.repeat, args.seed)
+        print(json.dumps(row), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# bench_server.py - Benchmark throughput HTTP: server dev (threaded) vs gunicorn (multi-worker)
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+IMAGE_FOLDER = os.path.join(ROOT, "static", "img")
+ENDPOINTS = ("recommendations", "options", "images")
+
+BRANDS = ["Logitech", "Razer", "Pulsar", "Lamzu", "Rexus", "Fantech"]
+CATEGORIES = ["Gaming", "Office"]
+
+
+def server_command(mode, port, workers, threads):
+    """Perintah untuk menjalankan app dalam mode yang dibandingkan"""
+    if mode == "threaded":
+        return [sys.executable, "app.py"]
+    return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+            "--workers", str(workers), "--threads", str(threads), "app:app"]
+
+
+def wait_until_ready(port, timeout=120):
+    """Tunggu sampai /api/info menjawab 200 (jeda di setiap percobaan, termasuk non-200)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+        try:
+            conn.request("GET", "/api/info")
+            if conn.getresponse().status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+        time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not become ready")
+
+
+def make_payload(rng):
+    """Preferensi acak agar request tidak semuanya sama"""
+    return {
+        "price_max": rng.randrange(200_000, 3_000_000, 50_000),
+        "brand": rng.choice(BRANDS + [""]),
+        "category": rng.choice(CATEGORIES),
+        "weight_pref": rng.choice(["light", "medium", "heavy", ""]),
+        "dpi_min": rng.choice([0, 8000, 16000]),
+    }
+
+
+def make_request(endpoint, rng, images):
+    """(method, path, body) satu request ke endpoint yang diukur"""
+    if endpoint == "recommendations":
+        return "POST", "/api/recommendations", json.dumps(make_payload(rng))
+    if endpoint == "options":
+        return "GET", "/api/options", None
+    return "GET", f"/api/images/{quote(rng.choice(images))}", None
+
+
+def client(port, duration, seed, results, endpoint="recommendations", images=()):
+    """Satu klien keep-alive yang mengirim request ke `endpoint` selama `duration` detik"""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        method, path, body = make_request(endpoint, rng, images)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body, {"Content-Type": "application/json"} if body else {})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    results.put((latencies, errors))
+
+
+def run_load(port, concurrency, duration, endpoint="recommendations", images=()):
+    """Jalankan klien di proses terpisah agar generator beban tidak terbatas GIL"""
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client, args=(port, duration, seed, results, endpoint, images))
+             for seed in range(concurrency)]
+    for proc in procs:
+        proc.start()
+    collected = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    latencies = sorted(lat for lats, _ in collected for lat in lats)
+    errors = sum(err for _, err in collected)
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+    }
+
+
+def process_tree_rss_mb(pid):
+    """Jumlah peak RSS (VmHWM) proses server dan semua worker-nya; None jika /proc tidak ada"""
+    total, pending = 0, [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as children:
+                    pending.extend(int(child) for child in children.read().split())
+    except (OSError, StopIteration):
+        return None
+    return round(total / 1024, 1)
+
+
+def compile_synthetic_artifact(n_rows, output):
+    """Katalog sintetis sebanyak n_rows sebagai artifact untuk CATALOG_ARTIFACT server"""
+    from benchmarks.synthetic import write_catalog  # pandas hanya dimuat jika --rows dipakai
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    csv_path = write_catalog(n_rows, os.path.join(os.path.dirname(output), "catalog.csv"))
+    subprocess.run([sys.executable, os.path.join(ROOT, "catalog_artifact.py"), csv_path, output],
+                   cwd=ROOT, check=True, capture_output=True)
+    return output
+
+
+def bench_server(mode, port, concurrency, duration, workers, threads, cache_size,
+                 endpoints=("recommendations",), artifact=None, rows=None):
+    """Start server, panaskan, ukur throughput setiap endpoint, lalu matikan"""
+    env = dict(os.environ, PORT=str(port), RESPONSE_CACHE_SIZE=str(cache_size))
+    if artifact is not None:
+        env["CATALOG_ARTIFACT"] = artifact
+    images = sorted(os.listdir(IMAGE_FOLDER))
+    proc = subprocess.Popen(server_command(mode, port, workers, threads), cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = []
+    try:
+        wait_until_ready(port)
+        for endpoint in endpoints:
+            run_load(port, concurrency, min(duration, 2), endpoint, images)
+            results.append((endpoint, run_load(port, concurrency, duration, endpoint, images)))
+        peak_rss = process_tree_rss_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    return [{
+        "benchmark": "server",
+        "mode": mode,
+        "endpoint": endpoint,
+        "rows": rows,
+        "workers": 1 if mode == "threaded" else workers,
+        "threads": threads,
+        "concurrency": concurrency,
+        "cpu_count": os.cpu_count(),
+        "response_cache_size": cache_size,
+        **result,
+        "server_peak_rss_mb": peak_rss,
+    } for endpoint, result in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput server dev vs gunicorn")
+    parser.add_argument("--modes", nargs="+", default=["threaded", "gunicorn"], choices=["threaded", "gunicorn"])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="RESPONSE_CACHE_SIZE untuk server (0 = ukur komputasi rekomendasi)")
+    parser.add_argument("--endpoints", nargs="+", default=["recommendations"], choices=ENDPOINTS)
+    parser.add_argument("--rows", type=int, default=None,
+                        help="Layani katalog sintetis sebanyak ini (default: Data_Mouse.csv)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = None
+        if args.rows:
+            artifact = compile_synthetic_artifact(args.rows, os.path.join(tmp, "catalog.artifact"))
+        for mode in args.modes:
+            for row in bench_server(mode, args.port, args.concurrency, args.duration, args.workers,
+                                    args.threads, args.cache_size, args.endpoints, artifact, args.rows):
+                print(json.dumps(row), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# bench_startup.py - Benchmark waktu startup MouseRecommendationSystem
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import write_catalog  # noqa: E402
+from mouse_recomender import MouseRecommendationSystem  # noqa: E402
+
+STATIC_IMAGES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "img")
+
+
+def bench_startup(n_rows, repeat=3):
+    """Ukur waktu load_and_preprocess_data dan validate_and_fix_images"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_catalog(n_rows, os.path.join(tmp, "catalog.csv"))
+        init_times, validate_times = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            recommender = MouseRecommendationSystem(csv_path, STATIC_IMAGES)
+            init_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            recommender.validate_and_fix_images()
+            validate_times.append(time.perf_counter() - start)
+
+    return {
+        "benchmark": "startup",
+        "rows": n_rows,
+        "init_seconds_min": round(min(init_times), 4),
+        "validate_images_seconds_min": round(min(validate_times), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark startup MouseRecommendationSystem")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    for n_rows in args.rows:
+        print(json.dumps(bench_startup(n_rows, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# run_suite.py - Jalankan benchmark method + HTTP dan simpan hasilnya sebagai satu dokumen JSON
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_methods import run_isolated  # noqa: E402
+from benchmarks.bench_server import ENDPOINTS, bench_server, compile_synthetic_artifact  # noqa: E402
+
+# Metrik yang dibandingkan dengan baseline (True = makin besar makin baik)
+COMPARED_METRICS = {
+    "init_seconds_min": False,
+    "create_user_profile_ms_p50": False,
+    "create_user_profile_ms_p99": False,
+    "get_recommendations_ms_p50": False,
+    "get_recommendations_ms_p99": False,
+    "get_recommendations_per_second": True,
+    "peak_rss_mb": False,
+    "p50_ms": False,
+    "p99_ms": False,
+    "rps": True,
+    "server_peak_rss_mb": False,
+}
+
+
+def environment():
+    """Info mesin dan revisi kode agar hasil antar run bisa dicocokkan"""
+    import numpy as np
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def result_key(row):
+    """Identitas baris hasil untuk dicocokkan dengan baseline"""
+    return (row["benchmark"], row.get("rows"), row.get("mode"), row.get("endpoint"))
+
+
+def compare(results, baseline):
+    """Rasio metrik terhadap baseline (> 1 berarti lebih baik) per baris yang cocok"""
+    previous = {result_key(row): row for row in baseline["results"]}
+    comparison = []
+    for row in results:
+        old = previous.get(result_key(row))
+        if old is None:
+            continue
+        ratios = {}
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if row.get(metric) and old.get(metric):
+                ratio = row[metric] / old[metric] if higher_is_better else old[metric] / row[metric]
+                ratios[metric] = round(ratio, 3)
+        comparison.append({"key": list(result_key(row)), "speedup": ratios})
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite benchmark hot path rekomendasi dan layer HTTP")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10000, 1000000],
+                        help="Ukuran katalog sintetis untuk benchmark method")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--http-rows", type=int, nargs="*", default=[10000],
+                        help="Ukuran katalog untuk benchmark HTTP (kosong = lewati layer HTTP)")
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=ENDPOINTS)
+    parser.add_argument("--mode", default="threaded", choices=["threaded", "gunicorn"])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="File JSON hasil (default: stdout)")
+    parser.add_argument("--baseline", help="File JSON hasil run sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    document = {"suite": "recommendation", "environment": environment(), "results": []}
+    for n_rows in args.rows:
+        row = run_isolated(n_rows, args.queries, 1, args.seed)
+        document["results"].append(row)
+        print(json.dumps(row), file=sys.stderr, flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.http_rows:
+            artifact = compile_synthetic_artifact(n_rows, os.path.join(tmp, f"catalog-{n_rows}", "catalog.artifact"))
+            for row in bench_server(args.mode, args.port, args.concurrency, args.duration, args.workers,
+                                    args.threads, 0, args.endpoints, artifact, n_rows):
+                document["results"].append(row)
+                print(json.dumps(row), file=sys.stderr, flush=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            document["comparison"] = compare(document["results"], json.load(f))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+    else:
+        print(json.dumps(document, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# synthetic.py - Generator katalog sintetis untuk benchmark
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data_Mouse.csv")
+
+
+def make_catalog(n_rows, seed=0, base_csv=BASE_CSV):
+    """Membuat katalog sintetis dengan skema Data_Mouse.csv sebanyak n_rows"""
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(base_csv)
+    base.columns = base.columns.str.strip()
+
+    df = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+    suffix = pd.Series(np.arange(n_rows)).astype(str)
+    df['Name'] = df['Name'].astype(str) + ' #' + suffix
+    df['Price'] = (df['Price'] * rng.uniform(0.7, 1.3, n_rows)).round(-3).astype(int)
+    df['Weight'] = (df['Weight'] + rng.integers(-10, 11, n_rows)).clip(lower=30)
+    df['DPI'] = (df['DPI'] * rng.choice([0.5, 1.0, 1.5, 2.0], n_rows)).astype(int)
+
+    # Sebagian mouse merujuk gambar yang tidak ada agar jalur fallback ikut diukur
+    missing = rng.random(n_rows) < 0.3
+    df.loc[missing, 'Image'] = 'missing-' + suffix[missing] + '.jpeg'
+    return df
+
+
+def write_catalog(n_rows, path, seed=0):
+    """Tulis katalog sintetis ke CSV"""
+    make_catalog(n_rows, seed=seed).to_csv(path, index=False)
+    return path
+
+
+# Peluang setiap field form diisi user; field lain dikirim kosong seperti dari frontend
+PREFERENCE_FIELDS = {
+    'category': 0.8,
+    'price_max': 0.7,
+    'brand': 0.4,
+    'weight_pref': 0.4,
+    'connection': 0.3,
+    'dpi_min': 0.3,
+    'shape': 0.2,
+    'size': 0.2,
+    'buttons': 0.1,
+}
+
+
+def make_preferences(rng, options):
+    """
+    Preferensi acak dengan nilai dari opsi katalog (hasil get_available_options).
+
+    Sebagian besar field kosong dan kombinasi yang terlalu ketat tetap mungkin,
+    sehingga campuran query mencakup filter luas, sempit, dan tanpa hasil.
+    """
+    price = options.get('price_range', {'min': 100_000, 'max': 3_000_000})
+    buttons = options.get('buttons_range', {'min': 2, 'max': 8})
+    values = {
+        'category': lambda: rng.choice(options.get('categories') or ['']),
+        'price_max': lambda: round(rng.uniform(price['min'], price['max']), -4),
+        'brand': lambda: rng.choice(options.get('brands') or ['']),
+        'weight_pref': lambda: rng.choice(['light', 'medium', 'heavy']),
+        'connection': lambda: rng.choice(options.get('connections') or ['']),
+        'dpi_min': lambda: rng.choice([4000, 8000, 16000, 26000]),
+        'shape': lambda: rng.choice(options.get('shapes') or ['']),
+        'size': lambda: rng.choice(options.get('sizes') or ['']),
+        'buttons': lambda: rng.randint(buttons['min'], buttons['max']),
+    }
+    return {field: values[field]() if rng.random() < chance else ''
+            for field, chance in PREFERENCE_FIELDS.items()}
@@ -0,0 +1,199 @@
+# catalog_artifact.py - Artifact katalog biner (npy + header JSON) untuk startup cepat
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+ARTIFACT_FORMAT_VERSION = 3
+HEADER_FILE = "header.json"
+
+
+def _slug(col):
+    """Nama kolom yang aman untuk nama file"""
+    return col.lower().replace(' ', '_')
+
+
+def _file_sha256(path):
+    """Hash isi file sumber, untuk melacak asal artifact"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_artifact(recommender, path, source=None):
+    """
+    Tulis katalog yang sudah diproses ke direktori artifact.
+
+    Array besar disimpan sebagai .npy terpisah agar bisa di-mmap, sisanya
+    (vocabulary encoder, parameter scaler, opsi, metadata) masuk header.json.
+    Direktori ditulis ke lokasi sementara lalu ditukar, sehingga pembaca
+    tidak pernah melihat artifact setengah jadi.
+    """
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".catalog-", dir=parent)
+
+    def save(name, array):
+        np.save(os.path.join(tmp_dir, name + ".npy"), np.ascontiguousarray(array))
+
+    try:
+        row_ids = recommender.catalog_index.all_ids()
+        if len(row_ids) != recommender.catalog_index.size:
+            raise ValueError("Catalog has removed items; reload from CSV before compiling")
+
+        save("feature_matrix", np.asarray(recommender.feature_matrix, dtype=np.float64))
+        save("scorer_indices", recommender.scorer.indices)
+        save("scorer_inv_norm", recommender.scorer.inv_norm)
+        save("scorer_numeric", recommender.scorer.numeric)
+        save("default_user_vector", recommender.default_user_vector)
+
+        # Index IVF (jika dipakai) disimpan agar tidak dilatih ulang saat startup
+        search_index = recommender.search_index
+        ann_header = None
+        if search_index is not None and search_index.backend == 'ivf':
+            save("ann_centroids", search_index.centroids)
+            save("ann_assignments", search_index.assignments)
+            ann_header = search_index.info()
+
+        # Tabel tetangga (jika dihitung) agar /api/mice/<id>/similar siap tanpa perhitungan O(n^2)
+        neighbour_table = recommender.neighbour_table
+        if neighbour_table is not None:
+            save("similar_ids", neighbour_table.neighbours)
+            save("similar_scores", neighbour_table.scores)
+
+        # Index filter: postings kategori (ids + offset) dan array numerik terurut
+        index = recommender.catalog_index
+        postings_header = {}
+        for col, postings in index.categorical.items():
+            keys = sorted(postings)
+            lengths = [len(postings[key]) for key in keys]
+            ids = np.concatenate([postings[key] for key in keys]) if keys else np.empty(0, dtype=np.int64)
+            save(f"postings_{_slug(col)}", ids.astype(np.int64))
+            postings_header[col] = {'keys': keys, 'offsets': np.cumsum([0] + lengths).tolist()}
+        for col in index.values:
+            save(f"index_{_slug(col)}_values", index.values[col])
+            save(f"index_{_slug(col)}_sorted_ids", index.sorted_ids[col].astype(np.int64))
+            save(f"index_{_slug(col)}_sorted_values", index.sorted_values[col])
+
+        # Record tampilan disimpan sebagai fragmen JSON dalam satu blob byte
+        fragments = [json.dumps(recommender.display_records[i].to_list()).encode('utf-8')
+                     for i in range(len(recommender.display_records))]
+        save("records", np.frombuffer(b''.join(fragments), dtype=np.uint8))
+        save("records_offsets", np.cumsum([0] + [len(f) for f in fragments]).astype(np.int64))
+
+        scaler = recommender.scaler
+        header = {
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'compiled_at': datetime.now(timezone.utc).isoformat(),
+            'source': source,
+            'source_sha256': _file_sha256(source) if source and os.path.exists(source) else None,
+            'catalog_version': recommender.catalog_version,
+            'rows': int(index.size),
+            'model_name': recommender.model_name,
+            'feature_cols': recommender.feature_cols,
+            'feature_space': recommender.feature_space.to_dict(),
+            'numerical_cols': recommender.numerical_cols,
+            'original_columns': list(recommender.df.columns),
+            'category_codes': recommender.category_codes,
+            'numeric_ranges': {col: [float(lo), float(hi)] for col, (lo, hi) in recommender.numeric_ranges.items()},
+            'scaler': {
+                'data_min': scaler.data_min_.tolist(),
+                'data_max': scaler.data_max_.tolist(),
+                'scale': scaler.scale_.tolist(),
+                'min': scaler.min_.tolist()
+            },
+            'postings': postings_header,
+            'numeric_index': list(index.values),
+            'ann': ann_header,
+            'similar_items': {'k': neighbour_table.k} if neighbour_table is not None else None,
+            'options': recommender.get_available_options()
+        }
+        with open(os.path.join(tmp_dir, HEADER_FILE), 'w') as f:
+            json.dump(header, f)
+
+        # Tukar direktori lama dengan yang baru
+        old_dir = None
+        if os.path.exists(path):
+            old_dir = path + ".old"
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(path, old_dir)
+        os.replace(tmp_dir, path)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    logging.info(f"Catalog artifact written to {path} ({header['rows']} mice)")
+    return header
+
+
+def load_artifact(path, mmap_mode='r'):
+    """Baca header dan array artifact (array besar di-mmap read-only)"""
+    with open(os.path.join(path, HEADER_FILE)) as f:
+        header = json.load(f)
+    if header.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported catalog artifact format: {header.get('format_version')}")
+
+    def load(name):
+        return np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+
+    arrays = {
+        'feature_matrix': load("feature_matrix"),
+        'scorer_indices': load("scorer_indices"),
+        'scorer_inv_norm': load("scorer_inv_norm"),
+        'scorer_numeric': load("scorer_numeric"),
+        'default_user_vector': np.array(load("default_user_vector")),
+        'records': load("records"),
+        'records_offsets': load("records_offsets"),
+        'postings': {col: load(f"postings_{_slug(col)}") for col in header['postings']},
+        'values': {col: load(f"index_{_slug(col)}_values") for col in header['numeric_index']},
+        'sorted_ids': {col: load(f"index_{_slug(col)}_sorted_ids") for col in header['numeric_index']},
+        'sorted_values': {col: load(f"index_{_slug(col)}_sorted_values") for col in header['numeric_index']},
+    }
+    if header.get('ann'):
+        arrays['ann_centroids'] = np.array(load("ann_centroids"))
+        arrays['ann_assignments'] = load("ann_assignments")
+    if header.get('similar_items'):
+        arrays['similar_ids'] = load("similar_ids")
+        arrays['similar_scores'] = load("similar_scores")
+    return header, arrays
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile Data_Mouse.csv menjadi artifact katalog biner")
+    parser.add_argument("csv_path", help="File CSV katalog")
+    parser.add_argument("output", help="Direktori artifact yang akan ditulis")
+    parser.add_argument("--image-folder", default="img", help="Folder gambar untuk validasi nama file")
+    parser.add_argument("--feature-weights", help="File JSON bobot blok fitur (hasil tune_feature_weights.py)")
+    parser.add_argument("--ann-lists", type=int, default=None,
+                        help="Latih index IVF dengan jumlah list ini (0 = otomatis) dan simpan di artifact")
+    parser.add_argument("--similar-items", type=int, default=0,
+                        help="Hitung tabel K tetangga per mouse dan simpan di artifact")
+    parser.add_argument("--workers", type=int, default=1, help="Jumlah proses untuk tabel tetangga")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from feature_space import load_feature_weights
+    from mouse_recomender import MouseRecommendationSystem
+
+    search_index = None if args.ann_lists is None else {'backend': 'ivf', 'n_lists': args.ann_lists or None}
+    recommender = MouseRecommendationSystem(args.csv_path, args.image_folder,
+                                            feature_weights=load_feature_weights(args.feature_weights),
+                                            search_index=search_index,
+                                            similar_items={'k': args.similar_items, 'workers': args.workers})
+    header = save_artifact(recommender, args.output, source=args.csv_path)
+    print(json.dumps({'output': args.output, 'rows': header['rows'], 'compiled_at': header['compiled_at']}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# catalog_index.py - Index filter katalog
+import copy
+
+import numpy as np
+
+
+class CatalogIndex:
+    """
+    Index filter yang dibangun sekali saat katalog dimuat.
+
+    Kolom kategori disimpan sebagai daftar row id per nilai (sudah di-strip dan
+    lowercase), kolom numerik disimpan sebagai array nilai yang sudah diurutkan
+    beserta row id-nya. Semua hasil lookup berupa array row id yang terurut.
+    """
+
+    CATEGORICAL_COLUMNS = ['Category', 'Brand', 'Connection', 'Size', 'Shape']
+    NUMERICAL_COLUMNS = ['Price', 'DPI', 'Weight', 'Buttons']
+
+    def __init__(self, df):
+        import pandas as pd
+
+        self.size = len(df)
+        self.active = np.ones(self.size, dtype=bool)
+        self._active_ids = np.arange(self.size)
+        self.categorical = {}
+        self.row_keys = {}
+        self.values = {}
+        self.sorted_values = {}
+        self.sorted_ids = {}
+        self._facets = {}
+
+        for col in self.CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                self.row_keys[col] = self._normalize_series(df[col])
+                self.categorical[col] = self._build_postings(self.row_keys[col])
+
+        for col in self.NUMERICAL_COLUMNS:
+            if col in df.columns:
+                values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+                # NaN tidak pernah lolos filter range, jadi tidak ikut diindex
+                valid_ids = np.flatnonzero(~np.isnan(values))
+                order = np.argsort(values[valid_ids], kind='stable')
+                self.values[col] = values
+                self.sorted_ids[col] = valid_ids[order]
+                self.sorted_values[col] = values[self.sorted_ids[col]]
+
+    @classmethod
+    def from_arrays(cls, size, postings, values, sorted_ids, sorted_values):
+        """
+        Bangun index dari array yang sudah jadi (mis. hasil mmap artifact).
+
+        `postings` berisi {kolom: (keys, offsets, ids)}. Index seperti ini
+        read-only karena row_keys untuk update incremental tidak disimpan.
+        """
+        index = cls.__new__(cls)
+        index.size = size
+        index.active = np.ones(size, dtype=bool)
+        index._active_ids = np.arange(size)
+        index.row_keys = {}
+        index.categorical = {
+            col: {key: ids[start:end] for key, start, end in zip(keys, offsets[:-1], offsets[1:])}
+            for col, (keys, offsets, ids) in postings.items()
+        }
+        index.values = dict(values)
+        index.sorted_ids = dict(sorted_ids)
+        index.sorted_values = dict(sorted_values)
+        index._facets = {}
+        return index
+
+    @staticmethod
+    def normalize(value):
+        """Normalisasi nilai kategori untuk lookup"""
+        return str(value).strip().lower()
+
+    @staticmethod
+    def _normalize_series(series):
+        """Normalisasi satu kolom kategori (None untuk nilai kosong)"""
+        keys = series.astype(str).str.strip().str.lower().to_numpy(dtype=object)
+        keys[series.isna().to_numpy()] = None
+        return keys
+
+    @staticmethod
+    def _build_postings(row_keys, ids=None):
+        """Bangun mapping nilai -> row id terurut"""
+        if ids is None:
+            ids = np.arange(len(row_keys))
+        valid = np.array([key is not None for key in row_keys], dtype=bool)
+        keys = row_keys[valid].astype(str)
+        ids = ids[valid]
+        postings = {}
+        if len(ids) == 0:
+            return postings
+        order = np.argsort(keys, kind='stable')
+        keys, ids = keys[order], ids[order]
+        boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(keys)]):
+            postings[keys[start]] = ids[start:end]
+        return postings
+
+    def copy(self):
+        """
+        Salinan untuk snapshot baru. Array yang diubah di tempat (active,
+        values, row_keys) disalin; postings dan array terurut hanya diganti
+        per key, jadi cukup dict-nya yang disalin.
+        """
+        index = copy.copy(self)
+        index.active = self.active.copy()
+        index.values = {col: values.copy() for col, values in self.values.items()}
+        index.row_keys = {col: keys.copy() for col, keys in self.row_keys.items()}
+        index.categorical = {col: dict(postings) for col, postings in self.categorical.items()}
+        index.sorted_values = dict(self.sorted_values)
+        index.sorted_ids = dict(self.sorted_ids)
+        index._facets = {}
+        return index
+
+    def all_ids(self):
+        """Semua row id aktif di katalog"""
+        return self._active_ids
+
+    def add_rows(self, df):
+        """Tambahkan row baru di akhir katalog, mengembalikan row id-nya"""
+        ids = np.arange(self.size, self.size + len(df))
+        for col in self.values:
+            self.values[col] = np.concatenate([self.values[col], np.full(len(df), np.nan)])
+        for col in self.row_keys:
+            self.row_keys[col] = np.concatenate([self.row_keys[col], np.full(len(df), None, dtype=object)])
+        self.size += len(df)
+        self.active = np.concatenate([self.active, np.zeros(len(df), dtype=bool)])
+        self._insert(ids, df)
+        return ids
+
+    def update_rows(self, ids, df):
+        """Ganti nilai index untuk row yang sudah ada"""
+        self._delete(ids)
+        self._insert(ids, df)
+
+    def update_value(self, row_id, col, value):
+        """Ganti satu nilai numerik tanpa menyentuh kolom lain"""
+        self._delete_values(col, [row_id])
+        self.values[col][row_id] = value
+        if not np.isnan(value):
+            position = np.searchsorted(self.sorted_values[col], value, side='right')
+            self.sorted_values[col] = np.insert(self.sorted_values[col], position, value)
+            self.sorted_ids[col] = np.insert(self.sorted_ids[col], position, row_id)
+
+    def remove_rows(self, ids):
+        """Hapus row dari semua index (row id tidak dipakai ulang)"""
+        self._delete(ids)
+
+    def _insert(self, ids, df):
+        """Masukkan row id ke postings dan array numerik terurut"""
+        import pandas as pd
+
+        ids = np.asarray(ids)
+        for col, row_keys in self.row_keys.items():
+            keys = self._normalize_series(df[col])
+            row_keys[ids] = keys
+            postings = self.categorical[col]
+            for key, key_ids in self._build_postings(keys, ids).items():
+                existing = postings.get(key)
+                postings[key] = key_ids if existing is None else np.union1d(existing, key_ids)
+
+        for col in self.values:
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+            self.values[col][ids] = values
+            valid = ~np.isnan(values)
+            positions = np.searchsorted(self.sorted_values[col], values[valid], side='right')
+            self.sorted_values[col] = np.insert(self.sorted_values[col], positions, values[valid])
+            self.sorted_ids[col] = np.insert(self.sorted_ids[col], positions, ids[valid])
+
+        self.active[ids] = True
+        self._active_ids = np.flatnonzero(self.active)
+        self._facets = {}
+
+    def _delete(self, ids):
+        """Keluarkan row id dari postings dan array numerik terurut"""
+        ids = np.asarray(ids)
+        self.active[ids] = False
+        self._active_ids = np.flatnonzero(self.active)
+        self._facets = {}
+
+        for col, row_keys in self.row_keys.items():
+            postings = self.categorical[col]
+            for row_id in ids:
+                key = row_keys[row_id]
+                if key is None or key not in postings:
+                    continue
+                remaining = postings[key][postings[key] != row_id]
+                if len(remaining):
+                    postings[key] = remaining
+                else:
+                    del postings[key]
+                row_keys[row_id] = None
+
+        for col in self.values:
+            self._delete_values(col, ids)
+
+    def _delete_values(self, col, ids):
+        """Keluarkan row id dari array numerik terurut satu kolom"""
+        values = self.values[col]
+        positions = []
+        for row_id in ids:
+            if np.isnan(values[row_id]):
+                continue
+            start, end = self._range_bounds(col, values[row_id], values[row_id])
+            match = np.flatnonzero(self.sorted_ids[col][start:end] == row_id)
+            positions.extend(start + match)
+            values[row_id] = np.nan
+        self.sorted_values[col] = np.delete(self.sorted_values[col], positions)
+        self.sorted_ids[col] = np.delete(self.sorted_ids[col], positions)
+
+    def lookup(self, col, value):
+        """Row id dengan nilai kategori yang sama (case-insensitive)"""
+        postings = self.categorical.get(col, {})
+        return postings.get(self.normalize(value), np.empty(0, dtype=np.int64))
+
+    def _facet_codes(self, col):
+        """Nilai (key) dan kode nilai per row satu kolom kategori (-1 = kosong), dibangun saat pertama dipakai"""
+        facet = self._facets.get(col)
+        if facet is None:
+            postings = self.categorical[col]
+            keys = list(postings)
+            codes = np.full(self.size, -1, dtype=np.int32)
+            for code, key in enumerate(keys):
+                codes[postings[key]] = code
+            facet = self._facets[col] = (keys, codes)
+        return facet
+
+    def facet_counts(self, col, candidates=None):
+        """Jumlah row per nilai kategori di antara kandidat terurut (None = semua row aktif)"""
+        if candidates is None:
+            return {key: len(ids) for key, ids in self.categorical[col].items()}
+        keys, codes = self._facet_codes(col)
+        selected = codes[candidates]
+        counts = np.bincount(selected[selected >= 0], minlength=len(keys))
+        return dict(zip(keys, counts.tolist()))
+
+    def facet_groups(self, col, candidates=None):
+        """Kandidat terurut dikelompokkan per nilai kategori: {key: row id}"""
+        keys, codes = self._facet_codes(col)
+        ids = self.all_ids() if candidates is None else candidates
+        selected = codes[ids]
+        order = np.argsort(selected, kind='stable')
+        selected = selected[order]
+        starts = np.searchsorted(selected, np.arange(len(keys)), side='left')
+        ends = np.searchsorted(selected, np.arange(len(keys)), side='right')
+        return {key: ids[order[start:end]] for key, start, end in zip(keys, starts, ends) if end > start}
+
+    def _range_bounds(self, col, low=None, high=None):
+        """Posisi awal dan akhir range di array terurut"""
+        sorted_values = self.sorted_values[col]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        end = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side='right')
+        return start, max(start, end)
+
+    def range(self, col, low=None, high=None):
+        """Row id terurut dengan low <= nilai <= high"""
+        start, end = self._range_bounds(col, low, high)
+        return np.sort(self.sorted_ids[col][start:end])
+
+    def count_range(self, col, low=None, high=None):
+        """Jumlah row yang masuk range tanpa materialisasi row id"""
+        start, end = self._range_bounds(col, low, high)
+        return end - start
+
+    def filter_range(self, candidates, col, low=None, high=None):
+        """
+        Saring kandidat dengan filter range.
+
+        Jika kandidat lebih sedikit dari hasil range, nilai kandidat dicek
+        langsung, sehingga biaya mengikuti ukuran hasil, bukan ukuran katalog.
+        """
+        if candidates is None:
+            return self.range(col, low, high)
+        if self.count_range(col, low, high) < len(candidates):
+            return intersect(candidates, self.range(col, low, high))
+        values = self.values[col][candidates]
+        mask = ~np.isnan(values)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return candidates[mask]
+
+
+def intersect(candidates, ids):
+    """Irisan dua array row id terurut (None berarti semua row)"""
+    if candidates is None:
+        return ids
+    return np.intersect1d(candidates, ids, assume_unique=True)
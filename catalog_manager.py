@@ -0,0 +1,246 @@
+# catalog_manager.py - Hot reload katalog dengan snapshot yang ditukar secara atomik
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+
+from catalog_artifact import HEADER_FILE
+from feature_space import load_feature_weights
+from mouse_recomender import MouseRecommendationSystem
+
+
+class CatalogManager:
+    """
+    Mengelola snapshot MouseRecommendationSystem yang aktif.
+
+    Setiap reload membangun snapshot baru secara lengkap (dataframe, encoder,
+    scaler, feature matrix, index dan record tampilan) di background thread,
+    lalu menukarnya dengan satu assignment. Request yang sedang berjalan tetap
+    memakai snapshot lama yang sudah mereka ambil lewat `current`. Update
+    incremental (add/update/remove_items) juga diterapkan pada salinan
+    snapshot, jadi snapshot yang sudah dipublikasikan tidak pernah diubah.
+    """
+
+    def __init__(self, csv_path, image_folder="img", image_index=None, artifact_path=None,
+                 feature_weights_path=None, search_index=None, similar_items=None):
+        self.csv_path = csv_path
+        self.artifact_path = artifact_path
+        self.feature_weights_path = feature_weights_path
+        self.search_index = search_index
+        self.similar_items = similar_items
+        self.image_folder = image_folder
+        self.image_index = image_index
+        self._current = None
+        self._status_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._pending = False
+        self._source_mtime = None
+        self._watcher = None
+        self._watch_interval = 0
+        self._watch_stop = threading.Event()
+        # Jika diisi, reload diteruskan ke handler ini (lihat delegate_reloads)
+        self._reload_handler = None
+        self._requested_mtime = None
+        self.built_at = None
+        self.build_seconds = None
+        self.last_error = None
+        self.reloading = False
+
+    @property
+    def current(self):
+        """Snapshot aktif (None jika belum ada katalog yang berhasil dibangun)"""
+        return self._current
+
+    @property
+    def source_path(self):
+        """File yang menjadi sumber snapshot: header artifact jika dipakai, selain itu CSV"""
+        if self.artifact_path:
+            return os.path.join(self.artifact_path, HEADER_FILE)
+        return self.csv_path
+
+    def _source_signature(self):
+        """mtime file sumber katalog, untuk deteksi perubahan"""
+        try:
+            return os.stat(self.source_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _build(self):
+        """Bangun snapshot baru lalu tukar dengan snapshot aktif"""
+        previous = self._current
+        source_mtime = self._source_signature()
+        start = time.perf_counter()
+        snapshot = MouseRecommendationSystem(
+            self.csv_path,
+            self.image_folder,
+            image_index=self.image_index,
+            catalog_version=previous.catalog_version if previous else 0,
+            artifact_path=self.artifact_path,
+            # Bobot dibaca ulang setiap build, jadi bobot hasil tuning aktif lewat reload
+            feature_weights=load_feature_weights(self.feature_weights_path),
+            search_index=self.search_index,
+            similar_items=self.similar_items
+        )
+        build_seconds = time.perf_counter() - start
+
+        # Swap atomik: satu assignment referensi
+        self._current = snapshot
+        with self._status_lock:
+            self._source_mtime = source_mtime
+            self.built_at = datetime.now(timezone.utc).isoformat()
+            self.build_seconds = round(build_seconds, 4)
+            self.last_error = None
+        logging.info(f"Catalog snapshot v{snapshot.catalog_version} active "
+                     f"({len(snapshot.catalog_index.all_ids())} mice, built in {build_seconds:.2f}s)")
+        return snapshot
+
+    def load(self):
+        """Bangun snapshot secara sinkron (dipakai saat startup)"""
+        with self._build_lock:
+            return self._build()
+
+    def _reload_worker(self):
+        """Worker background: bangun ulang selama masih ada permintaan reload"""
+        while True:
+            with self._status_lock:
+                self._pending = False
+            try:
+                self._build()
+            except Exception as e:
+                logging.error(f"Error reloading catalog: {str(e)}")
+                with self._status_lock:
+                    self.last_error = str(e)
+            with self._status_lock:
+                if not self._pending:
+                    self.reloading = False
+                    self._build_lock.release()
+                    return
+
+    def reload(self, wait=False):
+        """
+        Minta reload katalog di background thread.
+
+        Jika reload sedang berjalan, permintaan ditandai pending sehingga
+        snapshot dibangun sekali lagi setelah build yang sekarang selesai.
+        Jika reload didelegasikan, permintaan hanya diteruskan ke handler.
+        """
+        if self._reload_handler is not None:
+            self._reload_handler()
+            return True
+        with self._status_lock:
+            if not self._build_lock.acquire(blocking=False):
+                self._pending = True
+                return False
+            self.reloading = True
+        thread = threading.Thread(target=self._reload_worker, name="catalog-reload", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def reload_if_changed(self):
+        """Reload jika file katalog berubah sejak snapshot terakhir"""
+        signature = self._source_signature()
+        if signature is None or signature == self._source_mtime:
+            return False
+        if self._reload_handler is not None:
+            # Reload didelegasikan: cukup satu permintaan per perubahan file
+            if signature == self._requested_mtime:
+                return False
+            self._requested_mtime = signature
+        return self.reload()
+
+    def delegate_reloads(self, handler):
+        """
+        Teruskan semua permintaan reload (endpoint dan watcher) ke `handler`.
+
+        Dipakai di gunicorn: handler mengirim SIGHUP ke master, master
+        membangun ulang snapshot-nya lalu mengganti semua worker, sehingga
+        semua proses (termasuk worker hasil recycle max_requests) memakai
+        versi katalog yang sama.
+        """
+        self._reload_handler = handler
+
+    def _update(self, apply):
+        """
+        Update incremental copy-on-write: `apply` dijalankan pada salinan
+        snapshot aktif, lalu salinan itu ditukar seperti hasil reload.
+        Request yang sedang berjalan tetap memakai snapshot lama yang utuh.
+        """
+        with self._build_lock:
+            if self._current is None:
+                raise RuntimeError("Catalog is not loaded")
+            snapshot = self._current.copy_for_update()
+            result = apply(snapshot)
+            self._current = snapshot
+        logging.info(f"Catalog snapshot v{snapshot.catalog_version} active (incremental update)")
+        return result
+
+    def add_items(self, items):
+        """Tambah mouse ke snapshot aktif (lihat MouseRecommendationSystem.add_items)"""
+        return self._update(lambda snapshot: snapshot.add_items(items))
+
+    def update_items(self, items):
+        """Ubah mouse di snapshot aktif (lihat MouseRecommendationSystem.update_items)"""
+        return self._update(lambda snapshot: snapshot.update_items(items))
+
+    def remove_items(self, keys):
+        """Hapus mouse dari snapshot aktif (lihat MouseRecommendationSystem.remove_items)"""
+        return self._update(lambda snapshot: snapshot.remove_items(keys))
+
+    def start_watcher(self, interval):
+        """Cek perubahan file katalog secara berkala di background thread"""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._watch_interval = interval
+        self._watch_stop = stop = threading.Event()
+
+        def watch():
+            while not stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logging.error(f"Error watching catalog: {str(e)}")
+
+        self._watcher = threading.Thread(target=watch, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+        logging.info(f"Watching {self.source_path} every {interval}s")
+
+    def stop_watcher(self):
+        """Hentikan watcher (mis. di master gunicorn, watcher dijalankan oleh worker)"""
+        if self._watcher is None:
+            return
+        self._watch_stop.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def after_fork(self):
+        """
+        Siapkan manager di proses worker hasil fork.
+
+        Snapshot aktif tetap dipakai bersama (copy-on-write), tetapi lock bisa
+        ter-fork dalam keadaan terkunci dan thread background tidak ikut
+        ter-fork, jadi keduanya dibuat ulang di sini.
+        """
+        self._status_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._pending = False
+        self.reloading = False
+        self._watcher = None
+        # Dengan reload terdelegasi, watcher cukup berjalan di master
+        if self._reload_handler is None:
+            self.start_watcher(self._watch_interval)
+
+    def status(self):
+        """Informasi snapshot aktif untuk /api/info"""
+        snapshot = self._current
+        with self._status_lock:
+            return {
+                'version': snapshot.catalog_version if snapshot else None,
+                'built_at': self.built_at,
+                'build_seconds': self.build_seconds,
+                'source': self.artifact_path or self.csv_path,
+                'reloading': self.reloading,
+                'last_error': self.last_error
+            }
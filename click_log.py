@@ -0,0 +1,126 @@
+# click_log.py - Log klik rekomendasi (JSON Lines) untuk tuning bobot fitur offline
+import json
+import os
+import threading
+import time
+
+# Preferensi yang dikenal /api/recommendations; key lain tidak ikut dicatat
+TEXT_PREFERENCES = ('brand', 'connection', 'size', 'shape', 'category', 'weight_pref')
+NUMBER_PREFERENCES = ('price_max', 'dpi_min', 'buttons')
+MAX_TEXT_LENGTH = 100
+
+
+def clean_click(payload):
+    """
+    Validasi event klik dari client: (preferensi, brand, name, rank).
+
+    Preferensi hanya berisi key yang dikenal dengan tipe yang benar; nilai
+    kosong dibuang. ValueError jika event tidak valid.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON object")
+    brand, name, rank = payload.get('brand'), payload.get('name'), payload.get('rank')
+    if not _is_text(brand) or not _is_text(name) or not brand or not name:
+        raise ValueError("Expected brand and name")
+    if rank is not None and (not isinstance(rank, int) or isinstance(rank, bool) or rank < 1):
+        raise ValueError("rank must be a positive integer")
+
+    raw = payload.get('preferences')
+    if raw is None:
+        raw = {}
+    if not isinstance(raw, dict):
+        raise ValueError("preferences must be an object")
+    preferences = {}
+    for key in TEXT_PREFERENCES:
+        value = raw.get(key)
+        if value in (None, ''):
+            continue
+        if not _is_text(value):
+            raise ValueError(f"Invalid {key} preference")
+        preferences[key] = value
+    for key in NUMBER_PREFERENCES:
+        value = raw.get(key)
+        if value in (None, ''):
+            continue
+        if isinstance(value, str) and len(value) <= 32:
+            try:
+                float(value)
+            except ValueError:
+                raise ValueError(f"Invalid {key} preference")
+        elif not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError(f"Invalid {key} preference")
+        preferences[key] = value
+    if isinstance(raw.get('relax'), bool):
+        preferences['relax'] = raw['relax']
+    return preferences, brand, name, rank
+
+
+def _is_text(value):
+    return isinstance(value, str) and len(value) <= MAX_TEXT_LENGTH
+
+
+class ClickLog:
+    """
+    Menulis satu baris JSON per klik hasil rekomendasi.
+
+    Format baris: {"ts", "preferences", "brand", "name", "rank"}, yaitu
+    preferensi yang dikirim ke /api/recommendations dan mouse yang diklik.
+    Jika file melewati `max_bytes`, file dirotasi ke `<path>.1` ... `<path>.<backups>`
+    dan file tertua dibuang, jadi ukuran total log terbatas.
+    """
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, backups=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, preferences, brand, name, rank=None):
+        """Tambahkan satu event klik di akhir file"""
+        line = json.dumps({
+            'ts': round(time.time(), 3),
+            'preferences': preferences,
+            'brand': brand,
+            'name': name,
+            'rank': rank
+        }, separators=(',', ':'))
+        with self._lock:
+            self._maybe_rotate(len(line) + 1)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def _maybe_rotate(self, incoming):
+        """Rotasi file jika baris berikutnya membuatnya melewati max_bytes"""
+        if not self.max_bytes:
+            return
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size + incoming <= self.max_bytes:
+            return
+        if not self.backups:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+def read_click_log(path):
+    """Baca event klik yang valid dari file log (baris rusak dilewati)"""
+    events = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict) and isinstance(event.get('preferences'), dict) \
+                    and event.get('brand') and event.get('name'):
+                events.append(event)
+    return events
@@ -0,0 +1,131 @@
+# display_records.py - Record tampilan katalog yang dirender sekali saat load
+import json
+
+
+def is_missing(value):
+    """Cek nilai kosong (None/NaN/NA) tanpa bergantung pada pandas"""
+    if value is None:
+        return True
+    try:
+        return bool(value != value)
+    except TypeError:
+        return True
+
+
+def format_number(value, spec):
+    """Format angka untuk tampilan; None jika sel kosong atau bukan angka"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if is_missing(value) else format(value, spec)
+
+
+def display_value(value):
+    """Nilai teks untuk tampilan; sel kosong menjadi None (bukan NaN di JSON)"""
+    return None if is_missing(value) else value
+
+
+class DisplayRecord:
+    """
+    Data tampilan satu mouse yang sudah diformat (harga, DPI, berat, dll).
+
+    Disimpan dengan __slots__ agar ringan untuk katalog besar; request hanya
+    menambahkan rank, skor dan URL gambar lewat to_dict. URL gambar
+    di-resolve saat render agar refresh index gambar langsung terlihat.
+    """
+
+    __slots__ = ('name', 'brand', 'price', 'image', 'specs', 'category', 'link')
+
+    SPEC_KEYS = ('connection', 'dpi', 'weight', 'buttons', 'size', 'shape',
+                 'battery_life', 'polling_rate', 'button_type')
+
+    def __init__(self, name, brand, price, image, specs, category, link):
+        self.name = name
+        self.brand = brand
+        self.price = price
+        self.image = image
+        self.specs = specs
+        self.category = category
+        self.link = link
+
+    def to_list(self):
+        """Bentuk ringkas (list) untuk disimpan di artifact katalog"""
+        return [self.name, self.brand, self.price, self.image,
+                list(self.specs), self.category, self.link]
+
+    @classmethod
+    def from_list(cls, values):
+        """Kebalikan dari to_list"""
+        name, brand, price, image, specs, category, link = values
+        return cls(name, brand, price, image, tuple(specs), category, link)
+
+    def to_dict(self, rank, similarity_score, row_id=None, image_url=None):
+        """Format hasil rekomendasi untuk response API"""
+        return {
+            'id': row_id,
+            'rank': rank,
+            'name': self.name,
+            'brand': self.brand,
+            'price': self.price,
+            'similarity_score': f"{similarity_score:.3f}",
+            'image': self.image,  # Add this for the frontend
+            'image_url': image_url,
+            'specs': dict(zip(self.SPEC_KEYS, self.specs)),
+            'category': self.category,
+            'link': self.link
+        }
+
+
+def build_display_record(row):
+    """Render record tampilan dari satu row (dict atau Series); sel kosong ditampilkan sebagai None"""
+    weight = format_number(row['Weight'], '.0f')
+    buttons = format_number(row['Buttons'], '.0f')
+    specs = (
+        display_value(row['Connection']),
+        format_number(row['DPI'], ',.0f'),
+        None if weight is None else f"{weight}g",
+        None if buttons is None else int(buttons),
+        display_value(row['Size']),
+        display_value(row['Shape']),
+        display_value(row['Battery Life']),
+        format_number(row['Polling Rate'], '.0f'),
+        display_value(row['Buttons Type'])
+    )
+    price = format_number(row['Price'], ',.0f')
+    return DisplayRecord(
+        name=row['Name'],
+        brand=row['Brand'],
+        price=None if price is None else f"Rp {price}",
+        image=row['Image'],
+        specs=specs,
+        category=display_value(row['Category']),
+        link=display_value(row.get('Link'))
+    )
+
+
+def build_display_records(df):
+    """Render record tampilan untuk setiap row katalog, diindex dengan row id"""
+    columns = list(df.columns)
+    return [build_display_record(dict(zip(columns, values)))
+            for values in zip(*(df[col].tolist() for col in columns))]
+
+
+class ArtifactRecords:
+    """
+    Record tampilan dari artifact katalog, didecode saat diakses.
+
+    `blob` berisi fragmen JSON per row yang disambung, `offsets` adalah posisi
+    awal setiap fragmen; keduanya bisa berupa array hasil mmap.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row_id):
+        start, end = self.offsets[row_id], self.offsets[row_id + 1]
+        return DisplayRecord.from_list(json.loads(self.blob[start:end].tobytes()))
@@ -0,0 +1,110 @@
+# feature_space.py - Ruang fitur cosine similarity: blok one-hot kategori + blok numerik berbobot
+import copy
+import json
+
+import numpy as np
+
+DEFAULT_BLOCK_WEIGHT = 1.0
+ENCODED_SUFFIX = '_encoded'
+
+
+def load_feature_weights(path):
+    """Baca bobot blok dari file JSON ({kolom: bobot} atau {"weights": {...}}); None jika path kosong"""
+    if not path:
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    weights = data.get('weights', data)
+    return {str(col): float(weight) for col, weight in weights.items()}
+
+
+class FeatureSpace:
+    """
+    Layout ruang fitur untuk cosine similarity.
+
+    `feature_matrix` menyimpan satu kolom per atribut: kode kategori untuk
+    kolom `<col>_encoded` dan nilai hasil MinMax untuk kolom numerik. Di ruang
+    scoring, setiap kolom kategori menjadi blok one-hot selebar vocabulary-nya
+    dan setiap kolom numerik menjadi satu dimensi; semua nilai dalam satu blok
+    dikali bobot blok tersebut. Kode kategori tidak lagi ikut dihitung sebagai
+    angka, jadi urutan alfabet kategori tidak memengaruhi skor.
+    """
+
+    def __init__(self, feature_cols, categorical_sizes, weights=None):
+        self.feature_cols = list(feature_cols)
+        self.block_names = [col[:-len(ENCODED_SUFFIX)] if col.endswith(ENCODED_SUFFIX) else col
+                            for col in self.feature_cols]
+        self.categorical_positions = [i for i, col in enumerate(self.feature_cols) if col.endswith(ENCODED_SUFFIX)]
+        self.numeric_positions = [i for i, col in enumerate(self.feature_cols) if not col.endswith(ENCODED_SUFFIX)]
+        self.categorical_blocks = [self.block_names[i] for i in self.categorical_positions]
+        self.numeric_blocks = [self.block_names[i] for i in self.numeric_positions]
+        self.sizes = np.array([int(categorical_sizes[name]) for name in self.categorical_blocks], dtype=np.int64)
+        weights = weights or {}
+        self.weights = {name: float(weights.get(name, DEFAULT_BLOCK_WEIGHT)) for name in self.block_names}
+        self._layout()
+
+    def _layout(self):
+        """Hitung offset blok one-hot dan bobot per dimensi"""
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)[:-1]]).astype(np.int64)
+        self.categorical_dim = int(self.sizes.sum())
+        self.dim = self.categorical_dim + len(self.numeric_positions)
+        self.categorical_weights = np.array([self.weights[name] for name in self.categorical_blocks], dtype=np.float32)
+        self.numeric_weights = np.array([self.weights[name] for name in self.numeric_blocks], dtype=np.float32)
+        # Bobot setiap kolom one-hot (dipakai untuk membobot query)
+        self.categorical_dim_weights = np.repeat(self.categorical_weights, self.sizes)
+
+    def grow(self, codes):
+        """
+        Perlebar blok one-hot jika ada kode kategori baru (mis. dari add_items).
+
+        Mengembalikan offset lama jika layout berubah, None jika tidak.
+        """
+        if codes.size == 0:
+            return None
+        needed = np.maximum(self.sizes, codes.max(axis=0) + 1)
+        if np.array_equal(needed, self.sizes):
+            return None
+        old_offsets = self.offsets
+        self.sizes = needed.astype(np.int64)
+        self._layout()
+        return old_offsets
+
+    def copy(self):
+        """Salinan untuk snapshot baru (grow() hanya mengganti atribut, jadi salinan dangkal cukup)"""
+        return copy.copy(self)
+
+    def with_weights(self, weights):
+        """Salinan layout dengan bobot blok yang berbeda"""
+        sizes = dict(zip(self.categorical_blocks, self.sizes.tolist()))
+        return FeatureSpace(self.feature_cols, sizes, {**self.weights, **weights})
+
+    def expand(self, vectors):
+        """
+        Ubah user vector (format kolom feature_matrix) ke ruang scoring dense.
+
+        Kode kategori NaN berarti tidak ada preferensi, sehingga bloknya nol.
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+        expanded = np.zeros((len(vectors), self.dim), dtype=np.float32)
+        if self.categorical_positions:
+            codes = vectors[:, self.categorical_positions]
+            valid = ~np.isnan(codes)
+            codes = np.where(valid, codes, 0).astype(np.int64)
+            valid &= (codes >= 0) & (codes < self.sizes)
+            users, blocks = np.nonzero(valid)
+            expanded[users, self.offsets[blocks] + codes[users, blocks]] = self.categorical_weights[blocks]
+        expanded[:, self.categorical_dim:] = vectors[:, self.numeric_positions] * self.numeric_weights
+        return expanded
+
+    def to_dict(self):
+        """Bentuk JSON untuk header artifact katalog"""
+        return {
+            'feature_cols': self.feature_cols,
+            'sizes': dict(zip(self.categorical_blocks, self.sizes.tolist())),
+            'weights': self.weights
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Kebalikan dari to_dict"""
+        return cls(data['feature_cols'], data['sizes'], data['weights'])
@@ -0,0 +1,69 @@
+# gunicorn.conf.py - Konfigurasi server produksi (multi-worker, model di-preload)
+#
+# Jalankan dengan: gunicorn -c gunicorn.conf.py app:app
+#
+# Katalog dimuat sekali di master (preload_app), lalu worker di-fork sehingga
+# feature matrix dan index dibagi lewat copy-on-write. Semua nilai bisa diatur
+# lewat environment variable.
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Jumlah worker dan thread per worker
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Model dimuat sekali di master sebelum fork
+preload_app = True
+
+# Recycle worker secara bertahap (jitter mencegah semua worker restart bersamaan)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = "-"
+
+
+def when_ready(server):
+    """
+    Reload katalog (endpoint maupun watcher) diteruskan ke master lewat SIGHUP,
+    agar master membangun ulang snapshot dan semua worker di-fork ulang darinya.
+    Tanpa ini hanya worker penerima request yang ter-reload dan worker hasil
+    recycle max_requests kembali memakai katalog lama milik master.
+    """
+    import app
+
+    master_pid = server.pid
+    app.catalog.delegate_reloads(lambda: os.kill(master_pid, signal.SIGHUP))
+
+
+def on_reload(server):
+    """SIGHUP: bangun ulang snapshot di master sebelum worker baru di-fork"""
+    import app
+
+    try:
+        app.catalog.load()
+    except Exception as e:
+        # Worker baru tetap memakai snapshot lama
+        logging.error(f"Error reloading catalog in master: {str(e)}")
+
+
+def pre_fork(server, worker):
+    """Pindahkan objek hasil preload ke generasi permanen GC agar halaman memori tetap dibagi"""
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Thread background (listener log, watcher jika tidak didelegasikan) tidak ikut ter-fork, jadi dinyalakan ulang di worker"""
+    import app
+
+    app.request_log.after_fork()
+    app.catalog.after_fork()
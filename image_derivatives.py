@@ -0,0 +1,183 @@
+# image_derivatives.py - Thumbnail gambar mouse (JPEG/WebP) dengan cache di disk
+import argparse
+import glob
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow opsional, tanpa itu gambar asli yang dikirim
+    Image = None
+    features = None
+
+# Lebar thumbnail yang dibuat; ?w= dibulatkan ke atas ke salah satu nilai ini
+DEFAULT_WIDTHS = (160, 320, 480, 640, 960)
+
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+class ImageDerivatives:
+    """
+    Membuat dan menyimpan thumbnail gambar di direktori cache.
+
+    Derivatif setiap folder sumber disimpan di subdirektori sendiri (hash
+    path folder), jadi nama file yang sama di folder berbeda tidak bertabrakan.
+    Nama file derivatif memuat lebar dan mtime sumber, jadi mengganti gambar
+    sumber otomatis menghasilkan derivatif baru (yang lama dibersihkan saat
+    derivatif baru ditulis). Lebar yang diminta dibulatkan ke daftar `widths`
+    agar jumlah varian di cache tetap terbatas. Sumber yang gagal didecode
+    dicatat dan tidak dicoba lagi sampai file-nya berubah.
+    """
+
+    def __init__(self, cache_dir=".image-cache", widths=DEFAULT_WIDTHS, quality=80):
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        self.webp_supported = bool(Image is not None and features.check('webp'))
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        # (sumber, mtime, lebar, format) yang gambar aslinya sudah cukup kecil
+        self._too_small = set()
+        # (sumber, mtime) yang tidak bisa dibuka Pillow (file rusak atau bukan gambar)
+        self._failed = set()
+        self.generated = 0
+
+    @property
+    def enabled(self):
+        """False jika Pillow tidak terpasang"""
+        return Image is not None
+
+    def snap_width(self, width):
+        """Lebar standar terkecil yang >= width (atau lebar terbesar)"""
+        for candidate in self.widths:
+            if candidate >= width:
+                return candidate
+        return self.widths[-1]
+
+    def _lock_for(self, name):
+        """Lock per file derivatif agar request bersamaan tidak membuat file yang sama dua kali"""
+        with self._locks_lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _folder_dir(self, folder):
+        """Subdirektori cache untuk satu folder sumber"""
+        tag = hashlib.sha1(os.path.normpath(folder).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.cache_dir, tag)
+
+    def _derivative_name(self, filename, width, fmt, mtime_ns):
+        """Nama file derivatif: <stem>-<lebar>w-<mtime sumber>.<format>"""
+        stem = os.path.splitext(filename)[0]
+        return f"{stem}-{width}w-{mtime_ns}.{fmt}"
+
+    def derive(self, folder, filename, width, webp=False):
+        """
+        Thumbnail untuk satu gambar sumber, mengembalikan (direktori, nama file).
+
+        None berarti gambar asli sebaiknya dikirim: Pillow tidak ada, file
+        bukan gambar yang didukung atau rusak, atau gambar asli tidak lebih
+        lebar (atau tidak lebih besar dalam byte) dari thumbnail yang diminta.
+        """
+        if not self.enabled or not filename.lower().endswith(SOURCE_EXTENSIONS):
+            return None
+        source = os.path.join(folder, filename)
+        try:
+            mtime_ns = os.stat(source).st_mtime_ns
+        except OSError:
+            return None
+
+        width = self.snap_width(width)
+        fmt = "webp" if webp and self.webp_supported else "jpeg"
+        if (source, mtime_ns, width, fmt) in self._too_small or (source, mtime_ns) in self._failed:
+            return None
+        directory = self._folder_dir(folder)
+        name = self._derivative_name(filename, width, fmt, mtime_ns)
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return directory, name
+
+        with self._lock_for(path):
+            if os.path.exists(path):
+                return directory, name
+            try:
+                rendered = self._render(source, directory, name, width, fmt)
+            except Exception as e:
+                # Sumber rusak: kirim gambar asli, jangan render ulang di setiap request
+                logging.warning(f"Cannot create thumbnail for {source}: {e}")
+                self._failed.add((source, mtime_ns))
+                return None
+            if not rendered:
+                self._too_small.add((source, mtime_ns, width, fmt))
+                return None
+        return directory, name
+
+    def _render(self, source, directory, name, width, fmt):
+        """Resize dan tulis derivatif secara atomik; False jika gambar asli sudah lebih kecil"""
+        with Image.open(source) as image:
+            if image.width <= width:
+                return False
+            height = max(1, round(image.height * width / image.width))
+            thumbnail = image.convert("RGBA" if fmt == "webp" else "RGB").resize(
+                (width, height), Image.LANCZOS)
+
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".derivative-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                thumbnail.save(f, format=fmt.upper(), quality=self.quality, optimize=True)
+            # Thumbnail yang tidak lebih kecil dari sumbernya tidak ada gunanya
+            if os.path.getsize(tmp_path) >= os.path.getsize(source):
+                os.unlink(tmp_path)
+                return False
+            os.replace(tmp_path, os.path.join(directory, name))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        # Buang derivatif dari versi sumber yang lebih lama
+        stem = name.rsplit(f"-{width}w-", 1)[0]
+        for stale in glob.glob(os.path.join(glob.escape(directory), glob.escape(stem) + f"-{width}w-*.{fmt}")):
+            if os.path.basename(stale) != name:
+                try:
+                    os.unlink(stale)
+                except OSError:
+                    pass
+        self.generated += 1
+        return True
+
+    def precompute(self, folders, webp=True):
+        """Buat semua derivatif untuk semua gambar di folder (batch saat build/deploy)"""
+        count = 0
+        for folder in folders:
+            if not os.path.isdir(folder):
+                continue
+            for filename in sorted(os.listdir(folder)):
+                for width in self.widths:
+                    formats = (False, True) if webp and self.webp_supported else (False,)
+                    for use_webp in formats:
+                        if self.derive(folder, filename, width, webp=use_webp):
+                            count += 1
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute thumbnail gambar mouse")
+    parser.add_argument("folders", nargs="*", default=["img", "static/img"])
+    parser.add_argument("--cache-dir", default=os.environ.get('IMAGE_CACHE_DIR', ".image-cache"))
+    parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS))
+    parser.add_argument("--no-webp", action="store_true", help="Hanya buat thumbnail JPEG")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    derivatives = ImageDerivatives(args.cache_dir, widths=args.widths)
+    if not derivatives.enabled:
+        raise SystemExit("Pillow is not installed; cannot generate thumbnails")
+    count = derivatives.precompute(args.folders, webp=not args.no_webp)
+    logging.info(f"{count} derivatives available in {args.cache_dir} ({derivatives.generated} generated)")
+
+
+if __name__ == "__main__":
+    main()
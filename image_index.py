@@ -0,0 +1,105 @@
+# image_index.py - Index file gambar di memori
+import os
+import threading
+import time
+import logging
+
+DEFAULT_IMAGES = ["default.jpg", "default.png", "no-image.jpg", "placeholder.jpg"]
+
+
+class ImageIndex:
+    """
+    Index nama file gambar -> (folder, nama file asli) untuk beberapa folder.
+
+    Index dibangun sekali saat startup dan dibangun ulang hanya jika mtime
+    folder berubah (dicek paling sering setiap refresh_interval detik), jadi
+    lookup per request tidak menyentuh filesystem.
+    """
+
+    def __init__(self, folders, refresh_interval=2.0):
+        self.folders = list(folders)
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._last_check = 0.0
+        self._files = {}
+        self._lower = {}
+        self._default = None
+        self.refresh(force=True)
+
+    def _folder_mtimes(self):
+        """mtime setiap folder (None jika folder tidak ada)"""
+        mtimes = []
+        for folder in self.folders:
+            try:
+                mtimes.append(os.stat(folder).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def refresh(self, force=False):
+        """Bangun ulang index jika ada folder yang berubah"""
+        with self._lock:
+            self._last_check = time.monotonic()
+            mtimes = self._folder_mtimes()
+            if not force and mtimes == self._mtimes:
+                return False
+
+            # files: folder -> set nama file, lower: folder -> {nama lowercase: nama asli}
+            files, lower = {}, {}
+            for folder in self.folders:
+                files[folder], lower[folder] = set(), {}
+                if not os.path.isdir(folder):
+                    continue
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            files[folder].add(entry.name)
+                            lower[folder].setdefault(entry.name.lower(), entry.name)
+
+            default = next(((folder, default_img)
+                            for folder in self.folders
+                            for default_img in DEFAULT_IMAGES
+                            if default_img in files[folder]), None)
+
+            self._files, self._lower, self._default, self._mtimes = files, lower, default, mtimes
+            total = sum(len(names) for names in files.values())
+            logging.info(f"Image index built: {total} files in {self.folders}")
+            return True
+
+    def _maybe_refresh(self):
+        """Cek mtime folder jika interval refresh sudah lewat"""
+        if time.monotonic() - self._last_check >= self.refresh_interval:
+            self.refresh()
+
+    def resolve(self, filename, folder=None):
+        """
+        Cari file gambar, mengembalikan (folder, nama file asli) atau None.
+
+        Nama yang sama persis diprioritaskan, lalu pencocokan case-insensitive.
+        Jika folder diberikan, pencarian dibatasi ke folder tersebut.
+        """
+        if not filename:
+            return None
+        self._maybe_refresh()
+        files, lower = self._files, self._lower
+        folders = self.folders if folder is None else [folder]
+        for candidate in folders:
+            if filename in files.get(candidate, ()):
+                return candidate, filename
+        key = filename.lower()
+        for candidate in folders:
+            real_name = lower.get(candidate, {}).get(key)
+            if real_name:
+                return candidate, real_name
+        return None
+
+    def files(self, folder):
+        """Semua nama file di folder (dari listing terakhir)"""
+        self._maybe_refresh()
+        return self._files.get(folder, set())
+
+    def default_image(self):
+        """Gambar default pertama yang tersedia, atau None"""
+        self._maybe_refresh()
+        return self._default
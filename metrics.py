@@ -0,0 +1,251 @@
+# metrics.py - Histogram latency per tahap, counter request dan ekspor format Prometheus
+import bisect
+import contextvars
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Batas bucket histogram (detik); bucket sub-milidetik untuk tahap scoring yang cepat
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Durasi tahap milik request yang sedang berjalan (diisi oleh stage())
+_request_stages = contextvars.ContextVar('request_stages', default=None)
+
+
+class Histogram:
+    """Histogram kumulatif ala Prometheus (count per bucket, sum, count)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        """Baris _bucket/_sum/_count untuk ekspor teks"""
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            yield f"{name}_bucket{_labels(labels, le=le)} {cumulative}"
+        yield f"{name}_sum{_labels(labels)} {self.sum!r}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+class MetricsRegistry:
+    """
+    Metrik in-process: histogram durasi per tahap rekomendasi, counter dan
+    histogram request per route/status.
+
+    Setiap worker gunicorn punya registry sendiri; Prometheus men-scrape
+    per proses (atau agregasi dilakukan di sisi Prometheus).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._requests = Counter()
+        self._request_durations = {}
+
+    def observe_stage(self, name, seconds):
+        """Catat durasi satu tahap (histogram global dan ringkasan request berjalan)"""
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        """Context manager untuk mengukur satu tahap"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def begin_request(self):
+        """Mulai mengumpulkan durasi tahap untuk request di context ini"""
+        stages = {}
+        _request_stages.set(stages)
+        return stages
+
+    def record_request(self, method, route, status, seconds):
+        """Catat satu request selesai; route berupa pola (mis. /api/images/<filename>)"""
+        with self._lock:
+            self._requests[(method, route, str(status))] += 1
+            histogram = self._request_durations.get(route)
+            if histogram is None:
+                histogram = self._request_durations[route] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        _request_stages.set(None)
+
+    def render(self, gauges=(), counters=()):
+        """
+        Teks eksposisi Prometheus. `gauges` dan `counters` berisi
+        (nama, help, {label tuple: nilai}) tambahan dari pemanggil.
+        """
+        with self._lock:
+            stages = {name: _copy(h) for name, h in self._stages.items()}
+            requests = dict(self._requests)
+            durations = {route: _copy(h) for route, h in self._request_durations.items()}
+
+        lines = [
+            "# HELP mouse_stage_duration_seconds Durasi tahap pemrosesan rekomendasi",
+            "# TYPE mouse_stage_duration_seconds histogram",
+        ]
+        for name in sorted(stages):
+            lines.extend(stages[name].samples("mouse_stage_duration_seconds", {'stage': name}))
+
+        lines += [
+            "# HELP mouse_http_requests_total Request HTTP per route dan status",
+            "# TYPE mouse_http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f"mouse_http_requests_total"
+                         f"{_labels({'method': method, 'route': route, 'status': status})} {count}")
+
+        lines += [
+            "# HELP mouse_http_request_duration_seconds Durasi request HTTP per route",
+            "# TYPE mouse_http_request_duration_seconds histogram",
+        ]
+        for route in sorted(durations):
+            lines.extend(durations[route].samples("mouse_http_request_duration_seconds", {'route': route}))
+
+        for kind, metrics in (('counter', counters), ('gauge', gauges)):
+            for name, help_text, values in metrics:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for labels, value in values.items():
+                    lines.append(f"{name}{_labels(dict(labels))} {value}")
+
+        lines += [
+            "# HELP mouse_process_start_time_seconds Waktu start proses (unix)",
+            "# TYPE mouse_process_start_time_seconds gauge",
+            f"mouse_process_start_time_seconds {self.started_at}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _copy(histogram):
+    copy = Histogram(histogram.buckets)
+    copy.counts = list(histogram.counts)
+    copy.sum = histogram.sum
+    copy.count = histogram.count
+    return copy
+
+
+class SlowRequestProfiler:
+    """
+    Profiler sampling opt-in untuk request lambat.
+
+    Selama ada request yang diprofil, satu thread latar mengambil stack
+    thread request setiap `interval` detik (sys._current_frames). Jika request
+    selesai lebih lama dari `threshold` detik, stack yang paling sering
+    muncul dilaporkan lewat `report` (default: log warning). `sample_rate`
+    membatasi porsi request yang diprofil.
+    """
+
+    def __init__(self, threshold, interval=0.005, sample_rate=1.0, top=5, report=None):
+        self.threshold = threshold
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.top = top
+        self.report = report or self._log_report
+        self.slow_requests = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Mulai sampling thread saat ini; mengembalikan token (None jika tidak disampel)"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        token = threading.get_ident()
+        with self._lock:
+            self._active[token] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+            self._wakeup.set()
+        return token
+
+    def stop(self, token, seconds, label):
+        """Selesai sampling; laporkan stack jika request lebih lama dari threshold"""
+        if token is None:
+            return
+        with self._lock:
+            samples = self._active.pop(token, Counter())
+        if seconds >= self.threshold:
+            self.slow_requests += 1
+            self.report(label, seconds, samples.most_common(self.top), sum(samples.values()))
+
+    def _run(self):
+        while True:
+            # Tidur tanpa biaya selama tidak ada request yang diprofil
+            with self._lock:
+                idle = not self._active
+                if idle:
+                    self._wakeup.clear()
+            if idle:
+                self._wakeup.wait()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for token, samples in self._active.items():
+                    frame = frames.get(token)
+                    if frame is not None:
+                        samples[_stack_key(frame)] += 1
+
+    @staticmethod
+    def _log_report(label, seconds, stacks, total):
+        lines = [f"Slow request {label}: {seconds * 1000:.1f} ms, {total} samples"]
+        for stack, count in stacks:
+            lines.append(f"  {count}x {stack}")
+        logging.warning("\n".join(lines))
+
+
+def _stack_key(frame, depth=12):
+    """Stack ringkas dari frame teratas (frame terdalam paling kiri)"""
+    parts = []
+    while frame is not None and len(parts) < depth:
+        code = frame.f_code
+        parts.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return " <- ".join(parts)
+
+
+# Registry bersama untuk proses ini
+registry = MetricsRegistry()
+
+
+def stage(name):
+    """Ukur satu tahap di registry bersama: `with stage('score'): ...`"""
+    return registry.stage(name)
@@ -1,63 +1,96 @@
 # mouse_recomender.py - Machine Learning System
-import pandas as pd
+# pandas dan sklearn hanya di-import saat katalog dibangun dari CSV, sehingga
+# serving dari artifact katalog cukup memakai NumPy.
+import copy
 import numpy as np
-from sklearn.preprocessing import LabelEncoder, MinMaxScaler
-from sklearn.metrics.pairwise import cosine_similarity
 import os
 import logging
+import threading
+from functools import lru_cache
+
+from ann_index import build_search_index
+from catalog_index import CatalogIndex, intersect
+from catalog_artifact import load_artifact
+from display_records import ArtifactRecords, build_display_record, build_display_records, is_missing
+from feature_space import FeatureSpace
+from image_index import ImageIndex
+from metrics import stage
+from scoring import TopKScorer, select_top_k
+from similar_items import NeighbourTable
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
 
 class MouseRecommendationSystem:
     """
     Mouse Recommendation System menggunakan Cosine Similarity
     """
     
-    def __init__(self, csv_path, image_folder="img"):
+    def __init__(self, csv_path=None, image_folder="img", image_index=None, catalog_version=0,
+                 artifact_path=None, feature_weights=None, search_index=None, similar_items=None):
         self.df = None
         self.processed_df = None
         self.feature_matrix = None
-        self.scaler = MinMaxScaler()
+        self.scaler = None
         self.label_encoders = {}
         self.model_name = "Cosine Similarity"
+        self.batch_block_size = 64
+        self.profile_cache_size = 1024
+        self.catalog_version = catalog_version
         self.feature_columns = []
+        self.catalog_index = None
+        self.scorer = None
+        self.feature_space = None
+        self.feature_weights = feature_weights
+        # Konfigurasi index pencarian: {'backend': 'exact'|'ivf', 'n_lists', 'n_probe'}
+        self.search_config = dict(search_index or {})
+        self.search_index = None
+        # Tabel tetangga "mirip dengan ini": {'k': jumlah tetangga (default 0 = mati), 'workers'}
+        self.similar_config = dict(similar_items or {})
+        self.neighbour_table = None
+        self.display_records = []
+        self.item_ids = {}
+        self._update_lock = threading.Lock()
         self.image_folder = image_folder
-        self.load_and_preprocess_data(csv_path)
+        if image_index is None or image_folder not in image_index.folders:
+            image_index = ImageIndex([image_folder])
+        self.image_index = image_index
+        self.artifact_header = None
+        # Opsi filter dihitung sekali per versi katalog: (catalog_version, options)
+        self._options_cache = None
+        if artifact_path is not None:
+            self.load_artifact(artifact_path)
+        else:
+            self.load_and_preprocess_data(csv_path)
+
+    @classmethod
+    def from_artifact(cls, artifact_path, image_folder="img", image_index=None, catalog_version=0,
+                      search_index=None, similar_items=None):
+        """Memuat katalog dari artifact biner hasil catalog_artifact.py (tanpa CSV, bobot fitur ikut artifact)"""
+        return cls(image_folder=image_folder, image_index=image_index,
+                   catalog_version=catalog_version, artifact_path=artifact_path,
+                   search_index=search_index, similar_items=similar_items)
+
+    NUMERICAL_COLUMNS = ['Price', 'Weight', 'DPI', 'Polling Rate', 'Buttons']
+    CATEGORICAL_COLUMNS = ['Brand', 'Connection', 'Power', 'Battery Life',
+                           'Buttons Type', 'Size', 'Shape', 'Category']
 
     def load_and_preprocess_data(self, csv_path):
         """Memuat dan memproses data dari file CSV"""
+        import pandas as pd
+        from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+
         try:
+            self.scaler = MinMaxScaler()
             self.df = pd.read_csv(csv_path)
             logging.info(f"Dataset loaded: {len(self.df)} mice")
 
             # Clean column names
             self.df.columns = self.df.columns.str.strip()
-            self.processed_df = self.df.copy()
+            self.numeric_fill_values = {}
+            self.processed_df = self._clean_frame(self.df)
 
-            # Handle missing values
-            self.processed_df['Power'] = self.processed_df['Power'].fillna('Unknown')
-            self.processed_df['Battery Life'] = self.processed_df['Battery Life'].fillna('Unknown')
-            
-            # Perbaikan untuk gambar - pastikan semua mouse memiliki gambar
-            self.processed_df['Image'] = self.processed_df['Image'].fillna('default.jpg')
-            
-            # Bersihkan nama file gambar dari spasi dan karakter khusus
-            self.processed_df['Image'] = self.processed_df['Image'].astype(str).str.strip()
-            
-            # Validasi dan standarisasi format gambar
-            self.processed_df['Image'] = self.processed_df['Image'].apply(self._standardize_image_name)
-
-            # Clean numerical data
-            numerical_cols = ['Price', 'Weight', 'DPI', 'Polling Rate', 'Buttons']
-            for col in numerical_cols:
-                if col in self.processed_df.columns:
-                    self.processed_df[col] = pd.to_numeric(self.processed_df[col], errors='coerce')
-                    self.processed_df[col] = self.processed_df[col].fillna(self.processed_df[col].median())
-
-            # Clean categorical data
-            categorical_cols = ['Brand', 'Connection', 'Power', 'Battery Life',
-                              'Buttons Type', 'Size', 'Shape', 'Category']
-            for col in categorical_cols:
-                if col in self.processed_df.columns:
-                    self.processed_df[col] = self.processed_df[col].astype(str).str.strip()
+            numerical_cols = self.NUMERICAL_COLUMNS
+            categorical_cols = self.CATEGORICAL_COLUMNS
 
             # Encode categorical variables
             for col in categorical_cols:
@@ -73,6 +106,7 @@ class MouseRecommendationSystem:
             available_numerical = [col for col in numerical_cols if col in self.processed_df.columns]
             if available_numerical:
                 self.processed_df[available_numerical] = self.scaler.fit_transform(self.processed_df[available_numerical])
+            self.numerical_cols = available_numerical
 
             # Create feature matrix
             feature_cols = ([col + '_encoded' for col in categorical_cols if col in self.df.columns] +
@@ -81,9 +115,31 @@ class MouseRecommendationSystem:
             self.feature_cols = feature_cols
             self.feature_columns = feature_cols
 
+            # Kolom kategori menjadi blok one-hot berbobot di ruang scoring
+            self.feature_space = FeatureSpace(
+                feature_cols,
+                {col: len(le.classes_) for col, le in self.label_encoders.items()},
+                self.feature_weights
+            )
+            self.scorer = TopKScorer(self.feature_matrix, self.feature_space)
+            self.search_index = build_search_index(self.scorer, **self.search_config)
+            self._precompute_profile_statistics()
+
             # Validate images
             self.validate_and_fix_images()
 
+            # Build filter index
+            self.catalog_index = CatalogIndex(self.df)
+            self.item_ids = {self._item_key(brand, name): row_id
+                             for row_id, (brand, name) in enumerate(zip(self.df['Brand'], self.df['Name']))}
+            self._build_neighbour_table()
+
+            # Render record tampilan sekali untuk setiap mouse
+            self.display_records = build_display_records(self.df)
+
+            # Versi katalog naik setiap kali data dimuat ulang
+            self.catalog_version += 1
+
             logging.info("Data preprocessing completed")
             logging.info(f"Feature matrix shape: {self.feature_matrix.shape}")
             logging.info(f"Available columns: {list(self.df.columns)}")
@@ -92,18 +148,101 @@ class MouseRecommendationSystem:
             logging.error(f"Error loading data: {str(e)}")
             raise
 
-    def _standardize_image_name(self, image_name):
-        """Standardisasi nama file gambar"""
-        if pd.isna(image_name) or str(image_name).lower() in ['nan', 'none', '']:
-            return 'default.jpg'
+    def load_artifact(self, artifact_path):
+        """Memuat katalog yang sudah diproses dari artifact biner (array di-mmap)"""
+        try:
+            header, arrays = load_artifact(artifact_path)
+
+            self.artifact_header = header
+            self.feature_cols = header['feature_cols']
+            self.feature_columns = self.feature_cols
+            self.numerical_cols = header['numerical_cols']
+            self.feature_matrix = arrays['feature_matrix']
+            self.feature_space = FeatureSpace.from_dict(header['feature_space'])
+            self.feature_weights = self.feature_space.weights
+            self.scorer = TopKScorer.from_arrays(self.feature_space, arrays['scorer_indices'],
+                                                 arrays['scorer_inv_norm'], arrays['scorer_numeric'])
+            # Centroid IVF yang ikut dikompilasi ke artifact dipakai tanpa training ulang
+            trained = None
+            if 'ann_centroids' in arrays:
+                trained = (arrays['ann_centroids'], arrays['ann_assignments'])
+            self.search_index = build_search_index(self.scorer, trained=trained, **self.search_config)
+
+            # Statistik profil dari header, tanpa refit encoder atau scaler
+            self.category_codes = header['category_codes']
+            self.numeric_ranges = {col: tuple(bounds) for col, bounds in header['numeric_ranges'].items()}
+            self.feature_positions = {col: i for i, col in enumerate(self.feature_cols)}
+            self.default_user_vector = arrays['default_user_vector']
+            self._cached_user_vector = lru_cache(maxsize=self.profile_cache_size)(self._build_user_vector)
+
+            postings = {
+                col: (meta['keys'], meta['offsets'], arrays['postings'][col])
+                for col, meta in header['postings'].items()
+            }
+            self.catalog_index = CatalogIndex.from_arrays(
+                header['rows'], postings, arrays['values'], arrays['sorted_ids'], arrays['sorted_values'])
+            self.display_records = ArtifactRecords(arrays['records'], arrays['records_offsets'])
+            # Tabel tetangga dari artifact (--similar-items) dipakai langsung, selain itu dihitung
+            if 'similar_ids' in arrays:
+                self.neighbour_table = NeighbourTable(arrays['similar_ids'], arrays['similar_scores'])
+            else:
+                self._build_neighbour_table()
+
+            self.catalog_version += 1
+            logging.info(f"Catalog artifact loaded: {header['rows']} mice from {artifact_path}")
+
+        except Exception as e:
+            logging.error(f"Error loading catalog artifact: {str(e)}")
+            raise
+
+    def _clean_frame(self, frame):
+        """Bersihkan missing value, nama gambar, kolom numerik dan kategori"""
+        import pandas as pd
+
+        processed = frame.copy()
+
+        # Handle missing values
+        processed['Power'] = processed['Power'].fillna('Unknown')
+        processed['Battery Life'] = processed['Battery Life'].fillna('Unknown')
         
-        image_name = str(image_name).strip()
+        # Perbaikan untuk gambar - pastikan semua mouse memiliki gambar
+        processed['Image'] = processed['Image'].fillna('default.jpg')
         
-        # Pastikan ada ekstensi
-        if not image_name.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-            image_name += '.jpg'
+        # Bersihkan nama file gambar dari spasi dan karakter khusus
+        processed['Image'] = processed['Image'].astype(str).str.strip()
+        
+        # Validasi dan standarisasi format gambar
+        processed['Image'] = self._standardize_image_names(processed['Image'])
+
+        # Clean numerical data (nilai kosong diisi median saat katalog dimuat)
+        for col in self.NUMERICAL_COLUMNS:
+            if col in processed.columns:
+                processed[col] = pd.to_numeric(processed[col], errors='coerce')
+                if col not in self.numeric_fill_values:
+                    self.numeric_fill_values[col] = processed[col].median()
+                processed[col] = processed[col].fillna(self.numeric_fill_values[col])
+
+        # Clean categorical data
+        for col in self.CATEGORICAL_COLUMNS:
+            if col in processed.columns:
+                processed[col] = processed[col].astype(str).str.strip()
+
+        return processed
+
+    @staticmethod
+    def _standardize_image_names(images):
+        """Standardisasi nama file gambar (column-wise)"""
+        lowered = images.str.lower()
+        images = images.mask(lowered.isin(['nan', 'none', '']), 'default.jpg')
         
-        return image_name
+        # Pastikan ada ekstensi
+        has_extension = images.str.lower().str.endswith(IMAGE_EXTENSIONS)
+        return images.where(has_extension, images + '.jpg')
+
+    @staticmethod
+    def _clean_image_key(names):
+        """Normalisasi nama untuk pencocokan file gambar"""
+        return names.astype(str).str.lower().str.replace(' ', '_').str.replace('-', '_')
 
     def validate_and_fix_images(self):
         """Validasi dan perbaiki path gambar"""
@@ -111,273 +250,872 @@ class MouseRecommendationSystem:
             logging.warning(f"Image folder '{self.image_folder}' tidak ditemukan")
             return
 
-        # Buat mapping semua file gambar yang ada
-        available_images = {}
-        for file in os.listdir(self.image_folder):
-            if file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-                clean_name = file.lower().replace(' ', '_').replace('-', '_')
-                available_images[clean_name] = file
-
-        # Perbaiki referensi gambar untuk setiap mouse
-        for idx, row in self.processed_df.iterrows():
-            image_name = row['Image']
-            image_path = os.path.join(self.image_folder, image_name)
-            
-            if not os.path.exists(image_path):
-                # Coba cari dengan nama yang mirip
-                mouse_name = str(row['Name']).lower().replace(' ', '_').replace('-', '_')
-                brand_name = str(row['Brand']).lower().replace(' ', '_').replace('-', '_')
-                
-                # Coba beberapa kemungkinan nama file
-                possible_names = [
-                    f"{mouse_name}.jpg",
-                    f"{brand_name}_{mouse_name}.jpg",
-                    f"{mouse_name}.png",
-                    f"{brand_name}.jpg"
-                ]
-                
-                found = False
-                for possible_name in possible_names:
-                    if possible_name in available_images:
-                        self.processed_df.loc[idx, 'Image'] = available_images[possible_name]
-                        self.df.loc[idx, 'Image'] = available_images[possible_name]
-                        found = True
-                        break
-                
-                if not found:
-                    # Gunakan default image
-                    self.processed_df.loc[idx, 'Image'] = 'default.jpg'
-                    self.df.loc[idx, 'Image'] = 'default.jpg'
+        missing, fixed = self._resolve_missing_images(self.processed_df)
+        if missing.any():
+            self.processed_df.loc[missing, 'Image'] = fixed
+            self.df.loc[missing, 'Image'] = fixed
 
         logging.info("Image validation completed")
 
+    def _resolve_missing_images(self, processed):
+        """Cari pengganti untuk gambar yang tidak ada, mengembalikan (mask missing, nama pengganti)"""
+        import pandas as pd
+
+        # Buat mapping semua file gambar yang ada dari satu listing folder
+        folder_files = self.image_index.files(self.image_folder)
+        image_files = pd.Series(sorted(f for f in folder_files if f.lower().endswith(IMAGE_EXTENSIONS)), dtype=object)
+        available_images = pd.Series(image_files.values, index=self._clean_image_key(image_files).values)
+        available_images = available_images[~available_images.index.duplicated(keep='last')]
+
+        # Mouse yang file gambarnya tidak ada
+        missing = ~processed['Image'].isin(folder_files)
+
+        # Coba cari dengan nama yang mirip, sesuai urutan prioritas
+        mouse_name = self._clean_image_key(processed.loc[missing, 'Name'])
+        brand_name = self._clean_image_key(processed.loc[missing, 'Brand'])
+        possible_names = [
+            mouse_name + '.jpg',
+            brand_name + '_' + mouse_name + '.jpg',
+            mouse_name + '.png',
+            brand_name + '.jpg'
+        ]
+
+        fixed = pd.Series(np.nan, index=mouse_name.index, dtype=object)
+        for possible_name in possible_names:
+            fixed = fixed.fillna(possible_name.map(available_images))
+
+        # Gunakan default image jika tidak ditemukan
+        return missing, fixed.fillna('default.jpg')
+
     def get_image_url(self, image_filename):
         """Dapatkan URL gambar dengan validasi"""
-        if not image_filename or pd.isna(image_filename):
+        if not image_filename or is_missing(image_filename):
             return "/api/images/default.jpg"
         
         # Bersihkan nama file
         clean_filename = str(image_filename).strip()
-        image_path = os.path.join(self.image_folder, clean_filename)
-        
-        if os.path.exists(image_path):
-            return f"/api/images/{clean_filename}"
-        else:
-            # Coba cari file dengan nama serupa
-            if os.path.exists(self.image_folder):
-                for file in os.listdir(self.image_folder):
-                    if file.lower() == clean_filename.lower():
-                        return f"/api/images/{file}"
-            return "/api/images/default.jpg"
-
-    def create_user_profile(self, user_preferences):
-        """Membuat user profile vector berdasarkan preferensi"""
-        feature_cols = self.feature_cols
-        user_profile = {}
+        resolved = self.image_index.resolve(clean_filename, folder=self.image_folder)
+        if resolved:
+            return f"/api/images/{resolved[1]}"
+        return "/api/images/default.jpg"
 
-        logging.info(f"Creating user profile for: {user_preferences}")
+    # Mapping preferensi kategori ke kolom dataset
+    CATEGORICAL_PREFERENCES = {
+        'brand': 'Brand',
+        'connection': 'Connection',
+        'size': 'Size',
+        'shape': 'Shape',
+        'category': 'Category'
+    }
 
-        # Handle categorical preferences
-        categorical_mappings = {
-            'brand': 'Brand',
-            'connection': 'Connection',
-            'size': 'Size',
-            'shape': 'Shape',
-            'category': 'Category'
+    def _precompute_profile_statistics(self):
+        """Precompute median, min/max dan encoder dict untuk pembuatan user profile"""
+        self.numeric_ranges = {
+            col: (self.original_numerical[col].min(), self.original_numerical[col].max())
+            for col in self.original_numerical.columns
+        }
+        # Encoder dict menjadi sumber kode kategori; kategori baru ditambahkan di akhir
+        self.category_codes = {
+            col: {value: code for code, value in enumerate(le.classes_)}
+            for col, le in self.label_encoders.items()
         }
+        self.feature_positions = {col: i for i, col in enumerate(self.feature_cols)}
+        self._refresh_profile_statistics()
+
+    def _refresh_profile_statistics(self, row_ids=None):
+        """Hitung ulang median default dan kosongkan cache user vector"""
+        features = self.feature_matrix if row_ids is None else self.feature_matrix[row_ids]
+        self.default_user_vector = np.median(features, axis=0)
+        # Kategori tanpa preferensi tidak ikut menentukan skor (blok one-hot nol)
+        self.default_user_vector[self.feature_space.categorical_positions] = np.nan
+        self._cached_user_vector = lru_cache(maxsize=self.profile_cache_size)(self._build_user_vector)
 
-        for pref_key, col_name in categorical_mappings.items():
+    def profile_cache_info(self):
+        """Statistik cache user vector (hits, misses, maxsize, currsize)"""
+        return self._cached_user_vector.cache_info()
+
+    def _profile_key(self, user_preferences):
+        """Normalisasi preferensi menjadi tuple yang bisa dipakai sebagai cache key"""
+        categorical = []
+        for pref_key, col_name in self.CATEGORICAL_PREFERENCES.items():
+            value = None
             if pref_key in user_preferences and user_preferences[pref_key]:
-                value = user_preferences[pref_key].strip()
-                if value and col_name in self.label_encoders:
-                    if value in self.label_encoders[col_name].classes_:
-                        encoded_value = self.label_encoders[col_name].transform([value])[0]
-                        user_profile[col_name + '_encoded'] = encoded_value
-                        logging.info(f"Encoded {col_name}: {value} -> {encoded_value}")
+                value = user_preferences[pref_key].strip() or None
+            categorical.append(value)
 
-        # Handle numerical preferences
-        if 'price_max' in user_preferences and user_preferences['price_max']:
-            try:
-                original_price = float(user_preferences['price_max'])
-                price_min = self.original_numerical['Price'].min()
-                price_max = self.original_numerical['Price'].max()
-                price_normalized = (original_price - price_min) / (price_max - price_min)
-                user_profile['Price'] = min(1.0, max(0.0, price_normalized))
-                logging.info(f"Normalized price: {original_price} -> {user_profile['Price']}")
-            except (ValueError, TypeError):
-                logging.warning(f"Invalid price value: {user_preferences['price_max']}")
+        def numeric(pref_key):
+            if pref_key in user_preferences and user_preferences[pref_key]:
+                try:
+                    return float(user_preferences[pref_key])
+                except (ValueError, TypeError):
+                    logging.warning(f"Invalid {pref_key} value: {user_preferences[pref_key]}")
+            return None
 
-        # Weight preference handling
+        weight_pref = None
         if 'weight_pref' in user_preferences and user_preferences['weight_pref']:
-            weight_min = self.original_numerical['Weight'].min()
-            weight_max = self.original_numerical['Weight'].max()
-            weight_range = weight_max - weight_min
-            
             weight_pref = user_preferences['weight_pref'].lower()
+
+        return (tuple(categorical), numeric('price_max'), weight_pref,
+                numeric('dpi_min'), numeric('buttons'))
+
+    def _normalize_numeric(self, col, value):
+        """Normalisasi nilai asli ke skala [0, 1] memakai min/max dataset"""
+        col_min, col_max = self.numeric_ranges[col]
+        return min(1.0, max(0.0, (value - col_min) / (col_max - col_min)))
+
+    def _build_user_vector(self, key):
+        """Membangun user vector dari preferensi yang sudah dinormalisasi"""
+        categorical, price, weight_pref, dpi, buttons = key
+        user_vector = self.default_user_vector.copy()
+
+        # Handle categorical preferences
+        for value, col_name in zip(categorical, self.CATEGORICAL_PREFERENCES.values()):
+            codes = self.category_codes.get(col_name, {})
+            if value is not None and value in codes:
+                user_vector[self.feature_positions[col_name + '_encoded']] = codes[value]
+
+        # Handle numerical preferences
+        if price is not None:
+            user_vector[self.feature_positions['Price']] = self._normalize_numeric('Price', price)
+
+        # Weight preference handling
+        if weight_pref is not None:
+            weight_min, weight_max = self.numeric_ranges['Weight']
             if weight_pref == 'light':
-                target_weight = weight_min + (weight_range * 0.2)
+                target_weight = weight_min + ((weight_max - weight_min) * 0.2)
             elif weight_pref == 'medium':
-                target_weight = weight_min + (weight_range * 0.5)
+                target_weight = weight_min + ((weight_max - weight_min) * 0.5)
             else:  # heavy
-                target_weight = weight_min + (weight_range * 0.8)
-            
-            weight_normalized = (target_weight - weight_min) / (weight_max - weight_min)
-            user_profile['Weight'] = min(1.0, max(0.0, weight_normalized))
-            logging.info(f"Weight preference: {weight_pref} -> {user_profile['Weight']}")
+                target_weight = weight_min + ((weight_max - weight_min) * 0.8)
+            user_vector[self.feature_positions['Weight']] = self._normalize_numeric('Weight', target_weight)
 
-        # DPI preference
-        if 'dpi_min' in user_preferences and user_preferences['dpi_min']:
-            try:
-                original_dpi = float(user_preferences['dpi_min'])
-                dpi_min = self.original_numerical['DPI'].min()
-                dpi_max = self.original_numerical['DPI'].max()
-                dpi_normalized = (original_dpi - dpi_min) / (dpi_max - dpi_min)
-                user_profile['DPI'] = min(1.0, max(0.0, dpi_normalized))
-                logging.info(f"Normalized DPI: {original_dpi} -> {user_profile['DPI']}")
-            except (ValueError, TypeError):
-                logging.warning(f"Invalid DPI value: {user_preferences['dpi_min']}")
+        if dpi is not None:
+            user_vector[self.feature_positions['DPI']] = self._normalize_numeric('DPI', dpi)
 
-        # Buttons preference
-        if 'buttons' in user_preferences and user_preferences['buttons']:
-            try:
-                buttons_original = float(user_preferences['buttons'])
-                buttons_min = self.original_numerical['Buttons'].min()
-                buttons_max = self.original_numerical['Buttons'].max()
-                buttons_normalized = (buttons_original - buttons_min) / (buttons_max - buttons_min)
-                user_profile['Buttons'] = min(1.0, max(0.0, buttons_normalized))
-                logging.info(f"Normalized buttons: {buttons_original} -> {user_profile['Buttons']}")
-            except (ValueError, TypeError):
-                logging.warning(f"Invalid buttons value: {user_preferences['buttons']}")
+        if buttons is not None:
+            user_vector[self.feature_positions['Buttons']] = self._normalize_numeric('Buttons', buttons)
 
-        # Convert to vector
-        user_vector = np.zeros(len(feature_cols))
-        for i, col in enumerate(feature_cols):
-            if col in user_profile:
-                user_vector[i] = user_profile[col]
-            else:
-                user_vector[i] = np.median(self.processed_df[col])
+        user_vector = user_vector.reshape(1, -1)
+        # Vector dibagi antar request lewat cache, jadi dibuat read-only
+        user_vector.flags.writeable = False
+        return user_vector
 
-        logging.info(f"User vector created with {len(user_vector)} features")
-        return user_vector.reshape(1, -1)
+    def create_user_profile(self, user_preferences):
+        """Membuat user profile vector berdasarkan preferensi (di-cache per kombinasi preferensi)"""
+        logging.debug("Creating user profile for: %s", user_preferences)
+        return self._cached_user_vector(self._profile_key(user_preferences))
 
     def get_recommendations(self, user_preferences, top_n=5):
         """Mendapatkan rekomendasi mouse dengan gambar"""
         try:
-            logging.info(f"Getting recommendations for: {user_preferences}")
+            logging.debug("Getting recommendations for: %s", user_preferences)
             
-            user_vector = self.create_user_profile(user_preferences)
-            similarities = cosine_similarity(user_vector, self.feature_matrix)[0]
+            with stage('profile'):
+                user_vector = self.create_user_profile(user_preferences)
+            with stage('filter'):
+                candidates = self.filter_candidates(user_preferences)
+            return self._rank_candidates(user_vector, candidates, top_n)
+
+        except Exception as e:
+            logging.error(f"Error getting recommendations: {str(e)}")
+            return []
 
-            recommendations = self.df.copy()
-            recommendations['similarity_score'] = similarities
+    def get_recommendations_relaxed(self, user_preferences, top_n=5, min_results=1):
+        """
+        Seperti get_recommendations, tetapi filter dilonggarkan jika kandidat
+        kurang dari `min_results`. Mengembalikan (hasil, filter yang dilonggarkan).
+        """
+        try:
+            logging.debug("Getting recommendations for: %s", user_preferences)
 
-            # Apply filters
-            if 'price_max' in user_preferences and user_preferences['price_max']:
-                try:
-                    max_price = float(user_preferences['price_max'])
-                    recommendations = recommendations[recommendations['Price'] <= max_price]
-                    logging.info(f"Applied price filter: <= {max_price}")
-                except (ValueError, TypeError):
-                    logging.warning(f"Invalid price filter: {user_preferences['price_max']}")
-
-            # Apply other filters
-            filter_mappings = {
-                'category': 'Category',
-                'brand': 'Brand',
-                'connection': 'Connection',
-                'size': 'Size',
-                'shape': 'Shape'
-            }
+            with stage('profile'):
+                user_vector = self.create_user_profile(user_preferences)
+            with stage('filter'):
+                candidates, relaxed = self.relaxed_candidates(user_preferences, min_results)
+            return self._rank_candidates(user_vector, candidates, top_n), relaxed
 
-            for pref_key, col_name in filter_mappings.items():
-                if pref_key in user_preferences and user_preferences[pref_key]:
-                    filter_value = user_preferences[pref_key].strip()
-                    if filter_value and col_name in recommendations.columns:
-                        mask = recommendations[col_name].str.strip().str.lower() == filter_value.lower()
-                        recommendations = recommendations[mask]
-                        logging.info(f"Applied {col_name} filter: {filter_value}")
-
-            # Weight preference filter
-            if 'weight_pref' in user_preferences and user_preferences['weight_pref']:
-                weight_pref = user_preferences['weight_pref'].lower()
-                weight_min = recommendations['Weight'].min()
-                weight_max = recommendations['Weight'].max()
-                weight_range = weight_max - weight_min
-                
-                if weight_pref == 'light':
-                    weight_threshold = weight_min + (weight_range * 0.4)
-                    recommendations = recommendations[recommendations['Weight'] <= weight_threshold]
-                elif weight_pref == 'medium':
-                    weight_lower = weight_min + (weight_range * 0.3)
-                    weight_upper = weight_min + (weight_range * 0.7)
-                    recommendations = recommendations[(recommendations['Weight'] >= weight_lower) & (recommendations['Weight'] <= weight_upper)]
-                else:  # heavy
-                    weight_threshold = weight_min + (weight_range * 0.6)
-                    recommendations = recommendations[recommendations['Weight'] >= weight_threshold]
-                    
-                logging.info(f"Applied weight filter: {weight_pref}")
-
-            # DPI filter
-            if 'dpi_min' in user_preferences and user_preferences['dpi_min']:
-                try:
-                    min_dpi = float(user_preferences['dpi_min'])
-                    recommendations = recommendations[recommendations['DPI'] >= min_dpi]
-                    logging.info(f"Applied DPI filter: >= {min_dpi}")
-                except (ValueError, TypeError):
-                    logging.warning(f"Invalid DPI filter: {user_preferences['dpi_min']}")
+        except Exception as e:
+            logging.error(f"Error getting recommendations: {str(e)}")
+            return [], []
 
-            # Buttons filter
-            if 'buttons' in user_preferences and user_preferences['buttons']:
-                try:
-                    buttons_count = int(user_preferences['buttons'])
-                    recommendations = recommendations[recommendations['Buttons'] == buttons_count]
-                    logging.info(f"Applied buttons filter: = {buttons_count}")
-                except (ValueError, TypeError):
-                    logging.warning(f"Invalid buttons filter: {user_preferences['buttons']}")
-
-            # Sort by similarity
-            recommendations = recommendations.sort_values('similarity_score', ascending=False)
-            top_recommendations = recommendations.head(top_n)
-
-            logging.info(f"Found {len(top_recommendations)} recommendations")
-
-            # Format output
-            result = []
-            for idx, row in top_recommendations.iterrows():
-                mouse_info = {
-                    'rank': len(result) + 1,
-                    'name': row['Name'],
-                    'brand': row['Brand'],
-                    'price': f"Rp {row['Price']:,.0f}",
-                    'similarity_score': f"{row['similarity_score']:.3f}",
-                    'image': row['Image'],  # Add this for the frontend
-                    'image_url': self.get_image_url(row['Image']),
-                    'specs': {
-                        'connection': row['Connection'],
-                        'dpi': f"{row['DPI']:,.0f}",
-                        'weight': f"{row['Weight']:.0f}g",
-                        'buttons': int(row['Buttons']),
-                        'size': row['Size'],
-                        'shape': row['Shape'],
-                        'battery_life': row['Battery Life'],
-                        'polling_rate': f"{row['Polling Rate']:.0f}",
-                        'button_type': row['Buttons Type']
-                    },
-                    'category': row['Category'],
-                    'link': row['Link'] if 'Link' in row and pd.notna(row['Link']) else None
-                }
-                result.append(mouse_info)
+    def _rank_candidates(self, user_vector, candidates, top_n):
+        """Skor kandidat hasil filter dan format top_n teratas"""
+        try:
+            # Skor hanya dihitung untuk row yang lolos filter
+            if candidates is None:
+                candidates = self.catalog_index.all_ids()
+            if len(candidates) == 0:
+                logging.debug("Found 0 recommendations")
+                return []
+            with stage('score'):
+                top_ids, top_scores = self.search_index.top_k(user_vector, candidates, top_n)
 
-            logging.info(f"Returning {len(result)} recommendations")
+            with stage('format'):
+                result = self.format_recommendations(top_ids, top_scores)
+
+            logging.debug("Returning %d recommendations", len(result))
             return result
 
         except Exception as e:
             logging.error(f"Error getting recommendations: {str(e)}")
             return []
 
+    def rank_recommendations(self, user_preferences, limit, relax=False, min_results=1):
+        """
+        Urutan (row id, skor) sampai `limit` hasil teratas, tanpa format, untuk
+        disimpan dan dipotong per halaman. `relax` memakai pelonggaran filter
+        seperti get_recommendations_relaxed. Mengembalikan (ids, skor, filter
+        yang dilonggarkan, jumlah kandidat sebelum dipotong ke `limit`).
+        """
+        empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        try:
+            logging.debug("Ranking recommendations for: %s", user_preferences)
+
+            with stage('profile'):
+                user_vector = self.create_user_profile(user_preferences)
+            with stage('filter'):
+                if relax:
+                    candidates, relaxed = self.relaxed_candidates(user_preferences, min_results)
+                else:
+                    candidates, relaxed = self.filter_candidates(user_preferences), []
+            if candidates is None:
+                candidates = self.catalog_index.all_ids()
+            if len(candidates) == 0:
+                return (*empty, relaxed, 0)
+            with stage('score'):
+                top_ids, top_scores = self.search_index.top_k(user_vector, candidates, limit)
+            return top_ids, top_scores, relaxed, len(candidates)
+
+        except Exception as e:
+            # Sama seperti get_recommendations: preferensi tidak valid = hasil kosong
+            logging.error(f"Error ranking recommendations: {str(e)}")
+            return (*empty, [], 0)
+
+    def format_recommendations(self, top_ids, top_scores, start=1):
+        """Format row id dan skor pemenang menjadi hasil rekomendasi (rank mulai dari `start`)"""
+        logging.debug("Found %d recommendations", len(top_ids))
+
+        # Record tampilan sudah dirender saat load, tinggal tambah rank, skor dan URL gambar
+        results = []
+        for rank, (row_id, score) in enumerate(zip(top_ids, top_scores), start=start):
+            record = self.display_records[row_id]
+            results.append(record.to_dict(rank, score, int(row_id), self.get_image_url(record.image)))
+        return results
+
+    def get_recommendations_batch(self, preferences_list, top_n=5):
+        """
+        Mendapatkan rekomendasi untuk banyak preferensi sekaligus.
+
+        Semua user vector digabung menjadi satu matrix dan diskor dengan satu
+        perkalian matrix-matrix per blok. Preferensi yang tidak valid
+        menghasilkan list kosong pada posisinya.
+        """
+        return self._recommend_batch(preferences_list, top_n, [None] * len(preferences_list))[0]
+
+    def get_recommendations_batch_relaxed(self, preferences_list, top_n=5, min_results=1, relax=None):
+        """
+        Seperti get_recommendations_batch, dengan pelonggaran filter seperti
+        get_recommendations_relaxed. `relax` (list bool per profil, default
+        semua True) memilih profil yang boleh dilonggarkan. Mengembalikan
+        (list hasil, list filter yang dilonggarkan per profil).
+        """
+        if relax is None:
+            relax = [True] * len(preferences_list)
+        return self._recommend_batch(preferences_list, top_n,
+                                     [min_results if enabled else None for enabled in relax])
+
+    def _recommend_batch(self, preferences_list, top_n, min_results):
+        """Jalur batch bersama; `min_results` per profil, None = filter ketat"""
+        results = [[] for _ in preferences_list]
+        relaxed_filters = [[] for _ in preferences_list]
+        logging.debug("Getting batch recommendations for %d profiles", len(preferences_list))
+
+        # Bangun user vector dan kandidat untuk setiap profil
+        positions, vectors, candidate_sets = [], [], []
+        for position, user_preferences in enumerate(preferences_list):
+            try:
+                with stage('profile'):
+                    user_vector = self.create_user_profile(user_preferences)
+                with stage('filter'):
+                    if min_results[position] is None:
+                        candidates = self.filter_candidates(user_preferences)
+                    else:
+                        candidates, relaxed_filters[position] = self.relaxed_candidates(
+                            user_preferences, min_results[position])
+            except Exception as e:
+                logging.error(f"Error preparing batch profile {position}: {str(e)}")
+                continue
+            if candidates is not None and len(candidates) == 0:
+                continue
+            positions.append(position)
+            vectors.append(user_vector[0])
+            candidate_sets.append(candidates)
+
+        all_ids = self.catalog_index.all_ids()
+        if self.search_index.backend != 'exact':
+            # Dengan index ANN setiap profil hanya menskor list yang diperiksa,
+            # lebih murah daripada skor penuh seluruh katalog per blok
+            for position, user_vector, candidates in zip(positions, vectors, candidate_sets):
+                try:
+                    top_ids, top_scores = self.search_index.top_k(
+                        user_vector, all_ids if candidates is None else candidates, top_n)
+                    results[position] = self.format_recommendations(top_ids, top_scores)
+                except Exception as e:
+                    logging.error(f"Error getting batch recommendations {position}: {str(e)}")
+            return results, relaxed_filters
+
+        for start in range(0, len(vectors), self.batch_block_size):
+            block = slice(start, start + self.batch_block_size)
+            with stage('score_batch'):
+                scores = self.scorer.score_batch(np.vstack(vectors[block]))
+            for column, (position, candidates) in enumerate(zip(positions[block], candidate_sets[block])):
+                try:
+                    if candidates is None:
+                        candidates = all_ids
+                    top_ids, top_scores = select_top_k(candidates, scores[candidates, column], top_n)
+                    results[position] = self.format_recommendations(top_ids, top_scores)
+                except Exception as e:
+                    logging.error(f"Error getting batch recommendations {position}: {str(e)}")
+
+        return results, relaxed_filters
+
+    # Urutan pelonggaran filter saat hasil kosong, dari yang paling tidak penting:
+    # (preferensi, level). Level 0 adalah filter asli, level terakhir melepas filter.
+    RELAXATION_LADDER = [
+        ('buttons', 1), ('dpi_min', 1), ('shape', 1), ('size', 1), ('buttons', 2),
+        ('dpi_min', 2), ('weight_pref', 1), ('price_max', 1), ('connection', 1),
+        ('dpi_min', 3), ('price_max', 2), ('brand', 1), ('price_max', 3), ('category', 1)
+    ]
+
+    @staticmethod
+    def _number_preference(user_preferences, pref_key, cast=float):
+        """Nilai numerik preferensi, None jika kosong atau tidak valid"""
+        if pref_key in user_preferences and user_preferences[pref_key]:
+            try:
+                return cast(user_preferences[pref_key])
+            except (ValueError, TypeError):
+                logging.warning(f"Invalid {pref_key} filter: {user_preferences[pref_key]}")
+        return None
+
+    def _filter_steps(self, user_preferences):
+        """
+        Filter preferensi dalam urutan penerapan, sebagai list (preferensi, level).
+
+        Setiap level berisi (keterangan pelonggaran, fungsi kandidat -> kandidat);
+        level 0 adalah filter asli dan level terakhir (fungsi None) melepas filter.
+        """
+        index = self.catalog_index
+        dropped = ({'action': 'dropped'}, None)
+        steps = []
+
+        def range_level(col, low=None, high=None, relaxed=None, label=None):
+            def apply(candidates):
+                if relaxed is None:
+                    logging.debug("Applied %s filter", label)
+                return index.filter_range(candidates, col, low=low, high=high)
+            return relaxed, apply
+
+        # Apply filters
+        max_price = self._number_preference(user_preferences, 'price_max')
+        if max_price is not None:
+            steps.append(('price_max', [
+                range_level('Price', high=max_price, label=f"price: <= {max_price}"),
+                range_level('Price', high=max_price * 1.25, relaxed={'action': 'widened', 'value': max_price * 1.25}),
+                range_level('Price', high=max_price * 1.5, relaxed={'action': 'widened', 'value': max_price * 1.5}),
+                dropped
+            ]))
+
+        # Apply other filters
+        filter_mappings = {
+            'category': 'Category',
+            'brand': 'Brand',
+            'connection': 'Connection',
+            'size': 'Size',
+            'shape': 'Shape'
+        }
+
+        for pref_key, col_name in filter_mappings.items():
+            if pref_key in user_preferences and user_preferences[pref_key]:
+                filter_value = user_preferences[pref_key].strip()
+                if filter_value and col_name in index.categorical:
+                    def apply(candidates, col_name=col_name, filter_value=filter_value):
+                        logging.debug("Applied %s filter: %s", col_name, filter_value)
+                        return intersect(candidates, index.lookup(col_name, filter_value))
+                    steps.append((pref_key, [(None, apply), dropped]))
+
+        # Weight preference filter (batas dihitung dari row yang tersisa)
+        if 'weight_pref' in user_preferences and user_preferences['weight_pref']:
+            weight_pref = user_preferences['weight_pref'].lower()
+            steps.append(('weight_pref', [(None, lambda candidates: self._filter_weight(candidates, weight_pref)),
+                                          dropped]))
+
+        # DPI filter
+        min_dpi = self._number_preference(user_preferences, 'dpi_min')
+        if min_dpi is not None:
+            steps.append(('dpi_min', [
+                range_level('DPI', low=min_dpi, label=f"DPI: >= {min_dpi}"),
+                range_level('DPI', low=min_dpi * 0.75, relaxed={'action': 'widened', 'value': min_dpi * 0.75}),
+                range_level('DPI', low=min_dpi * 0.5, relaxed={'action': 'widened', 'value': min_dpi * 0.5}),
+                dropped
+            ]))
+
+        # Buttons filter
+        buttons_count = self._number_preference(user_preferences, 'buttons', int)
+        if buttons_count is not None:
+            steps.append(('buttons', [
+                range_level('Buttons', low=buttons_count, high=buttons_count, label=f"buttons: = {buttons_count}"),
+                range_level('Buttons', low=buttons_count - 1, high=buttons_count + 1,
+                            relaxed={'action': 'widened', 'value': [buttons_count - 1, buttons_count + 1]}),
+                dropped
+            ]))
+
+        return steps
+
+    def _filter_weight(self, candidates, weight_pref):
+        """Filter berat relatif terhadap min/max berat kandidat yang tersisa"""
+        index = self.catalog_index
+        if candidates is None:
+            weights = index.sorted_values['Weight']
+        else:
+            weights = index.values['Weight'][candidates]
+            weights = weights[~np.isnan(weights)]
+
+        if len(weights) == 0:
+            candidates = np.empty(0, dtype=np.int64)
+        else:
+            weight_min = weights.min()
+            weight_max = weights.max()
+            weight_range = weight_max - weight_min
+
+            if weight_pref == 'light':
+                weight_threshold = weight_min + (weight_range * 0.4)
+                candidates = index.filter_range(candidates, 'Weight', high=weight_threshold)
+            elif weight_pref == 'medium':
+                weight_lower = weight_min + (weight_range * 0.3)
+                weight_upper = weight_min + (weight_range * 0.7)
+                candidates = index.filter_range(candidates, 'Weight', low=weight_lower, high=weight_upper)
+            else:  # heavy
+                weight_threshold = weight_min + (weight_range * 0.6)
+                candidates = index.filter_range(candidates, 'Weight', low=weight_threshold)
+
+        logging.debug("Applied weight filter: %s", weight_pref)
+        return candidates
+
+    def filter_candidates(self, user_preferences):
+        """Menerapkan filter preferensi lewat catalog index, mengembalikan row id (None = semua)"""
+        candidates = None
+        for _, levels in self._filter_steps(user_preferences):
+            candidates = levels[0][1](candidates)
+        return candidates
+
+    def relaxed_candidates(self, user_preferences, min_results=1):
+        """
+        Kandidat filter yang dilonggarkan bertahap (RELAXATION_LADDER) selama
+        jumlahnya kurang dari `min_results`.
+
+        Hasil setiap prefix filter disimpan per kombinasi level, jadi melonggarkan
+        satu filter hanya menghitung ulang filter yang diterapkan sesudahnya.
+        Mengembalikan (kandidat, list filter yang dilonggarkan).
+        """
+        steps = self._filter_steps(user_preferences)
+        positions = {pref_key: i for i, (pref_key, _) in enumerate(steps)}
+        levels = [0] * len(steps)
+        prefixes = {}
+
+        def evaluate():
+            candidates = None
+            for i, (_, options) in enumerate(steps):
+                key = tuple(levels[:i + 1])
+                if key not in prefixes:
+                    apply = options[levels[i]][1]
+                    prefixes[key] = candidates if apply is None else apply(candidates)
+                candidates = prefixes[key]
+            return candidates
+
+        def count(candidates):
+            return len(self.catalog_index.all_ids()) if candidates is None else len(candidates)
+
+        candidates = evaluate()
+        for pref_key, level in self.RELAXATION_LADDER:
+            if count(candidates) >= min_results:
+                break
+            i = positions.get(pref_key)
+            if i is None or level <= levels[i] or level >= len(steps[i][1]):
+                continue
+            levels[i] = level
+            candidates = evaluate()
+
+        relaxed = [{'filter': pref_key, **options[level][0]}
+                   for (pref_key, options), level in zip(steps, levels) if level]
+        if relaxed:
+            logging.debug("Relaxed filters: %s (%d candidates)", relaxed, count(candidates))
+        return candidates, relaxed
+
+    def _ensure_mutable(self):
+        """Katalog dari artifact bersifat read-only"""
+        if self.df is None:
+            raise RuntimeError("Catalog loaded from an artifact is read-only; rebuild it from CSV to update items")
+
+    @staticmethod
+    def _item_key(brand, name):
+        """Key item katalog berdasarkan (Brand, Name)"""
+        return str(brand).strip(), str(name).strip()
+
+    def _set_rows(self, frame, row_ids, rows):
+        """Tulis nilai row ke frame, kolom di-upcast ke object jika tipe tidak cocok"""
+        for col in rows.columns:
+            if col not in frame.columns:
+                continue
+            try:
+                frame.loc[row_ids, col] = rows[col].to_numpy()
+            except (TypeError, ValueError):
+                frame[col] = frame[col].astype(object)
+                frame.loc[row_ids, col] = rows[col].to_numpy()
+
+    @staticmethod
+    def _set_cell(frame, row_id, col, value):
+        """Tulis satu sel, kolom di-upcast ke object jika tipe tidak cocok"""
+        try:
+            frame.at[row_id, col] = value
+        except (TypeError, ValueError):
+            frame[col] = frame[col].astype(object)
+            frame.at[row_id, col] = value
+
+    def _is_numeric_patch(self, row_id, item):
+        """
+        Cek apakah update hanya mengubah kolom numerik tanpa menggeser min/max:
+        nilai baru di dalam rentang dan row ini bukan pemegang min/max kolom itu
+        """
+        for col, value in item.items():
+            if col in ('Brand', 'Name'):
+                continue
+            if col not in self.numerical_cols:
+                return False
+            try:
+                value = float(value)
+            except (ValueError, TypeError):
+                return False
+            col_min, col_max = self.numeric_ranges[col]
+            if not col_min <= value <= col_max:
+                return False
+            current = self.original_numerical.at[row_id, col]
+            if value != current and current in (col_min, col_max):
+                return False
+        return True
+
+    def _holds_numeric_bounds(self, row_ids):
+        """Cek apakah salah satu row memegang nilai min/max sebuah kolom numerik"""
+        originals = self.original_numerical.loc[row_ids]
+        return any(originals[col].isin(self.numeric_ranges[col]).any() for col in self.numerical_cols)
+
+    def _fit_numeric_ranges(self):
+        """
+        Hitung ulang min/max dari row aktif (setelah row pemegang batas diubah
+        atau dihapus). Mengembalikan True jika batas berubah dan scaler di-refit.
+        """
+        active = self.original_numerical.loc[self.catalog_index.all_ids(), self.numerical_cols]
+        ranges = {col: (active[col].min(), active[col].max()) for col in self.numerical_cols}
+        if all(ranges[col] == tuple(self.numeric_ranges[col]) for col in self.numerical_cols):
+            return False
+        self.numeric_ranges.update(ranges)
+        self._fit_scaler()
+        return True
+
+    def _fit_scaler(self):
+        """Refit scaler ke numeric_ranges (dua row: semua min dan semua max)"""
+        import pandas as pd
+
+        bounds = pd.DataFrame([{col: self.numeric_ranges[col][i] for col in self.numerical_cols}
+                               for i in (0, 1)])
+        self.scaler.fit(bounds)
+
+    def _patch_numeric(self, row_id, item):
+        """Update nilai numerik satu row langsung di feature matrix dan index"""
+        for col, value in item.items():
+            if col in ('Brand', 'Name'):
+                continue
+            i = self.numerical_cols.index(col)
+            original = float(value)
+            scaled = original * self.scaler.scale_[i] + self.scaler.min_[i]
+            self._set_cell(self.df, row_id, col, value)
+            self._set_cell(self.original_numerical, row_id, col, original)
+            self.processed_df.at[row_id, col] = scaled
+            self.feature_matrix[row_id, self.feature_positions[col]] = scaled
+            if col in self.catalog_index.values:
+                self.catalog_index.update_value(row_id, col, original)
+        self.scorer.set_rows([row_id], self.feature_matrix[[row_id]])
+        self.search_index.update_rows([row_id])
+        self.display_records[row_id] = build_display_record(self.df.loc[row_id])
+
+    def _prepare_rows(self, raw_rows):
+        """
+        Bersihkan, encode dan skala row baru memakai encoder dan scaler yang ada.
+
+        Mengembalikan (processed, original_numerical, rescale).
+        """
+        processed = self._clean_frame(raw_rows)
+
+        # Perluas encoder dengan kategori baru tanpa refit
+        for col, codes in self.category_codes.items():
+            for value in processed[col].unique():
+                if value not in codes:
+                    codes[value] = len(codes)
+            processed[col + '_encoded'] = processed[col].map(codes)
+
+        originals = processed[self.NUMERICAL_COLUMNS].copy()
+
+        # Scaler hanya di-refit jika nilai baru keluar dari min/max saat ini
+        rescale = False
+        for col in self.numerical_cols:
+            col_min, col_max = self.numeric_ranges[col]
+            new_min = min(col_min, originals[col].min())
+            new_max = max(col_max, originals[col].max())
+            if (new_min, new_max) != (col_min, col_max):
+                self.numeric_ranges[col] = (new_min, new_max)
+                rescale = True
+
+        if rescale:
+            self._fit_scaler()
+        processed[self.numerical_cols] = self.scaler.transform(processed[self.numerical_cols])
+
+        # Perbaiki referensi gambar untuk row baru
+        if os.path.exists(self.image_folder):
+            missing, fixed = self._resolve_missing_images(processed)
+            if missing.any():
+                processed.loc[missing, 'Image'] = fixed
+                raw_rows.loc[missing, 'Image'] = fixed
+
+        return processed, originals, rescale
+
+    def _rescale_all(self):
+        """Skala ulang semua row setelah min/max berubah"""
+        scaled = self.scaler.transform(self.original_numerical[self.numerical_cols])
+        self.processed_df[self.numerical_cols] = scaled
+        positions = [self.feature_positions[col] for col in self.numerical_cols]
+        self.feature_matrix[:, positions] = scaled
+        self.scorer = TopKScorer(self.feature_matrix, self.feature_space)
+        self.search_index = build_search_index(self.scorer, **self.search_config)
+        self._build_neighbour_table()
+        logging.info("Numerical features rescaled after min/max change")
+
+    def _finish_update(self, rescale, row_ids):
+        """Sinkronkan statistik profil, tabel tetangga dan versi katalog setelah update"""
+        if rescale:
+            self._rescale_all()
+        else:
+            self._refresh_neighbours(row_ids)
+        # Median default dari row aktif, sama seperti katalog yang dibangun ulang penuh
+        self._refresh_profile_statistics(self.catalog_index.all_ids())
+        self.catalog_version += 1
+
+    def set_feature_weights(self, weights):
+        """
+        Ganti bobot blok fitur dan bangun ulang scorer dari feature_matrix.
+
+        Dipakai untuk tuning offline; versi katalog naik karena skor berubah.
+        """
+        with self._update_lock:
+            self.feature_space = self.feature_space.with_weights(weights)
+            self.feature_weights = self.feature_space.weights
+            self.scorer = TopKScorer(self.feature_matrix, self.feature_space)
+            self.search_index = build_search_index(self.scorer, **self.search_config)
+            self._build_neighbour_table()
+            self.catalog_version += 1
+
+    def _build_neighbour_table(self):
+        """
+        Hitung tabel tetangga untuk semua row aktif (dilewati jika k = 0).
+
+        Tanpa konfigurasi k, tabel yang sudah ada (misalnya dari artifact)
+        dihitung ulang dengan K yang sama agar tetap cocok dengan skor baru.
+        """
+        k = self.similar_config.get('k')
+        if k is None and self.neighbour_table is not None:
+            k = self.neighbour_table.k
+        if not k:
+            self.neighbour_table = None
+            return
+        self.neighbour_table = NeighbourTable.build(self.scorer, self.feature_matrix, self.catalog_index.all_ids(),
+                                                    k, workers=self.similar_config.get('workers', 1))
+
+    def _refresh_neighbours(self, row_ids):
+        """Perbarui baris tabel tetangga yang terpengaruh oleh row yang berubah"""
+        if self.neighbour_table is not None:
+            recomputed = self.neighbour_table.refresh(self.scorer, self.feature_matrix,
+                                                      self.catalog_index.all_ids(), row_ids)
+            logging.info(f"Neighbour table refreshed ({recomputed} rows recomputed)")
+
+    def get_similar_items(self, row_id, top_n=5):
+        """Mouse yang paling mirip dengan satu mouse dari tabel tetangga; None jika row id tidak aktif"""
+        index = self.catalog_index
+        if self.neighbour_table is None or not 0 <= row_id < len(index.active) or not index.active[row_id]:
+            return None
+        top_ids, top_scores = self.neighbour_table.lookup(row_id, top_n)
+        return self.format_recommendations(top_ids, top_scores)
+
+    def copy_for_update(self):
+        """
+        Salinan snapshot untuk update copy-on-write (lihat CatalogManager.add_items).
+
+        Struktur yang diubah oleh add/update/remove_items disalin; record
+        tampilan, encoder dan index gambar dipakai bersama. Snapshot asli
+        tidak berubah, jadi request yang masih memakainya tetap konsisten.
+        """
+        self._ensure_mutable()
+        snapshot = copy.copy(self)
+        snapshot.df = self.df.copy()
+        snapshot.processed_df = self.processed_df.copy()
+        snapshot.original_numerical = self.original_numerical.copy()
+        snapshot.feature_matrix = self.feature_matrix.copy()
+        snapshot.scaler = copy.deepcopy(self.scaler)
+        snapshot.numeric_fill_values = dict(self.numeric_fill_values)
+        snapshot.category_codes = {col: dict(codes) for col, codes in self.category_codes.items()}
+        snapshot.numeric_ranges = dict(self.numeric_ranges)
+        snapshot.feature_space = self.feature_space.copy()
+        snapshot.scorer = self.scorer.copy(snapshot.feature_space)
+        snapshot.search_index = self.search_index.copy(snapshot.scorer)
+        snapshot.catalog_index = self.catalog_index.copy()
+        if self.neighbour_table is not None:
+            snapshot.neighbour_table = self.neighbour_table.copy()
+        snapshot.display_records = list(self.display_records)
+        snapshot.item_ids = dict(self.item_ids)
+        snapshot.default_user_vector = self.default_user_vector.copy()
+        snapshot._cached_user_vector = lru_cache(maxsize=self.profile_cache_size)(snapshot._build_user_vector)
+        snapshot._update_lock = threading.Lock()
+        snapshot._options_cache = None
+        return snapshot
+
+    def add_items(self, items):
+        """
+        Menambahkan mouse baru ke katalog tanpa memproses ulang seluruh data.
+
+        Mengubah snapshot ini di tempat; untuk snapshot yang sedang disajikan
+        pakai CatalogManager.add_items (copy-on-write lalu swap).
+
+        `items` adalah list dict dengan kolom yang sama seperti CSV.
+        Mengembalikan row id untuk item baru.
+        """
+        import pandas as pd
+
+        self._ensure_mutable()
+        with self._update_lock:
+            raw_rows = pd.DataFrame(list(items), columns=self.df.columns)
+            keys = [self._item_key(b, n) for b, n in zip(raw_rows['Brand'], raw_rows['Name'])]
+            duplicates = [key for key in keys if key in self.item_ids]
+            if duplicates or len(set(keys)) != len(keys):
+                raise ValueError(f"Items already exist: {duplicates or keys}")
+
+            processed, originals, rescale = self._prepare_rows(raw_rows)
+            start = len(self.df)
+            row_index = pd.RangeIndex(start, start + len(raw_rows))
+            raw_rows.index = processed.index = originals.index = row_index
+
+            self.df = pd.concat([self.df, raw_rows])
+            self.processed_df = pd.concat([self.processed_df, processed])
+            self.original_numerical = pd.concat([self.original_numerical, originals])
+            features = processed[self.feature_cols].to_numpy(dtype=np.float64)
+            self.feature_matrix = np.vstack([self.feature_matrix, features])
+            self.scorer.append(features)
+            self.search_index.add_rows(row_index.to_numpy())
+            self.display_records.extend(build_display_records(raw_rows))
+
+            # Index dipublikasikan terakhir agar row baru hanya terlihat setelah lengkap
+            row_ids = self.catalog_index.add_rows(raw_rows)
+            self.item_ids.update(zip(keys, row_ids.tolist()))
+            self._finish_update(rescale, row_ids)
+            logging.info(f"Added {len(row_ids)} items to catalog")
+            return row_ids
+
+    def update_items(self, items):
+        """
+        Mengubah sebagian kolom mouse yang sudah ada, dicari lewat (Brand, Name).
+
+        Hanya row yang berubah yang di-encode ulang di feature matrix dan index.
+        Seperti add_items, snapshot yang sedang disajikan diubah lewat
+        CatalogManager.update_items.
+        """
+        self._ensure_mutable()
+        with self._update_lock:
+            items = list(items)
+            keys = [self._item_key(item['Brand'], item['Name']) for item in items]
+            unknown = [key for key in keys if key not in self.item_ids]
+            if unknown:
+                raise KeyError(f"Unknown items: {unknown}")
+            row_ids = np.array([self.item_ids[key] for key in keys])
+
+            # Jalur cepat: hanya nilai numerik yang berubah dan min/max tidak bergeser
+            if all(self._is_numeric_patch(row_id, item) for row_id, item in zip(row_ids, items)):
+                for row_id, item in zip(row_ids, items):
+                    self._patch_numeric(row_id, item)
+                self._finish_update(False, row_ids)
+                return row_ids
+
+            raw_rows = self.df.loc[row_ids].copy()
+            for row_id, item in zip(row_ids, items):
+                for col, value in item.items():
+                    if col in raw_rows.columns and col not in ('Brand', 'Name'):
+                        raw_rows[col] = raw_rows[col].astype(object)
+                        raw_rows.at[row_id, col] = value
+
+            holds_bounds = self._holds_numeric_bounds(row_ids)
+            processed, originals, rescale = self._prepare_rows(raw_rows)
+            self._set_rows(self.df, row_ids, raw_rows)
+            self._set_rows(self.processed_df, row_ids, processed)
+            self._set_rows(self.original_numerical, row_ids, originals)
+            # Row pemegang min/max bergeser ke dalam: batas bisa menyempit
+            if holds_bounds:
+                rescale = self._fit_numeric_ranges() or rescale
+            features = processed[self.feature_cols].to_numpy(dtype=np.float64)
+            self.feature_matrix[row_ids] = features
+            self.scorer.set_rows(row_ids, features)
+            self.search_index.update_rows(row_ids)
+            for row_id, record in zip(row_ids, build_display_records(raw_rows)):
+                self.display_records[row_id] = record
+
+            self.catalog_index.update_rows(row_ids, raw_rows)
+            self._finish_update(rescale, row_ids)
+            logging.info(f"Updated {len(row_ids)} catalog items")
+            return row_ids
+
+    def remove_items(self, keys):
+        """
+        Menghapus mouse dari katalog berdasarkan list (Brand, Name).
+
+        Row hanya dikeluarkan dari index; row id tidak dipakai ulang sampai
+        katalog dimuat ulang penuh. Snapshot yang sedang disajikan diubah
+        lewat CatalogManager.remove_items.
+        """
+        self._ensure_mutable()
+        with self._update_lock:
+            keys = [self._item_key(brand, name) for brand, name in keys]
+            unknown = [key for key in keys if key not in self.item_ids]
+            if unknown:
+                raise KeyError(f"Unknown items: {unknown}")
+            row_ids = np.array([self.item_ids.pop(key) for key in keys])
+            holds_bounds = self._holds_numeric_bounds(row_ids)
+            self.catalog_index.remove_rows(row_ids)
+            # Menghapus row pemegang min/max menyempitkan rentang: skala ulang semua row
+            self._finish_update(holds_bounds and self._fit_numeric_ranges(), row_ids)
+            logging.info(f"Removed {len(row_ids)} items from catalog")
+            return row_ids
+
+    def active_df(self):
+        """Dataframe mouse yang masih aktif di katalog"""
+        index = self.catalog_index
+        if index is None or len(index.all_ids()) == len(self.df):
+            return self.df
+        return self.df.iloc[index.all_ids()]
+
     def get_available_options(self):
-        """Mendapatkan opsi yang tersedia"""
+        """Mendapatkan opsi yang tersedia (di-cache sampai versi katalog berubah)"""
+        if self.df is None and self.artifact_header is not None:
+            return dict(self.artifact_header['options'])
+        cached = self._options_cache
+        if cached is not None and cached[0] == self.catalog_version:
+            return cached[1]
         try:
+            df = self.active_df()
+
             def clean_options(series):
                 cleaned = series.dropna().astype(str).str.strip()
                 cleaned = cleaned[cleaned != '']
@@ -385,42 +1123,125 @@ class MouseRecommendationSystem:
                 return sorted(list(set(cleaned.tolist())))
 
             options = {
-                'brands': clean_options(self.df['Brand']),
-                'connections': clean_options(self.df['Connection']),
-                'sizes': clean_options(self.df['Size']),
-                'shapes': clean_options(self.df['Shape']),
-                'categories': clean_options(self.df['Category']),
+                'brands': clean_options(df['Brand']),
+                'connections': clean_options(df['Connection']),
+                'sizes': clean_options(df['Size']),
+                'shapes': clean_options(df['Shape']),
+                'categories': clean_options(df['Category']),
                 'price_range': {
-                    'min': int(self.df['Price'].min()),
-                    'max': int(self.df['Price'].max())
+                    'min': int(df['Price'].min()),
+                    'max': int(df['Price'].max())
                 },
                 'dpi_range': {
-                    'min': int(self.df['DPI'].min()),
-                    'max': int(self.df['DPI'].max())
+                    'min': int(df['DPI'].min()),
+                    'max': int(df['DPI'].max())
                 },
                 'weight_range': {
-                    'min': int(self.df['Weight'].min()),
-                    'max': int(self.df['Weight'].max())
+                    'min': int(df['Weight'].min()),
+                    'max': int(df['Weight'].max())
                 },
                 'buttons_range': {
-                    'min': int(self.df['Buttons'].min()),
-                    'max': int(self.df['Buttons'].max())
+                    'min': int(df['Buttons'].min()),
+                    'max': int(df['Buttons'].max())
                 }
             }
             
-            logging.info(f"Available options: {options}")
+            logging.debug("Available options: %s", options)
+            self._options_cache = (self.catalog_version, options)
             return options
             
         except Exception as e:
             logging.error(f"Error getting options: {str(e)}")
             return {}
 
+    # Key daftar opsi (get_available_options) untuk setiap preferensi kategori
+    FACET_OPTIONS = {
+        'brand': 'brands',
+        'category': 'categories',
+        'connection': 'connections',
+        'size': 'sizes',
+        'shape': 'shapes'
+    }
+
+    def facet_counts(self, user_preferences):
+        """
+        Jumlah mouse per nilai setiap filter kategori untuk pilihan parsial.
+
+        Setiap facet dihitung dengan semua filter lain kecuali filternya sendiri,
+        jadi nilai lain di dropdown yang sama tetap punya jumlah. Filter himpunan
+        (harga, kategori) dihitung sekali per prefix; filter berat yang batasnya
+        relatif terhadap kandidat, dan filter sesudahnya, dijalankan per nilai
+        facet agar jumlahnya sama persis dengan hasil filter_candidates.
+        Mengembalikan ({preferensi: {nilai opsi: jumlah}}, jumlah mouse yang
+        cocok dengan seluruh pilihan).
+        """
+        index = self.catalog_index
+        steps = self._filter_steps(user_preferences)
+        split = next((i for i, (pref_key, _) in enumerate(steps) if pref_key == 'weight_pref'), len(steps))
+        independent, dependent = steps[:split], steps[split:]
+
+        def apply(candidates, selected_steps):
+            for _, levels in selected_steps:
+                candidates = levels[0][1](candidates)
+            return candidates
+
+        def count(candidates):
+            return len(index.all_ids()) if candidates is None else len(candidates)
+
+        prefixes = [None]
+        for _, levels in independent:
+            prefixes.append(levels[0][1](prefixes[-1]))
+        positions = {pref_key: i for i, (pref_key, _) in enumerate(independent)}
+        options = self.get_available_options()
+
+        facets = {}
+        for pref_key, col in self.CATEGORICAL_PREFERENCES.items():
+            if col not in index.categorical:
+                continue
+            position = positions.get(pref_key)
+            if position is None:
+                candidates = prefixes[-1]
+            else:
+                candidates = apply(prefixes[position], independent[position + 1:])
+            if dependent:
+                counts = {key: count(apply(ids, dependent))
+                          for key, ids in index.facet_groups(col, candidates).items()}
+            else:
+                counts = index.facet_counts(col, candidates)
+            facets[pref_key] = {value: counts.get(index.normalize(value), 0)
+                                for value in options.get(self.FACET_OPTIONS[pref_key], [])}
+
+        return facets, count(apply(prefixes[-1], dependent))
+
     def get_system_info(self):
         """Mendapatkan informasi sistem"""
+        if self.df is None and self.artifact_header is not None:
+            header = self.artifact_header
+            return {
+                'model_name': self.model_name,
+                'total_data': header['rows'],
+                'feature_columns': self.feature_columns,
+                'dataset_shape': {
+                    'rows': header['rows'],
+                    'columns': len(header['original_columns'])
+                },
+                'original_columns': header['original_columns'],
+                'image_folder': self.image_folder,
+                'image_support': True,
+                'catalog_version': self.catalog_version,
+                'feature_space': {'dim': self.feature_space.dim, 'weights': self.feature_space.weights},
+                'search_index': self.search_index.info(),
+                'similar_items': self.neighbour_table.k if self.neighbour_table is not None else 0,
+                'artifact': {
+                    'compiled_at': header['compiled_at'],
+                    'source': header['source'],
+                    'source_sha256': header['source_sha256']
+                }
+            }
         try:
             return {
                 'model_name': self.model_name,
-                'total_data': len(self.df) if self.df is not None else 0,
+                'total_data': len(self.active_df()) if self.df is not None else 0,
                 'feature_columns': self.feature_columns,
                 'dataset_shape': {
                     'rows': len(self.df) if self.df is not None else 0,
@@ -428,7 +1249,11 @@ class MouseRecommendationSystem:
                 },
                 'original_columns': list(self.df.columns) if self.df is not None else [],
                 'image_folder': self.image_folder,
-                'image_support': True
+                'image_support': True,
+                'catalog_version': self.catalog_version,
+                'feature_space': {'dim': self.feature_space.dim, 'weights': self.feature_space.weights},
+                'search_index': self.search_index.info(),
+                'similar_items': self.neighbour_table.k if self.neighbour_table is not None else 0
             }
         except Exception as e:
             logging.error(f"Error getting system info: {str(e)}")
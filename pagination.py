@@ -0,0 +1,73 @@
+# pagination.py - Cursor halaman rekomendasi dan cache urutan hasil per query
+import base64
+import binascii
+import json
+
+from response_cache import ResponseCache, canonical_key
+
+
+class CursorError(ValueError):
+    """Cursor rusak (status 400) atau sudah tidak berlaku untuk katalog ini (status 410)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_cursor(user_preferences, offset, catalog_version):
+    """
+    Cursor opaque berisi preferensi, offset dan versi katalog. Preferensi ikut
+    disimpan agar urutan bisa dihitung ulang jika sudah dibuang dari cache.
+    """
+    raw = json.dumps([user_preferences, offset, catalog_version], sort_keys=True,
+                     separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, catalog_version):
+    """Kebalikan encode_cursor: (preferensi, offset); CursorError jika tidak valid"""
+    if not isinstance(cursor, str):
+        raise CursorError("cursor must be a string")
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        user_preferences, offset, version = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise CursorError("Invalid cursor")
+    if not isinstance(user_preferences, dict) or not isinstance(offset, int) or offset < 0:
+        raise CursorError("Invalid cursor")
+    if version != catalog_version:
+        # Urutan di katalog baru bisa bergeser: halaman lanjutan bisa dobel/terlewat
+        raise CursorError("Cursor expired: the catalog has changed, request the first page again", 410)
+    return user_preferences, offset
+
+
+class RankingCache:
+    """
+    Urutan hasil (row id, skor) per query untuk paginasi.
+
+    Halaman pertama menghitung sampai `max_results` hasil teratas sekali;
+    halaman berikutnya hanya memotong array yang tersimpan (O(ukuran halaman),
+    tanpa scoring ulang). Entry dibatasi LRU + TTL dan dibuang saat versi
+    katalog berubah (lihat ResponseCache).
+    """
+
+    def __init__(self, maxsize=256, ttl=600, max_results=500):
+        self.max_results = max_results
+        self._cache = ResponseCache(maxsize=maxsize, ttl=ttl)
+
+    def ranking(self, recommender, user_preferences, relax=False, min_results=1):
+        """(ids, skor, filter yang dilonggarkan, jumlah kandidat) dari cache, dihitung jika belum ada"""
+        key = canonical_key(user_preferences, relax, min_results)
+        version = recommender.catalog_version
+        cached = self._cache.get(key, version)
+        if cached is not None:
+            return cached
+        ranking = recommender.rank_recommendations(
+            user_preferences, self.max_results, relax=relax, min_results=min_results)
+        self._cache.put(key, version, ranking)
+        return ranking
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats['max_results'] = self.max_results
+        return stats
@@ -0,0 +1,102 @@
+# request_log.py - Logging serving path: handler berbasis queue dan satu ringkasan per request
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Logger khusus ringkasan request (bisa dimatikan terpisah dari log aplikasi)
+request_logger = logging.getLogger('mouse.request')
+
+# Field tambahan untuk ringkasan request yang sedang berjalan (lihat annotate())
+_request_fields = contextvars.ContextVar('request_fields', default=None)
+
+_config = {}
+_listener = None
+_atexit_registered = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu objek JSON per baris; field ringkasan request ikut sebagai key"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(debug=False, log_format='text', stream=None):
+    """
+    Pasang root logger lewat QueueHandler: thread pemanggil hanya menaruh
+    record ke queue, sedangkan formatting dan tulis ke stream dikerjakan
+    thread QueueListener. `debug` menyalakan trace verbose (level DEBUG),
+    `log_format` 'json' menulis satu objek JSON per baris.
+    """
+    global _listener, _atexit_registered
+    _config.update(debug=debug, log_format=log_format, stream=stream)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    if not _atexit_registered:
+        atexit.register(_stop_listener)
+        _atexit_registered = True
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    return _listener
+
+
+def _stop_listener():
+    """Tulis sisa record di queue sebelum proses keluar"""
+    if _listener is not None:
+        _listener.stop()
+
+
+def after_fork():
+    """Thread listener tidak ikut ter-fork: pasang ulang queue dan listener di worker"""
+    if _config:
+        configure_logging(**_config)
+
+
+def begin_request():
+    """Mulai mengumpulkan field ringkasan untuk request di context ini"""
+    fields = {}
+    _request_fields.set(fields)
+    return fields
+
+
+def annotate(**fields):
+    """Tambahkan field (mis. jumlah hasil, cache hit) ke ringkasan request berjalan"""
+    current = _request_fields.get()
+    if current is not None:
+        current.update(fields)
+
+
+def log_request(method, route, status, seconds, stages=None):
+    """Satu record INFO per request: durasi total, durasi per tahap (ms) dan field annotate()"""
+    fields = _request_fields.get() or {}
+    _request_fields.set(None)
+    if not request_logger.isEnabledFor(logging.INFO):
+        return
+    stages_ms = {name: round(duration * 1000, 3) for name, duration in (stages or {}).items()}
+    summary = {'method': method, 'route': route, 'status': status,
+               'duration_ms': round(seconds * 1000, 3), 'stages_ms': stages_ms, **fields}
+    details = "".join(f" {key}={value}" for key, value in [*stages_ms.items(), *fields.items()])
+    request_logger.info("%s %s %s %.3fms%s", method, route, status, seconds * 1000, details,
+                        extra={'fields': summary})
@@ -0,0 +1,89 @@
+# response_cache.py - Cache response API dengan LRU dan TTL
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def canonical_key(*parts):
+    """Membuat cache key yang stabil dari payload JSON (urutan key diabaikan)"""
+    return json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+
+
+class ResponseCache:
+    """
+    Cache LRU + TTL untuk response yang sudah diserialisasi.
+
+    Setiap entry terikat ke versi katalog; ketika versi berubah (katalog
+    dimuat ulang) seluruh isi cache dibuang.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        """Buang semua entry jika versi katalog berubah"""
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        """Ambil value dari cache, None jika tidak ada atau sudah kedaluwarsa"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, version, value):
+        """Simpan value ke cache, entry paling lama dibuang jika penuh"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Kosongkan cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Statistik cache untuk /api/info"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'catalog_version': self._version
+            }
@@ -0,0 +1,171 @@
+# scoring.py - Scoring engine untuk cosine similarity
+import numpy as np
+
+
+class TopKScorer:
+    """
+    Scoring engine cosine similarity dengan seleksi top-k.
+
+    Row katalog disimpan di ruang FeatureSpace tanpa materialisasi one-hot:
+    setiap row punya tepat satu entry per blok kategori, jadi bagian kategori
+    disimpan sebagai CSR dengan jumlah entry tetap per row (`indices`, satu
+    array kolom per blok) dan bobot bloknya diterapkan ke query. Bagian
+    numerik disimpan dense. Semua row sudah dinormalisasi L2 (`inv_norm`
+    untuk bagian kategori).
+
+    Query dari preferensi user paling banyak punya satu entry per blok, jadi
+    blok tanpa preferensi dilewati dan blok dengan satu entry cukup dicek
+    dengan perbandingan kode. Biaya scoring tidak bergantung pada ukuran
+    vocabulary brand/kategori.
+    """
+
+    def __init__(self, feature_matrix, space):
+        self.space = space
+        self.indices, self.inv_norm, self.numeric = self._encode(feature_matrix)
+
+    @classmethod
+    def from_arrays(cls, space, indices, inv_norm, numeric):
+        """Buat scorer dari array yang sudah di-encode (mis. hasil mmap artifact)"""
+        scorer = cls.__new__(cls)
+        scorer.space = space
+        scorer.indices = indices
+        scorer.inv_norm = inv_norm
+        scorer.numeric = numeric
+        return scorer
+
+    def __len__(self):
+        return len(self.inv_norm)
+
+    def copy(self, space):
+        """Salinan dengan array sendiri (set_rows mengubah array di tempat) di atas `space`"""
+        return self.from_arrays(space, self.indices.copy(), self.inv_norm.copy(), self.numeric.copy())
+
+    def _encode(self, rows):
+        """Encode row feature_matrix menjadi (indices blok x row, inv_norm, numeric) ternormalisasi"""
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        space = self.space
+        codes = rows[:, space.categorical_positions].astype(np.int64)
+        old_offsets = space.grow(codes)
+        if old_offsets is not None and getattr(self, 'indices', None) is not None:
+            # Blok one-hot melebar: geser indeks kolom row lama ke offset baru
+            shift = (space.offsets - old_offsets).astype(np.int32)
+            self.indices = self.indices + shift[:, None]
+
+        numeric = rows[:, space.numeric_positions] * space.numeric_weights
+        norms = np.sqrt(np.sum(space.categorical_weights.astype(np.float64) ** 2) + np.sum(numeric ** 2, axis=1))
+        norms[norms == 0] = 1.0
+        inv_norm = (1.0 / norms).astype(np.float32)
+        indices = np.ascontiguousarray((codes + space.offsets).T, dtype=np.int32)
+        return indices, inv_norm, np.ascontiguousarray(numeric * inv_norm[:, None], dtype=np.float32)
+
+    def append(self, rows):
+        """Tambahkan row baru (sudah di-encode) di akhir"""
+        indices, inv_norm, numeric = self._encode(rows)
+        self.indices = np.ascontiguousarray(np.hstack([self.indices, indices]))
+        self.inv_norm = np.concatenate([self.inv_norm, inv_norm])
+        self.numeric = np.ascontiguousarray(np.vstack([self.numeric, numeric]))
+
+    def set_rows(self, ids, rows):
+        """Ganti row yang sudah ada dengan nilai fitur baru"""
+        indices, inv_norm, numeric = self._encode(rows)
+        self.indices[:, ids] = indices
+        self.inv_norm[ids] = inv_norm
+        self.numeric[ids] = numeric
+
+    def query_vectors(self, user_matrix):
+        """User vector di ruang scoring dense, ternormalisasi L2"""
+        queries = self.space.expand(user_matrix)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries /= norms
+        return queries
+
+    def dense_rows(self, ids):
+        """Row katalog di ruang scoring dense (ternormalisasi L2), mis. untuk clustering"""
+        space = self.space
+        ids = np.asarray(ids)
+        rows = np.zeros((len(ids), space.dim), dtype=np.float32)
+        inv_norm = self.inv_norm[ids]
+        for block, weight in enumerate(space.categorical_weights):
+            rows[np.arange(len(ids)), self.indices[block][ids]] = weight * inv_norm
+        rows[:, space.categorical_dim:] = self.numeric[ids]
+        return rows
+
+    def _queries(self, user_matrix):
+        """Query ternormalisasi: bagian kategori (sudah dikali bobot blok) dan bagian numerik"""
+        space = self.space
+        queries = self.query_vectors(user_matrix)
+        return queries[:, :space.categorical_dim] * space.categorical_dim_weights, queries[:, space.categorical_dim:]
+
+    def _active_rows(self, categorical, ids=None):
+        """
+        Matriks row (numerik | kolom one-hot aktif) dan kolom aktifnya.
+
+        Hanya kolom one-hot yang bernilai tidak nol di salah satu query yang
+        dimaterialisasi (satu kolom per preferensi kategori), sehingga scoring
+        cukup satu perkalian matriks sempit, berapa pun ukuran vocabulary.
+        """
+        columns = np.flatnonzero(np.any(categorical != 0, axis=0))
+        numeric = self.numeric if ids is None else self.numeric[ids]
+        if len(columns) == 0:
+            return numeric, columns
+        inv_norm = self.inv_norm if ids is None else self.inv_norm[ids]
+        blocks = np.searchsorted(self.space.offsets, columns, side='right') - 1
+        rows = np.empty((len(numeric), numeric.shape[1] + len(columns)), dtype=np.float32)
+        rows[:, :numeric.shape[1]] = numeric
+        for j, (block, column) in enumerate(zip(blocks, columns)):
+            block_ids = self.indices[block] if ids is None else self.indices[block][ids]
+            np.multiply(block_ids == column, inv_norm, out=rows[:, numeric.shape[1] + j])
+        return rows, columns
+
+    def score(self, user_vector, ids=None):
+        """Cosine similarity user vector terhadap row id terurut (None = semua row)"""
+        categorical, numeric = self._queries(user_vector)
+        categorical = categorical[0]
+        if ids is not None and len(ids) == len(self) and len(ids) and ids[0] == 0 and ids[-1] == len(ids) - 1:
+            # Row id terurut yang mencakup semua row: tidak perlu gather
+            ids = None
+        scores = (self.numeric if ids is None else self.numeric[ids]) @ numeric[0]
+        columns = np.flatnonzero(categorical)
+        if len(columns):
+            # Query punya satu kolom per blok kategori yang dipilih: cukup bandingkan kode
+            blocks = np.searchsorted(self.space.offsets, columns, side='right') - 1
+            matches = None
+            for block, column in zip(blocks, columns):
+                block_ids = self.indices[block] if ids is None else self.indices[block][ids]
+                match = np.where(block_ids == column, categorical[column], np.float32(0))
+                matches = match if matches is None else matches + match
+            scores += matches * (self.inv_norm if ids is None else self.inv_norm[ids])
+        return scores
+
+    def score_batch(self, user_matrix):
+        """Cosine similarity banyak user vector sekaligus, hasil (n_rows, n_users)"""
+        categorical, numeric = self._queries(user_matrix)
+        rows, columns = self._active_rows(categorical)
+        queries = np.hstack([numeric, categorical[:, columns]])
+        # Dihitung sebagai (n_users, n_rows) agar kolom skor per user contiguous
+        return (queries @ rows.T).T
+
+    def top_k(self, user_vector, ids=None, k=5):
+        """Mengembalikan (row id, skor) untuk k skor tertinggi, terurut menurun"""
+        if ids is None:
+            ids = np.arange(len(self))
+        scores = self.score(user_vector, ids)
+        return select_top_k(ids, scores, k)
+
+
+def select_top_k(ids, scores, k):
+    """Pilih k skor tertinggi dengan argpartition; seri diurutkan berdasarkan row id"""
+    ids = np.asarray(ids)
+    k = min(max(int(k), 0), len(scores))
+    if k == 0:
+        return ids[:0], scores[:0]
+    if k < len(scores):
+        kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        # Ambil semua yang seri dengan skor ke-k agar hasil deterministik
+        winners = np.flatnonzero(scores >= kth_score)
+    else:
+        winners = np.arange(len(scores))
+    order = np.lexsort((ids[winners], -scores[winners]))[:k]
+    winners = winners[order]
+    return ids[winners], scores[winners]
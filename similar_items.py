@@ -0,0 +1,164 @@
+# similar_items.py - Tabel tetangga terdekat antar mouse ("mirip dengan ini")
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_NEIGHBOURS = 10
+# Batas elemen matrix skor (n_rows x blok) per langkah perhitungan
+BLOCK_VALUES = 1 << 22
+MAX_BLOCK_ROWS = 256
+# Jumlah kolom sampel untuk memperkirakan batas skor top-K per baris
+SAMPLE_COLUMNS = 1024
+
+# Diisi di worker process (lewat fork) agar scorer tidak perlu di-pickle
+_worker_state = {}
+
+
+def _rank(row_ids, scores, k):
+    """k row terbaik per baris matrix skor, urut skor menurun lalu row id (seperti select_top_k)"""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((len(scores), 0), dtype=np.int64), np.empty((len(scores), 0), dtype=np.float32)
+    # Skor ke-k dari sebagian kolom adalah batas bawah skor ke-k sebenarnya,
+    # jadi cukup row di atas batas itu yang diurutkan (termasuk yang seri)
+    sample = scores[:, ::max(1, scores.shape[1] // SAMPLE_COLUMNS)]
+    bound = -np.partition(-sample, k - 1, axis=1)[:, k - 1:k]
+    rows, columns = np.nonzero(scores >= bound)
+    values = scores[rows, columns]
+    order = np.lexsort((columns, -values, rows))
+    rows, columns, values = rows[order], columns[order], values[order]
+    starts = np.searchsorted(rows, np.arange(len(scores)))
+    take = (starts[:, None] + np.arange(k)).ravel()
+    return row_ids[columns[take]].reshape(-1, k), values[take].reshape(-1, k)
+
+
+def _compute_block(scorer, features, active, block_ids, k):
+    """Tetangga untuk satu blok row: skor terhadap semua row aktif, tanpa row itu sendiri"""
+    scores = scorer.score_batch(features[block_ids]).T
+    if len(active) < scores.shape[1]:
+        scores = scores[:, active]
+    own = np.searchsorted(active, block_ids)
+    is_own = (own < len(active)) & (active[np.minimum(own, len(active) - 1)] == block_ids)
+    scores[np.flatnonzero(is_own), own[is_own]] = -np.inf
+    return _rank(active, scores, k)
+
+
+def _worker_block(block_ids):
+    state = _worker_state
+    return _compute_block(state['scorer'], state['features'], state['active'], block_ids, state['k'])
+
+
+class NeighbourTable:
+    """
+    Top-K tetangga setiap mouse berdasarkan cosine similarity di ruang scoring.
+
+    Dihitung sekali saat katalog dimuat, per blok row (perkalian matrix
+    score_batch), sehingga memori sementara dibatasi BLOCK_VALUES elemen.
+    Lookup hanya membaca satu baris tabel, tanpa scoring saat request.
+    Slot kosong (katalog lebih kecil dari K) berisi row id -1.
+    """
+
+    def __init__(self, neighbours, scores):
+        self.neighbours = np.asarray(neighbours)
+        self.scores = np.asarray(scores)
+
+    @property
+    def k(self):
+        return self.neighbours.shape[1]
+
+    def copy(self):
+        """Salinan untuk snapshot baru (refresh mengubah tabel di tempat)"""
+        return NeighbourTable(self.neighbours.copy(), self.scores.copy())
+
+    @classmethod
+    def build(cls, scorer, features, active, k=DEFAULT_NEIGHBOURS, workers=1):
+        """Hitung tabel untuk semua row aktif (`workers` > 1 memakai process pool)"""
+        n_rows = len(scorer)
+        active = np.asarray(active)
+        step = max(1, min(MAX_BLOCK_ROWS, BLOCK_VALUES // max(len(active), 1)))
+        blocks = [active[start:start + step] for start in range(0, len(active), step)]
+
+        table = cls(np.full((n_rows, k), -1, dtype=np.int32), np.zeros((n_rows, k), dtype=np.float32))
+        if workers > 1 and len(blocks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            _worker_state.update(scorer=scorer, features=features, active=active, k=k)
+            try:
+                with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                    results = list(pool.map(_worker_block, blocks))
+            finally:
+                _worker_state.clear()
+        else:
+            results = (_compute_block(scorer, features, active, block, k) for block in blocks)
+
+        for block, (neighbours, scores) in zip(blocks, results):
+            table._store(block, neighbours, scores)
+        logging.info(f"Neighbour table built: top {k} for {len(active)} mice")
+        return table
+
+    def _store(self, row_ids, neighbours, scores):
+        """Tulis hasil ranking ke baris tabel (sisa slot dan skor -inf diisi -1)"""
+        width = neighbours.shape[1]
+        neighbours = np.where(np.isfinite(scores), neighbours, -1)
+        scores = np.where(np.isfinite(scores), scores, 0)
+        self.neighbours[row_ids, :width] = neighbours
+        self.scores[row_ids, :width] = scores
+        self.neighbours[row_ids, width:] = -1
+        self.scores[row_ids, width:] = 0
+
+    def lookup(self, row_id, k=None):
+        """(row id, skor) tetangga satu mouse, O(K)"""
+        neighbours = self.neighbours[row_id, :k]
+        valid = neighbours >= 0
+        return neighbours[valid], self.scores[row_id, :k][valid]
+
+    def grow(self, n_rows):
+        """Tambah baris kosong untuk row baru di akhir katalog"""
+        extra = n_rows - len(self.neighbours)
+        if extra > 0:
+            self.neighbours = np.vstack([self.neighbours, np.full((extra, self.k), -1, dtype=np.int32)])
+            self.scores = np.vstack([self.scores, np.zeros((extra, self.k), dtype=np.float32)])
+
+    def refresh(self, scorer, features, active, changed):
+        """
+        Perbarui tabel setelah row `changed` ditambah, diubah atau dihapus.
+
+        Baris row yang berubah dihitung ulang penuh. Row lain yang daftarnya
+        memuat row berubah juga dihitung ulang, karena penggantinya tidak bisa
+        diketahui tanpa scoring; sisanya cukup menyisipkan row berubah yang
+        skornya kini masuk top-K. Mengembalikan jumlah baris yang dihitung ulang.
+        """
+        active = np.asarray(active)
+        changed = np.unique(np.asarray(changed))
+        self.grow(len(scorer))
+        live = np.intersect1d(changed, active, assume_unique=True)
+        self.neighbours[np.setdiff1d(changed, active)] = -1
+
+        containing = np.isin(self.neighbours, changed).any(axis=1)
+        stale = np.union1d(np.setdiff1d(active[containing[active]], changed), live)
+
+        if len(live):
+            # Skor row berubah terhadap semua row aktif: satu kolom per row berubah
+            scores = scorer.score_batch(features[live])[active]
+            kth = np.where(self.neighbours[active, -1] >= 0, self.scores[active, -1], -np.inf)
+            entering = np.any(scores >= kth[:, None], axis=1) & ~containing[active] & ~np.isin(active, live)
+            for position in np.flatnonzero(entering):
+                self._insert(active[position], live, scores[position])
+
+        step = max(1, min(MAX_BLOCK_ROWS, BLOCK_VALUES // max(len(active), 1)))
+        for start in range(0, len(stale), step):
+            block = stale[start:start + step]
+            self._store(block, *_compute_block(scorer, features, active, block, self.k))
+        return len(stale)
+
+    def _insert(self, row_id, candidates, candidate_scores):
+        """Gabungkan kandidat baru ke daftar tetangga satu row, urutan seperti _rank"""
+        neighbours = np.concatenate([self.neighbours[row_id], candidates])
+        scores = np.concatenate([self.scores[row_id], candidate_scores]).astype(np.float32)
+        scores[neighbours < 0] = -np.inf
+        order = np.lexsort((neighbours, -scores))[:self.k]
+        keep = order[np.isfinite(scores[order])]
+        self.neighbours[row_id] = -1
+        self.scores[row_id] = 0
+        self.neighbours[row_id, :len(keep)] = neighbours[keep]
+        self.scores[row_id, :len(keep)] = scores[keep]
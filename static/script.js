@@ -39,6 +39,8 @@ function initializeTheme() {
 // KONFIGURASI API
 // ========================================
 const API_BASE_URL = "";
+// Jumlah rekomendasi per halaman ("Tampilkan lebih banyak" mengambil halaman berikutnya)
+const PAGE_SIZE = 5;
 
 // ========================================
 // INISIALISASI HALAMAN
@@ -68,6 +70,7 @@ async function loadOptions() {
     fillSelect("connection", options.connections);
     fillSelect("size", options.sizes);
     fillSelect("shape", options.shapes);
+    await updateFacets();
   } catch (error) {
     console.error("Error loading options:", error);
     showError("Gagal memuat opsi. Pastikan server backend berjalan.");
@@ -114,10 +117,64 @@ function initializeEventListeners() {
   formElements.forEach((element) => {
     element.addEventListener("change", (e) => {
       console.log(`${e.target.id} changed to:`, e.target.value);
+      updateFacets();
     });
   });
 }
 
+// ========================================
+// JUMLAH MOUSE PER OPSI (FACET)
+// ========================================
+let facetRequest = 0;
+
+async function updateFacets() {
+  // Satu request untuk semua dropdown; respons lama diabaikan jika ada yang lebih baru
+  const requestId = ++facetRequest;
+  const params = new URLSearchParams(getFormPreferences());
+  try {
+    const res = await fetch(`${API_BASE_URL}/api/options/facets?${params}`);
+    if (!res.ok || requestId !== facetRequest) return;
+    const data = await res.json();
+    Object.entries(data.facets || {}).forEach(([field, counts]) => applyFacetCounts(field, counts));
+  } catch (error) {
+    console.warn("Error loading facet counts:", error);
+  }
+}
+
+function applyFacetCounts(id, counts) {
+  const select = document.getElementById(id);
+  if (!select) return;
+
+  Array.from(select.options).forEach((option) => {
+    if (!option.value || !(option.value in counts)) return;
+    const count = counts[option.value];
+    option.text = `${option.value} (${count})`;
+    // Opsi yang sedang dipilih tetap aktif agar user bisa mengubahnya
+    option.disabled = count === 0 && !option.selected;
+  });
+}
+
+// ========================================
+// LOG KLIK UNTUK TUNING REKOMENDASI
+// ========================================
+let lastPreferences = {};
+
+document.addEventListener("click", (e) => {
+  const link = e.target.closest(".btn-link");
+  if (!link || !navigator.sendBeacon) return;
+
+  const payload = JSON.stringify({
+    preferences: lastPreferences,
+    brand: link.dataset.brand,
+    name: link.dataset.name,
+    rank: parseInt(link.dataset.rank, 10),
+  });
+  navigator.sendBeacon(
+    `${API_BASE_URL}/api/feedback/click`,
+    new Blob([payload], { type: "application/json" })
+  );
+});
+
 // ========================================
 // HANDLER UNTUK FORM SUBMIT
 // ========================================
@@ -127,6 +184,7 @@ async function handleFormSubmit(e) {
   showLoading();
 
   const preferences = getFormPreferences();
+  lastPreferences = preferences;
 
   console.log("PREFERENSI YANG DIKIRIM:", preferences);
 
@@ -134,7 +192,7 @@ async function handleFormSubmit(e) {
     const res = await fetch(`${API_BASE_URL}/api/recommendations`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(preferences),
+      body: JSON.stringify({ ...preferences, limit: PAGE_SIZE }),
     });
 
     if (!res.ok) {
@@ -143,7 +201,7 @@ async function handleFormSubmit(e) {
 
     const data = await res.json();
     console.log("HASIL REKOMENDASI:", data.recommendations);
-    displayRecommendations(data.recommendations);
+    displayRecommendations(data.recommendations, data.relaxed_filters, data.next_cursor);
   } catch (error) {
     console.error("Error getting recommendations:", error);
     showError(
@@ -229,12 +287,33 @@ function showError(message) {
 // ========================================
 // FUNGSI UNTUK MENAMPILKAN REKOMENDASI
 // ========================================
-function displayRecommendations(recs) {
+const RELAXED_FILTER_LABELS = {
+  price_max: "harga",
+  category: "kategori",
+  brand: "brand",
+  connection: "koneksi",
+  size: "ukuran",
+  shape: "bentuk",
+  weight_pref: "berat",
+  dpi_min: "DPI",
+  buttons: "jumlah tombol",
+};
+
+function displayRecommendations(recs, relaxed, nextCursor) {
   const container = document.getElementById("recommendations");
   if (!container) return;
 
   container.innerHTML = "";
 
+  // Server melonggarkan filter karena tidak ada mouse yang cocok persis
+  if (recs && recs.length && relaxed && relaxed.length) {
+    const note = document.createElement("div");
+    note.classList.add("relaxed-note");
+    const names = relaxed.map((item) => RELAXED_FILTER_LABELS[item.filter] || item.filter);
+    note.textContent = `Tidak ada mouse yang cocok persis. Filter yang dilonggarkan: ${names.join(", ")}.`;
+    container.appendChild(note);
+  }
+
   if (!recs || !recs.length) {
     container.innerHTML = `
       <div class="empty-state">
@@ -245,12 +324,53 @@ function displayRecommendations(recs) {
     return;
   }
 
+  appendRecommendations(container, recs, nextCursor);
+}
+
+function appendRecommendations(container, recs, nextCursor) {
   recs.forEach((rec) => {
     const div = document.createElement("div");
     div.classList.add("recommendation-item");
     div.innerHTML = createRecommendationHTML(rec);
     container.appendChild(div);
   });
+
+  // Halaman berikutnya diambil lewat cursor dari server (tanpa scoring ulang)
+  if (nextCursor) {
+    const button = document.createElement("button");
+    button.type = "button";
+    button.classList.add("btn", "show-more");
+    button.textContent = "Tampilkan lebih banyak";
+    button.addEventListener("click", () => loadMoreRecommendations(container, button, nextCursor));
+    container.appendChild(button);
+  }
+}
+
+async function loadMoreRecommendations(container, button, cursor) {
+  button.disabled = true;
+  try {
+    const res = await fetch(`${API_BASE_URL}/api/recommendations`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ cursor, limit: PAGE_SIZE }),
+    });
+
+    // 410: katalog sudah berubah, mulai lagi dari halaman pertama
+    if (res.status === 410) {
+      document.getElementById("preferencesForm").requestSubmit();
+      return;
+    }
+    if (!res.ok) {
+      throw new Error(`HTTP error! status: ${res.status}`);
+    }
+
+    const data = await res.json();
+    button.remove();
+    appendRecommendations(container, data.recommendations, data.next_cursor);
+  } catch (error) {
+    console.error("Error loading more recommendations:", error);
+    button.disabled = false;
+  }
 }
 
 // ========================================
@@ -290,7 +410,9 @@ function createRecommendationHTML(rec) {
   return `
     <div class="mouse-image-container">
       <img
-        src="${imageSrc}"
+        src="${imageSrc}?w=160"
+        srcset="${imageSrc}?w=160 1x, ${imageSrc}?w=320 2x"
+        data-full-src="${imageSrc}"
         alt="${rec.name}"
         class="mouse-image"
         onerror="handleImageError(this, '${rec.name}', '${rec.brand}')"
@@ -350,6 +472,9 @@ function createRecommendationHTML(rec) {
           target="_blank"
           rel="noopener noreferrer"
           class="btn-link"
+          data-brand="${rec.brand}"
+          data-name="${rec.name}"
+          data-rank="${rec.rank}"
         >
           Beli Produk
         </a>
@@ -414,6 +539,8 @@ function handleImageError(img, mouseName, mouseBrand) {
       // Test if image exists
       const testImg = new Image();
       testImg.onload = function () {
+        img.removeAttribute("srcset");
+        img.dataset.fullSrc = nextSrc;
         img.src = nextSrc;
         img.onerror = null;
       };
@@ -487,7 +614,7 @@ function addImageZoom() {
       modal.innerHTML = `
         <div class="modal-content">
           <span class="close-modal">&times;</span>
-          <img src="${e.target.src}" alt="${e.target.alt}" class="modal-image">
+          <img src="${e.target.dataset.fullSrc || e.target.src}" alt="${e.target.alt}" class="modal-image">
           <div class="modal-caption">${e.target.alt}</div>
         </div>
       `;
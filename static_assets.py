@@ -0,0 +1,223 @@
+# static_assets.py - ETag, Cache-Control dan varian gzip/brotli untuk file statis
+import argparse
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+
+from flask import Response, request, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli opsional, tanpa itu hanya varian gzip yang dibuat
+    brotli = None
+
+# Ekstensi yang dikompresi saat build (gambar JPEG/PNG sudah terkompresi)
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.html', '.svg', '.json', '.txt')
+
+# Varian yang dicari saat melayani file, urut dari yang paling disukai
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def _file_digest(path):
+    """Hash isi file (hex) untuk ETag dan URL ber-versi"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _accepted_encodings(header):
+    """Encoding di Accept-Encoding yang tidak ditolak dengan q=0"""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        q = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if q and float(q.group(1)) == 0:
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    """
+    Hash isi file statis dan gambar, dihitung sekali saat startup.
+
+    Hash dipakai sebagai ETag kuat (sehingga If-None-Match dijawab 304) dan
+    sebagai parameter versi `?v=` di URL. Request dengan versi yang cocok
+    dilayani dengan `Cache-Control: immutable`; tanpa versi browser harus
+    revalidasi. Hash dihitung ulang hanya jika mtime/ukuran file berubah.
+    """
+
+    def __init__(self, folders, max_age=3600):
+        self.folders = list(folders)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._digests = {}
+        self._index_cache = None
+        for folder in self.folders:
+            for dirpath, _, filenames in os.walk(folder):
+                for name in filenames:
+                    if not name.endswith(('.gz', '.br')):
+                        self.digest(os.path.join(dirpath, name))
+        logging.info(f"Static asset hashes computed: {len(self._digests)} files in {self.folders}")
+
+    def digest(self, path):
+        """Hash isi file, None jika file tidak ada"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._digests.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        digest = _file_digest(path)
+        with self._lock:
+            self._digests[path] = (signature, digest)
+        return digest
+
+    def versioned_url(self, url, folder, filename):
+        """URL dengan parameter versi dari hash isi file"""
+        digest = self.digest(os.path.join(folder, filename))
+        return f"{url}?v={digest}" if digest else url
+
+    def _variant(self, path, filename):
+        """Varian terkompresi (encoding, nama file) yang diterima klien dan masih segar"""
+        accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                if os.stat(path + suffix).st_mtime_ns >= os.stat(path).st_mtime_ns:
+                    return encoding, filename + suffix
+            except OSError:
+                continue
+        return None, filename
+
+    def _apply_cache_headers(self, response, digest):
+        """Immutable jika URL membawa versi yang cocok, selain itu wajib revalidasi"""
+        response.cache_control.no_cache = None
+        if digest and request.args.get('v') == digest:
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.public = True
+            response.cache_control.max_age = self.max_age
+            response.cache_control.must_revalidate = True
+        return response
+
+    def send(self, folder, filename):
+        """
+        Kirim file dengan ETag kuat, 304 untuk If-None-Match yang cocok, dan
+        varian .br/.gz (hasil build) jika klien menerimanya.
+        """
+        path = safe_join(folder, filename)
+        if path is None:
+            raise NotFound()
+        digest = self.digest(path)
+        encoding, served_name = self._variant(path, filename)
+        # ETag tetap per encoding (representasi berbeda wajib punya validator kuat berbeda)
+        etag = None if digest is None else (digest if encoding is None else f"{digest}-{encoding}")
+
+        # Header lain diturunkan dari asset logis, bukan file varian: nama file
+        # (Content-Disposition), tipe konten dan Last-Modified sama untuk semua encoding
+        kwargs = {}
+        if encoding:
+            try:
+                kwargs['last_modified'] = os.stat(path).st_mtime
+            except OSError:
+                raise NotFound()
+            kwargs['mimetype'] = mimetypes.guess_type(filename)[0]
+        response = send_from_directory(folder, served_name, etag=etag or True, conditional=True,
+                                       download_name=os.path.basename(filename), **kwargs)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+            response.vary.add('Accept-Encoding')
+        return self._apply_cache_headers(response, digest)
+
+    def send_index(self, folder, filename="index.html"):
+        """
+        Kirim index.html dengan URL CSS/JS yang sudah diberi versi.
+
+        HTML hasil rewrite dikompresi gzip sekali dan disimpan di memori.
+        index.html sendiri selalu direvalidasi, sehingga deploy baru langsung
+        terlihat sementara CSS/JS ber-versi tetap di-cache permanen.
+        """
+        path = os.path.join(folder, filename)
+        digest = self.digest(path)
+        if digest is None:
+            raise FileNotFoundError(path)
+
+        cached = self._index_cache
+        if cached is None or cached[0] != digest:
+            with open(path, encoding='utf-8', newline='') as f:
+                html = f.read()
+
+            def versioned(match):
+                asset = match.group(2)
+                return match.group(1) + self.versioned_url(f"/static/{asset}", folder, asset)
+
+            html = re.sub(r'((?:href|src)=")/static/([\w./-]+\.(?:css|js))(?=")', versioned, html)
+            body = html.encode('utf-8')
+            cached = self._index_cache = (digest, body, gzip.compress(body, mtime=0),
+                                          hashlib.sha256(body).hexdigest()[:16])
+
+        _, body, gzipped, etag = cached
+        use_gzip = 'gzip' in _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        response = Response(gzipped if use_gzip else body, mimetype='text/html')
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        response.set_etag(f"{etag}-gzip" if use_gzip else etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+def compress_assets(folder):
+    """Buat varian .gz (dan .br jika modul brotli ada) untuk file yang bisa dikompresi"""
+    written = []
+    for dirpath, _, filenames in os.walk(folder):
+        for name in filenames:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append(('.br', brotli.compress(data, quality=11)))
+            for suffix, compressed in variants:
+                # Varian yang tidak lebih kecil tidak ada gunanya dikirim
+                if len(compressed) >= len(data):
+                    continue
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+                written.append((path + suffix, len(data), len(compressed)))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompress file statis (gzip/brotli) saat build")
+    parser.add_argument("folder", nargs="?", default="static")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if brotli is None:
+        logging.warning("brotli module not installed; writing gzip variants only")
+    for path, original, compressed in compress_assets(args.folder):
+        logging.info(f"{path}: {original} -> {compressed} bytes")
+
+
+if __name__ == "__main__":
+    main()
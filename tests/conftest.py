@@ -0,0 +1,37 @@
+# conftest.py - Fixture bersama: katalog contoh (Data_Mouse.csv) dan test client Flask
+import logging
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from mouse_recomender import MouseRecommendationSystem  # noqa: E402
+
+CSV_PATH = os.path.join(ROOT, "Data_Mouse.csv")
+
+
+@pytest.fixture
+def recommender():
+    """Snapshot baru per test (boleh diubah oleh test)"""
+    return MouseRecommendationSystem(CSV_PATH, "img")
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    """Modul app (katalog dimuat sekali saat import)"""
+    import app
+    logging.disable(logging.INFO)
+    yield app
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def client(app_module):
+    """Test client dengan cache response dan ranking kosong"""
+    app_module.recommendation_cache.clear()
+    app_module.ranking_cache._cache.clear()
+    return app_module.app.test_client()
@@ -0,0 +1,11 @@
+# test_catalog_reload.py - Endpoint reload katalog hanya aktif dengan token
+def test_reload_is_disabled_without_token(client, monkeypatch):
+    monkeypatch.delenv('CATALOG_RELOAD_TOKEN', raising=False)
+    assert client.post('/api/catalog/reload').status_code == 404
+
+
+def test_reload_requires_matching_token(client, monkeypatch):
+    monkeypatch.setenv('CATALOG_RELOAD_TOKEN', 'secret')
+    assert client.post('/api/catalog/reload').status_code == 403
+    assert client.post('/api/catalog/reload', headers={'X-Reload-Token': 'wrong'}).status_code == 403
+    assert client.post('/api/catalog/reload', headers={'X-Reload-Token': 'sécret'}).status_code == 403
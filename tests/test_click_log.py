@@ -0,0 +1,52 @@
+# test_click_log.py - Validasi event klik dan rotasi file log
+import json
+
+import pytest
+
+from click_log import ClickLog, clean_click, read_click_log
+
+
+def test_clean_click_keeps_only_known_preferences():
+    preferences, brand, name, rank = clean_click({
+        'brand': 'Logitech', 'name': 'B175', 'rank': 2,
+        'preferences': {'brand': 'Logitech', 'price_max': '500000', 'dpi_min': 8000, 'shape': '',
+                        'relax': False, 'junk': 'x' * 10000}
+    })
+    assert preferences == {'brand': 'Logitech', 'price_max': '500000', 'dpi_min': 8000, 'relax': False}
+    assert (brand, name, rank) == ('Logitech', 'B175', 2)
+
+
+@pytest.mark.parametrize("payload", [
+    None,
+    {'brand': 'Logitech'},
+    {'brand': 'Logitech', 'name': ['B175']},
+    {'brand': 'Logitech', 'name': 'B175', 'rank': 'first'},
+    {'brand': 'Logitech', 'name': 'B175', 'preferences': []},
+    {'brand': 'Logitech', 'name': 'B175', 'preferences': {'brand': {'nested': 1}}},
+    {'brand': 'Logitech', 'name': 'B175', 'preferences': {'price_max': 'cheap'}},
+    {'brand': 'Logitech', 'name': 'B175', 'preferences': {'category': 'x' * 1000}},
+])
+def test_clean_click_rejects_invalid_events(payload):
+    with pytest.raises(ValueError):
+        clean_click(payload)
+
+
+def test_click_log_rotates_when_full(tmp_path):
+    path = tmp_path / "clicks.jsonl"
+    log = ClickLog(str(path), max_bytes=400, backups=2)
+    for i in range(30):
+        log.record({'brand': 'Logitech'}, 'Logitech', f"M{i}", 1)
+    assert path.stat().st_size <= 400
+    assert (tmp_path / "clicks.jsonl.2").exists() and not (tmp_path / "clicks.jsonl.3").exists()
+    assert read_click_log(str(path))[-1]['name'] == 'M29'
+
+
+def test_click_endpoint_validates_and_caps_payload(client, app_module, monkeypatch, tmp_path):
+    path = tmp_path / "clicks.jsonl"
+    monkeypatch.setattr(app_module, 'click_log', ClickLog(str(path)))
+    event = {'brand': 'Logitech', 'name': 'B175', 'rank': 1, 'preferences': {'brand': 'Logitech', 'x': 1}}
+    assert client.post('/api/feedback/click', json=event).status_code == 204
+    assert client.post('/api/feedback/click', json={'brand': 'Logitech'}).status_code == 400
+    big = dict(event, preferences={'brand': 'x' * app_module.CLICK_MAX_BYTES})
+    assert client.post('/api/feedback/click', json=big).status_code == 413
+    assert [json.loads(line)['preferences'] for line in path.read_text().splitlines()] == [{'brand': 'Logitech'}]
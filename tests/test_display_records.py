@@ -0,0 +1,32 @@
+# test_display_records.py - Record tampilan: sel kosong dan URL gambar saat render
+import os
+
+import pandas as pd
+
+from conftest import CSV_PATH
+from mouse_recomender import MouseRecommendationSystem
+
+
+def test_blank_numeric_cell_does_not_break_loading(tmp_path):
+    frame = pd.read_csv(CSV_PATH)
+    frame.loc[0, 'Buttons'] = None
+    frame.loc[0, 'Price'] = None
+    path = tmp_path / "catalog.csv"
+    frame.to_csv(path, index=False)
+
+    recommender = MouseRecommendationSystem(str(path), "img")
+    assert len(recommender.get_recommendations({})) == 5
+    record = recommender.format_recommendations([0], [1.0])[0]
+    assert record['specs']['buttons'] is None and record['price'] is None
+    assert record['specs']['dpi'] == f"{frame.loc[0, 'DPI']:,.0f}"
+
+
+def test_image_url_follows_image_index_refresh(tmp_path):
+    image = pd.read_csv(CSV_PATH)['Image'][0]
+    (tmp_path / image).write_bytes(b"")
+    recommender = MouseRecommendationSystem(CSV_PATH, str(tmp_path))
+    assert recommender.format_recommendations([0], [1.0])[0]['image_url'] == f"/api/images/{image}"
+
+    os.remove(tmp_path / image)
+    recommender.image_index.refresh(force=True)
+    assert recommender.format_recommendations([0], [1.0])[0]['image_url'] == "/api/images/default.jpg"
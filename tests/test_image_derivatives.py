@@ -0,0 +1,40 @@
+# test_image_derivatives.py - Thumbnail ?w=: sumber rusak dan nama file yang sama di folder berbeda
+import os
+
+import pytest
+
+from image_derivatives import ImageDerivatives
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def write_image(path):
+    Image.effect_noise((800, 600), 64).convert("RGB").save(path, quality=95)
+
+
+def test_corrupt_source_falls_back_to_original_once(tmp_path, monkeypatch):
+    folder = tmp_path / "img"
+    folder.mkdir()
+    (folder / "broken.jpg").write_bytes(b"not an image")
+    derivatives = ImageDerivatives(str(tmp_path / "cache"))
+    calls = []
+    render = derivatives._render
+    monkeypatch.setattr(derivatives, '_render', lambda *args: calls.append(args) or render(*args))
+
+    assert derivatives.derive(str(folder), "broken.jpg", 160) is None
+    assert derivatives.derive(str(folder), "broken.jpg", 320) is None
+    assert len(calls) == 1
+
+
+def test_same_filename_in_two_folders_gets_separate_derivatives(tmp_path):
+    first, second = tmp_path / "img", tmp_path / "static" / "img"
+    first.mkdir()
+    second.mkdir(parents=True)
+    write_image(first / "mouse.jpg")
+    write_image(second / "mouse.jpg")
+    derivatives = ImageDerivatives(str(tmp_path / "cache"))
+
+    a = os.path.join(*derivatives.derive(str(first), "mouse.jpg", 160))
+    b = os.path.join(*derivatives.derive(str(second), "mouse.jpg", 160))
+    assert a != b
+    assert os.path.exists(a) and os.path.exists(b)
@@ -0,0 +1,123 @@
+# test_incremental_updates.py - add/update/remove_items dibanding build penuh, dan swap copy-on-write
+import numpy as np
+import pytest
+
+from catalog_manager import CatalogManager
+from conftest import CSV_PATH
+from mouse_recomender import MouseRecommendationSystem
+
+NEW_ITEM = {
+    'Brand': 'NewBrand', 'Name': 'X1', 'Price': 300000, 'Connection': 'Wireless', 'Power': 'Battery AA',
+    'Battery Life': '12 Months', 'Buttons': 5, 'Buttons Type': 'Clicky', 'Size': 'Medium', 'Weight': 60,
+    'Shape': 'Symmetrical', 'DPI': 26000, 'Polling Rate': 1000, 'Category': 'Gaming', 'Image': 'x.jpeg',
+    'Link': None
+}
+
+PREFERENCES = [
+    {},
+    {'brand': 'Logitech'},
+    {'category': 'Gaming', 'weight_pref': 'light'},
+    {'price_max': 500000, 'dpi_min': 8000},
+    {'brand': 'NewBrand'},
+]
+
+
+def ranking(recommender, preferences):
+    return [(rec['name'], rec['similarity_score']) for rec in recommender.get_recommendations(preferences, top_n=200)]
+
+
+def rebuilt(recommender, tmp_path):
+    """Build penuh dari data yang sama dengan snapshot hasil update incremental"""
+    path = tmp_path / "catalog.csv"
+    recommender.active_df().to_csv(path, index=False)
+    return MouseRecommendationSystem(str(path), "img")
+
+
+@pytest.mark.parametrize("update", [
+    pytest.param(lambda r: r.update_items([{'Brand': 'Logitech', 'Name': 'B175', 'Price': 120000}]),
+                 id="numeric-patch"),
+    pytest.param(lambda r: r.update_items([{'Brand': 'Logitech', 'Name': 'B175', 'Price': 50000000}]),
+                 id="rescale"),
+    pytest.param(lambda r: r.update_items([{'Brand': 'Logitech', 'Name': 'B175', 'Shape': 'Ergonomic'}]),
+                 id="categorical"),
+    pytest.param(lambda r: r.add_items([NEW_ITEM]), id="add-new-category"),
+    pytest.param(lambda r: r.update_items([{'Brand': r.df['Brand'][r.df['Price'].idxmax()],
+                                            'Name': r.df['Name'][r.df['Price'].idxmax()], 'Price': 200000}]),
+                 id="shrink-max"),
+    pytest.param(lambda r: r.update_items([{'Brand': r.df['Brand'][r.df['DPI'].idxmin()],
+                                            'Name': r.df['Name'][r.df['DPI'].idxmin()], 'DPI': 16000}]),
+                 id="shrink-min"),
+    pytest.param(lambda r: r.remove_items([(r.df['Brand'][r.df['DPI'].idxmin()],
+                                            r.df['Name'][r.df['DPI'].idxmin()])]),
+                 id="remove-extreme"),
+])
+def test_incremental_update_matches_full_rebuild(recommender, tmp_path, update):
+    update(recommender)
+    full = rebuilt(recommender, tmp_path)
+    for preferences in PREFERENCES:
+        assert ranking(recommender, preferences) == ranking(full, preferences), preferences
+
+
+def test_removed_items_are_no_longer_recommended(recommender):
+    recommender.add_items([NEW_ITEM])
+    assert ranking(recommender, {'brand': 'NewBrand'})[0][0] == 'X1'
+    version = recommender.catalog_version
+    recommender.remove_items([('NewBrand', 'X1')])
+    assert recommender.get_recommendations({'brand': 'NewBrand'}) == []
+    assert 'X1' not in [name for name, _ in ranking(recommender, {})]
+    assert recommender.catalog_version == version + 1
+
+
+def test_unknown_and_duplicate_items_are_rejected(recommender):
+    with pytest.raises(KeyError):
+        recommender.update_items([{'Brand': 'Nope', 'Name': 'Nope', 'Price': 1}])
+    with pytest.raises(ValueError):
+        recommender.add_items([{**NEW_ITEM, 'Brand': 'Logitech', 'Name': 'B175'}])
+
+
+def test_manager_update_swaps_copy_and_keeps_served_snapshot_intact():
+    manager = CatalogManager(CSV_PATH, "img")
+    manager.load()
+    served = manager.current
+    before = [ranking(served, preferences) for preferences in PREFERENCES]
+    features = served.feature_matrix.copy()
+    version = served.catalog_version
+
+    manager.update_items([{'Brand': 'Logitech', 'Name': 'B175', 'Price': 50000000}])
+    manager.add_items([NEW_ITEM])
+
+    assert manager.current is not served
+    assert manager.current.catalog_version == version + 2
+    assert served.catalog_version == version
+    assert np.array_equal(served.feature_matrix, features)
+    assert [ranking(served, preferences) for preferences in PREFERENCES] == before
+    assert ranking(manager.current, {'brand': 'NewBrand'})[0][0] == 'X1'
+
+    manager.remove_items([('NewBrand', 'X1')])
+    assert manager.current.get_recommendations({'brand': 'NewBrand'}) == []
+
+
+@pytest.mark.parametrize("update", [
+    pytest.param(lambda r: r.update_items([{'Brand': 'Logitech', 'Name': 'B175', 'Price': 120000}]),
+                 id="numeric-patch"),
+    pytest.param(lambda r: r.update_items([{'Brand': 'Logitech', 'Name': 'B175', 'Shape': 'Ergonomic'}]),
+                 id="categorical"),
+    pytest.param(lambda r: r.add_items([NEW_ITEM]), id="add"),
+])
+def test_neighbour_table_refresh_matches_full_rebuild(tmp_path, update):
+    recommender = MouseRecommendationSystem(CSV_PATH, "img", similar_items={'k': 5})
+    update(recommender)
+    path = tmp_path / "catalog.csv"
+    recommender.active_df().to_csv(path, index=False)
+    full = MouseRecommendationSystem(str(path), "img", similar_items={'k': 5})
+    for row_id in full.catalog_index.all_ids():
+        expected = full.get_similar_items(row_id)
+        actual = recommender.get_similar_items(row_id)
+        assert [(rec['name'], rec['similarity_score']) for rec in actual] == \
+            [(rec['name'], rec['similarity_score']) for rec in expected], row_id
+
+
+def test_similar_endpoint_is_served_from_csv_catalog(client):
+    response = client.get('/api/mice/0/similar?k=3')
+    assert response.status_code == 200
+    assert len(response.get_json()['similar']) == 3
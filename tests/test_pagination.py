@@ -0,0 +1,97 @@
+# test_pagination.py - Cursor halaman rekomendasi dan cache urutan hasil
+import pytest
+
+from pagination import CursorError, RankingCache, decode_cursor, encode_cursor
+
+
+def all_pages(client, preferences, limit):
+    """Ikuti next_cursor sampai habis; mengembalikan (rekomendasi, response pertama)"""
+    first = client.post('/api/recommendations', json={**preferences, 'limit': limit}).get_json()
+    results, body = list(first['recommendations']), first
+    while body['next_cursor']:
+        response = client.post('/api/recommendations', json={'cursor': body['next_cursor'], 'limit': limit})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body['recommendations']) <= limit
+        results += body['recommendations']
+    return results, first
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({'brand': 'Logitech'}, 10, 3)
+    assert decode_cursor(cursor, 3) == ({'brand': 'Logitech'}, 10)
+
+
+@pytest.mark.parametrize("cursor", ["garbage!", "", 42, encode_cursor({'brand': 'x'}, -1, 1)])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(CursorError) as error:
+        decode_cursor(cursor, 1)
+    assert error.value.status == 400
+
+
+def test_cursor_from_older_catalog_version_is_expired():
+    with pytest.raises(CursorError) as error:
+        decode_cursor(encode_cursor({}, 5, 1), 2)
+    assert error.value.status == 410
+
+
+@pytest.mark.parametrize("preferences", [{}, {'brand': 'Logitech'}, {'brand': 'Nope', 'price_max': '1'}])
+def test_pages_concatenate_to_a_single_large_query(client, app_module, preferences):
+    results, first = all_pages(client, preferences, limit=7)
+    recommender = app_module.catalog.current
+    expected, relaxed = recommender.get_recommendations_relaxed(preferences, top_n=len(results) + 10)
+    assert [rec['id'] for rec in results] == [rec['id'] for rec in expected]
+    assert [rec['rank'] for rec in results] == list(range(1, len(results) + 1))
+    assert first['total'] == len(results)
+    assert first.get('relaxed_filters', []) == relaxed
+
+
+def test_total_counts_matches_beyond_the_ranking_cap(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'ranking_cache', RankingCache(max_results=10))
+    results, first = all_pages(client, {}, limit=4)
+    assert len(results) == 10
+    assert first['total'] == len(app_module.catalog.current.catalog_index.all_ids())
+
+
+def test_limit_is_validated(client, app_module):
+    for limit in (0, -1, app_module.MAX_PAGE_SIZE + 1, "5", True):
+        assert client.post('/api/recommendations', json={'limit': limit}).status_code == 400
+
+
+def test_cursor_across_version_bump_returns_410(client, app_module):
+    cursor = client.post('/api/recommendations', json={'limit': 2}).get_json()['next_cursor']
+    recommender = app_module.catalog.current
+    version = recommender.catalog_version
+    try:
+        recommender.catalog_version = version + 1
+        response = client.post('/api/recommendations', json={'cursor': cursor})
+        assert response.status_code == 410
+    finally:
+        recommender.catalog_version = version
+
+
+def test_invalid_preferences_give_empty_page(client):
+    paged = client.post('/api/recommendations', json={'limit': 3, 'brand': 123})
+    plain = client.post('/api/recommendations', json={'brand': 123})
+    assert paged.status_code == plain.status_code == 200
+    body = paged.get_json()
+    assert body['recommendations'] == plain.get_json()['recommendations'] == []
+    assert body['next_cursor'] is None and body['total'] == 0
+
+
+def test_first_page_is_served_from_response_cache(client, app_module):
+    first = client.post('/api/recommendations', json={'brand': 'Razer', 'limit': 3})
+    hits = app_module.recommendation_cache.stats()['hits']
+    again = client.post('/api/recommendations', json={'brand': 'Razer', 'limit': 3})
+    assert again.data == first.data
+    assert app_module.recommendation_cache.stats()['hits'] == hits + 1
+
+
+def test_evicted_ranking_is_recomputed_from_cursor(app_module):
+    recommender = app_module.catalog.current
+    cache = RankingCache(maxsize=1, ttl=60, max_results=50)
+    ids, scores, _, _ = cache.ranking(recommender, {'brand': 'Logitech'})
+    cache.ranking(recommender, {'brand': 'Razer'})  # membuang urutan Logitech
+    again, again_scores, _, _ = cache.ranking(recommender, {'brand': 'Logitech'})
+    assert list(again) == list(ids) and list(again_scores) == list(scores)
+    assert cache.stats()['evictions'] >= 1
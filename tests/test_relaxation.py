@@ -0,0 +1,65 @@
+# test_relaxation.py - Pelonggaran filter bertahap dan kesamaan endpoint batch dengan endpoint tunggal
+from tune_feature_weights import prepare_events
+
+
+def test_exact_matches_are_not_relaxed(recommender):
+    results, relaxed = recommender.get_recommendations_relaxed({'brand': 'Razer'})
+    assert relaxed == []
+    assert results == recommender.get_recommendations({'brand': 'Razer'})
+
+
+def test_numeric_filter_is_widened_before_it_is_dropped(recommender):
+    cheapest = float(recommender.df['Price'].min())
+    results, relaxed = recommender.get_recommendations_relaxed({'price_max': cheapest / 1.2})
+    assert relaxed == [{'filter': 'price_max', 'action': 'widened', 'value': cheapest / 1.2 * 1.25}]
+    assert results and all(recommender.df['Price'][rec['id']] <= cheapest / 1.2 * 1.25 for rec in results)
+
+
+def test_less_important_filter_is_relaxed_first(recommender):
+    results, relaxed = recommender.get_recommendations_relaxed({'brand': 'Nope', 'category': 'Gaming'})
+    assert relaxed == [{'filter': 'brand', 'action': 'dropped'}]
+    assert results and all(rec['category'].strip() == 'Gaming' for rec in results)
+
+
+def test_relaxed_filters_are_reported_in_filter_order(recommender):
+    results, relaxed = recommender.get_recommendations_relaxed({'brand': 'Nope', 'price_max': '1'})
+    assert relaxed == [{'filter': 'price_max', 'action': 'dropped'}, {'filter': 'brand', 'action': 'dropped'}]
+    assert len(results) == 5
+
+
+def test_min_results_keeps_relaxing(recommender):
+    preferences = {'brand': 'Razer', 'category': 'Office'}
+    strict = recommender.get_recommendations(preferences, top_n=50)
+    results, relaxed = recommender.get_recommendations_relaxed(preferences, top_n=50, min_results=len(strict) + 1)
+    assert relaxed and len(results) > len(strict)
+
+
+def test_endpoint_reports_relaxed_filters(client):
+    body = client.post('/api/recommendations', json={'brand': 'Nope', 'price_max': '1'}).get_json()
+    assert [item['filter'] for item in body['relaxed_filters']] == ['price_max', 'brand']
+    assert 'relaxed' in body['message']
+    strict = client.post('/api/recommendations', json={'brand': 'Nope', 'relax': False}).get_json()
+    assert strict['recommendations'] == [] and 'relaxed_filters' not in strict
+
+
+def test_batch_endpoint_matches_single_endpoint(client):
+    preferences = [
+        {},
+        {'brand': 'Logitech'},
+        {'brand': 'Nope', 'price_max': '1'},
+        {'brand': 'Nope', 'relax': False},
+        {'brand': 5},
+        {'category': 'Gaming', 'weight_pref': 'light'},
+    ]
+    batch = client.post('/api/recommendations/batch', json={'preferences': preferences}).get_json()['results']
+    single = [client.post('/api/recommendations', json=p).get_json() for p in preferences]
+    assert batch == single
+
+
+def test_tuning_uses_the_relaxed_candidates_that_are_served(recommender):
+    top = recommender.get_recommendations_relaxed({'brand': 'Nope'})[0][0]
+    event = {'preferences': {'brand': 'Nope'}, 'brand': top['brand'], 'name': top['name']}
+    assert len(prepare_events(recommender, [event])) == 1
+    assert prepare_events(recommender, [event], relax=False) == []
+    strict_event = {**event, 'preferences': {'brand': 'Nope', 'relax': False}}
+    assert prepare_events(recommender, [strict_event]) == []
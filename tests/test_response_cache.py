@@ -0,0 +1,78 @@
+# test_response_cache.py - Cache response LRU + TTL yang terikat versi katalog
+import itertools
+
+import response_cache
+from response_cache import ResponseCache, canonical_key
+
+
+def test_canonical_key_ignores_key_order():
+    assert canonical_key({'brand': 'Logitech', 'price_max': 1}, 5) == \
+        canonical_key({'price_max': 1, 'brand': 'Logitech'}, 5)
+    assert canonical_key({'brand': 'Logitech'}, 5) != canonical_key({'brand': 'Logitech'}, 10)
+
+
+def test_hit_and_miss_are_counted():
+    cache = ResponseCache(maxsize=4, ttl=60)
+    assert cache.get('a', 1) is None
+    cache.put('a', 1, b'body')
+    assert cache.get('a', 1) == b'body'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(maxsize=2, ttl=60)
+    cache.put('a', 1, 'A')
+    cache.put('b', 1, 'B')
+    assert cache.get('a', 1) == 'A'  # 'a' jadi yang paling baru dipakai
+    cache.put('c', 1, 'C')
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) == 'A' and cache.get('c', 1) == 'C'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = itertools.count(0, 10)
+    monkeypatch.setattr(response_cache.time, 'monotonic', lambda: next(clock))
+    cache = ResponseCache(maxsize=4, ttl=15)
+    cache.put('a', 1, 'A')          # kedaluwarsa di t=15
+    assert cache.get('a', 1) == 'A'  # t=10
+    assert cache.get('a', 1) is None  # t=20
+    assert cache.stats()['size'] == 0
+
+
+def test_version_change_invalidates_all_entries():
+    cache = ResponseCache(maxsize=4, ttl=60)
+    cache.put('a', 1, 'A')
+    cache.put('b', 1, 'B')
+    assert cache.get('a', 2) is None
+    assert cache.get('b', 1) is None  # entry versi lama sudah dibuang
+    stats = cache.stats()
+    assert stats['invalidations'] == 1 and stats['catalog_version'] == 1
+
+
+def test_zero_maxsize_disables_cache():
+    cache = ResponseCache(maxsize=0, ttl=60)
+    cache.put('a', 1, 'A')
+    assert cache.get('a', 1) is None
+
+
+def test_endpoint_serves_identical_request_from_cache(client, app_module):
+    first = client.post('/api/recommendations', json={'brand': 'Logitech'})
+    second = client.post('/api/recommendations', json={'brand': 'Logitech'})
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
+    assert app_module.recommendation_cache.stats()['hits'] >= 1
+
+
+def test_endpoint_cache_follows_catalog_version(client, app_module):
+    recommender = app_module.catalog.current
+    client.post('/api/recommendations', json={'brand': 'Razer'})
+    version = recommender.catalog_version
+    try:
+        recommender.catalog_version = version + 1
+        misses = app_module.recommendation_cache.stats()['misses']
+        client.post('/api/recommendations', json={'brand': 'Razer'})
+        assert app_module.recommendation_cache.stats()['misses'] == misses + 1
+    finally:
+        recommender.catalog_version = version
@@ -0,0 +1,145 @@
+# tune_feature_weights.py - Tuning bobot blok fitur secara offline dari log klik
+import argparse
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from click_log import read_click_log
+
+# Nilai bobot yang dicoba untuk setiap blok pada coordinate descent
+WEIGHT_GRID = (0.0, 0.25, 0.5, 1.0, 2.0, 4.0)
+
+
+def prepare_events(recommender, events, relax=True, min_results=1):
+    """
+    Ubah event klik menjadi (user vector, kandidat, row id yang diklik).
+
+    Filter dan user vector tidak bergantung pada bobot, jadi cukup dihitung
+    sekali. Kandidat dilonggarkan seperti saat serving (`relax`, kecuali
+    preferensi berisi "relax": false) agar tuning memakai kandidat yang
+    sama dengan yang disajikan. Event yang mouse-nya tidak ada atau tidak
+    lolos filter dilewati.
+    """
+    prepared = []
+    all_ids = recommender.catalog_index.all_ids()
+    for event in events:
+        row_id = recommender.item_ids.get(recommender._item_key(event['brand'], event['name']))
+        if row_id is None:
+            continue
+        preferences = event['preferences']
+        if relax and preferences.get('relax', True) is not False:
+            candidates, _ = recommender.relaxed_candidates(preferences, min_results)
+        else:
+            candidates = recommender.filter_candidates(preferences)
+        if candidates is None:
+            candidates = all_ids
+        position = np.searchsorted(candidates, row_id)
+        if position >= len(candidates) or candidates[position] != row_id:
+            continue
+        prepared.append((recommender.create_user_profile(preferences), candidates, position))
+    return prepared
+
+
+def evaluate(scorer, prepared, k=5):
+    """MRR@k dan hit rate@k item yang diklik, dengan urutan seri sama seperti select_top_k"""
+    if not prepared:
+        return {'mrr': 0.0, 'hit_rate': 0.0, 'events': 0}
+    reciprocal_ranks = []
+    for user_vector, candidates, position in prepared:
+        scores = scorer.score(user_vector, candidates)
+        clicked = scores[position]
+        rank = 1 + np.count_nonzero(scores > clicked) + np.count_nonzero(scores[:position] == clicked)
+        reciprocal_ranks.append(1.0 / rank if rank <= k else 0.0)
+    reciprocal_ranks = np.asarray(reciprocal_ranks)
+    return {
+        'mrr': round(float(reciprocal_ranks.mean()), 4),
+        'hit_rate': round(float(np.mean(reciprocal_ranks > 0)), 4),
+        'events': len(prepared)
+    }
+
+
+def tune(recommender, prepared, k=5, grid=WEIGHT_GRID, passes=2):
+    """
+    Coordinate descent: untuk setiap blok, coba semua nilai di grid dengan
+    blok lain tetap, simpan yang MRR-nya paling tinggi. Bobot yang sama baiknya
+    dengan bobot sekarang tidak diganti, agar hasil tetap stabil.
+    """
+    from scoring import TopKScorer
+
+    space = recommender.feature_space
+    weights = dict(space.weights)
+    best = evaluate(recommender.scorer, prepared, k)
+    for _ in range(passes):
+        improved = False
+        for block in space.block_names:
+            for value in grid:
+                if value == weights[block]:
+                    continue
+                candidate = {**weights, block: value}
+                scorer = TopKScorer(recommender.feature_matrix, space.with_weights(candidate))
+                result = evaluate(scorer, prepared, k)
+                if result['mrr'] > best['mrr']:
+                    weights, best, improved = candidate, result, True
+            logging.info(f"{block}: weight {weights[block]} (MRR@{k} {best['mrr']})")
+        if not improved:
+            break
+    return weights, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tuning bobot blok fitur dari log klik (JSON Lines)")
+    parser.add_argument("click_log", help="File log klik (CLICK_LOG)")
+    parser.add_argument("--csv", default="Data_Mouse.csv")
+    parser.add_argument("--image-folder", default="img")
+    parser.add_argument("--initial-weights", help="File bobot awal (default: semua 1.0)")
+    parser.add_argument("--output", default="feature_weights.json")
+    parser.add_argument("--k", type=int, default=5, help="Jumlah rekomendasi yang ditampilkan")
+    parser.add_argument("--passes", type=int, default=2)
+    parser.add_argument("--validation-fraction", type=float, default=0.2,
+                        help="Bagian event terakhir yang dipakai untuk validasi")
+    # Default mengikuti konfigurasi serving (RELAX_FILTERS, RELAX_MIN_RESULTS di app.py)
+    parser.add_argument("--no-relax", action="store_true",
+                        default=os.environ.get('RELAX_FILTERS', '1').lower() in ('0', 'false', 'no'),
+                        help="Pakai filter ketat seperti RELAX_FILTERS=0")
+    parser.add_argument("--relax-min-results", type=int, default=int(os.environ.get('RELAX_MIN_RESULTS', 1)))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from feature_space import load_feature_weights
+    from mouse_recomender import MouseRecommendationSystem
+
+    recommender = MouseRecommendationSystem(args.csv, args.image_folder,
+                                            feature_weights=load_feature_weights(args.initial_weights))
+    logging.disable(logging.INFO)
+    prepared = prepare_events(recommender, read_click_log(args.click_log),
+                              relax=not args.no_relax, min_results=args.relax_min_results)
+    logging.disable(logging.NOTSET)
+    if not prepared:
+        raise SystemExit("No usable click events (clicked mice missing or filtered out)")
+
+    # Event terbaru dipakai untuk validasi agar hasil tidak hanya hafal data lama
+    split = len(prepared) - int(len(prepared) * args.validation_fraction)
+    train, validation = prepared[:split], prepared[split:]
+    baseline = evaluate(recommender.scorer, validation or train, args.k)
+    weights, train_result = tune(recommender, train, args.k, passes=args.passes)
+    recommender.set_feature_weights(weights)
+    validation_result = evaluate(recommender.scorer, validation or train, args.k)
+
+    result = {
+        'weights': weights,
+        'tuned_at': datetime.now(timezone.utc).isoformat(),
+        'k': args.k,
+        'train': train_result,
+        'validation_baseline': baseline,
+        'validation': validation_result
+    }
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps({key: result[key] for key in ('train', 'validation_baseline', 'validation')}))
+
+
+if __name__ == "__main__":
+    main()